@@ -0,0 +1,189 @@
+"""Net the market orders of all strategies before they reach the exchange.
+
+Each strategy trades through its own ``StrategyClient``. Market orders sent
+through it are collected per symbol for a decision window; when the window
+closes the aggregator sends one order for the net position change and every
+strategy is filled virtually, at the net order's price, for the full size it
+asked for. The part of the volume that cancels out never reaches the
+exchange and pays no fees. Per-strategy positions, costs and fees are kept
+in ``SignalAggregator.attribution``.
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StrategyClient:
+    """Client handed to one strategy; its market orders go to the aggregator."""
+
+    def __init__(self, aggregator, strategy: str):
+        self.__wrapped__ = aggregator.client
+        self.aggregator = aggregator
+        self.strategy = strategy
+
+    def __getattr__(self, name):
+        return getattr(self.__wrapped__, name)
+
+    async def order_market_buy(self, symbol, quantity, **params):
+        if params:
+            return await self.__wrapped__.order_market_buy(
+                symbol=symbol, quantity=quantity, **params
+            )
+        return await self.aggregator.submit(self.strategy, symbol, "BUY", quantity)
+
+    async def order_market_sell(self, symbol, quantity, **params):
+        if params:
+            return await self.__wrapped__.order_market_sell(
+                symbol=symbol, quantity=quantity, **params
+            )
+        return await self.aggregator.submit(self.strategy, symbol, "SELL", quantity)
+
+
+class SignalAggregator:
+    """Collects strategy orders per symbol and sends only the net order."""
+
+    def __init__(self, client, window=5.0, fee_rate: float = 0.001):
+        self.client = client
+        # seconds, or a callable returning seconds (read when a window opens)
+        self.window = window
+        # used to estimate the fees avoided by netting
+        self.fee_rate = fee_rate
+        self._pending = {}
+        self._timers = {}
+        self._clients = {}
+        self._last_price = {}
+        # strategy -> symbol -> {"position", "cost", "fees", "internalized"}
+        self.attribution = {}
+        self.stats = {"intents": 0, "orders": 0, "internalized": 0.0, "fees_saved": 0.0}
+
+    def client_for(self, strategy: str) -> StrategyClient:
+        """Return the client ``strategy`` should trade through."""
+        if strategy not in self._clients:
+            self._clients[strategy] = StrategyClient(self, strategy)
+        return self._clients[strategy]
+
+    async def submit(self, strategy: str, symbol: str, side: str, quantity: float):
+        """Queue an order and wait for the decision window to close.
+
+        Orders for a zero quantity (a strategy weighted 0) are answered at
+        once as rejected and never enter a window.
+        """
+        self.stats["intents"] += 1
+        if not quantity:
+            return {
+                "symbol": symbol,
+                "side": side,
+                "status": "REJECTED",
+                "executedQty": "0",
+                "netOrder": None,
+            }
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(symbol, []).append((strategy, side, float(quantity), future))
+        if symbol not in self._timers:
+            window = self.window() if callable(self.window) else self.window
+            self._timers[symbol] = asyncio.create_task(self._close_later(symbol, window))
+        return await future
+
+    def discard_pending(self) -> None:
+        """Drop orders of open windows without sending them (on shutdown)."""
+        for task in self._timers.values():
+            task.cancel()
+        self._timers.clear()
+        for intents in self._pending.values():
+            for *_, future in intents:
+                future.cancel()
+        self._pending.clear()
+
+    async def _close_later(self, symbol: str, window: float) -> None:
+        await asyncio.sleep(window)
+        self._timers.pop(symbol, None)
+        await self.decide(symbol)
+
+    async def decide(self, symbol: str) -> None:
+        """Close ``symbol``'s window: send the net order and fill every strategy."""
+        intents = self._pending.pop(symbol, [])
+        if not intents:
+            return
+        buys = sum(q for _, side, q, _ in intents if side == "BUY")
+        sells = sum(q for _, side, q, _ in intents if side == "SELL")
+        net = round(buys - sells, 8)
+        order = None
+        try:
+            if net > 0:
+                order = await self.client.order_market_buy(symbol=symbol, quantity=net)
+            elif net < 0:
+                order = await self.client.order_market_sell(symbol=symbol, quantity=-net)
+            price = await self._fill_price(symbol, order)
+        except Exception as e:
+            for *_, future in intents:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self._last_price[symbol] = price
+        if order is not None:
+            self.stats["orders"] += 1
+        internalized = min(buys, sells)
+        self.stats["internalized"] += internalized
+        self.stats["fees_saved"] += 2 * internalized * price * self.fee_rate
+        net_side = "BUY" if net > 0 else "SELL"
+        net_total = buys if net > 0 else sells
+        for strategy, side, quantity, future in intents:
+            # the exchange fee is shared by the strategies on the net order's side
+            fee = 0.0
+            if net and side == net_side:
+                fee = abs(net) * price * self.fee_rate * quantity / net_total
+            # each side had ``internalized`` of its volume matched by the other;
+            # ``submit`` keeps zero quantities out, so an intent's side is never empty
+            side_total = buys if side == "BUY" else sells
+            matched = quantity * internalized / side_total
+            self._attribute(strategy, symbol, side, quantity, price, fee, matched)
+            if not future.done():
+                future.set_result(
+                    {
+                        "symbol": symbol,
+                        "side": side,
+                        "status": "FILLED",
+                        "executedQty": str(quantity),
+                        "price": str(price),
+                        "netOrder": order,
+                    }
+                )
+        logger.info(
+            "Netted %d %s orders (buy %.8f, sell %.8f) into %s",
+            len(intents),
+            symbol,
+            buys,
+            sells,
+            f"{net_side} {abs(net):.8f}" if net else "no order",
+        )
+
+    async def _fill_price(self, symbol: str, order) -> float:
+        if order:
+            executed = float(order.get("executedQty", 0) or 0)
+            quote = float(order.get("cummulativeQuoteQty", 0) or 0)
+            if executed and quote:
+                return quote / executed
+        ticker = await self.client.get_symbol_ticker(symbol=symbol)
+        return float(ticker["price"])
+
+    def _attribute(self, strategy, symbol, side, quantity, price, fee, matched):
+        entry = self.attribution.setdefault(strategy, {}).setdefault(
+            symbol, {"position": 0.0, "cost": 0.0, "fees": 0.0, "internalized": 0.0}
+        )
+        signed = quantity if side == "BUY" else -quantity
+        entry["position"] += signed
+        entry["cost"] += signed * price
+        entry["fees"] += fee
+        entry["internalized"] += matched
+
+    def summary(self) -> dict:
+        """Return the attribution with a ``pnl`` at each symbol's last fill price."""
+        result = {}
+        for strategy, symbols in self.attribution.items():
+            for symbol, entry in symbols.items():
+                price = self._last_price.get(symbol, 0.0)
+                pnl = entry["position"] * price - entry["cost"] - entry["fees"]
+                result.setdefault(strategy, {})[symbol] = dict(entry, pnl=pnl)
+        return result
@@ -0,0 +1,234 @@
+"""Vectorized backtests of the trading strategies.
+
+``backtest`` runs one strategy over a whole kline history with NumPy
+arrays instead of calling it once per candle: the batch indicators give
+every candle's signal at once, signals become positions, and fees and the
+equity curve follow from the position changes. Every candle is one run of
+the strategy, trading at the candle's close:
+
+* ``scalping``: long ``quantity`` while the fast SMA is above the slow one,
+  short while it is below;
+* ``trend``: long or short ``quantity`` while ``trend_signal`` sees an up-
+  or downtrend (fast/slow EMA and ADX), flat otherwise;
+* ``dca``: buys ``amount`` USDT worth every ``interval_minutes``;
+* ``grid``: buys ``quantity`` at every grid level the close falls through
+  and sells it at every level the close rises through, at the level price.
+
+Live, the scalping and trend strategies send a market order on every run
+while their signal lasts; here they hold one ``quantity`` in the signal's
+direction, so positions stay bounded over long histories. Sizes default
+to what ``capital`` buys at the first close. A run whose equity reaches
+zero is closed out and stays flat, so it cannot lose more than ``capital``.
+"""
+
+import numpy as np
+from binance.helpers import interval_to_milliseconds
+
+import data_training
+import indicators
+from strategies.grid import grid_levels
+
+# Milliseconds in a year; crypto markets trade around the clock.
+YEAR_MS = 365 * 24 * 60 * 60 * 1000
+
+# Parameters used when ``backtest`` is not given them, as the live jobs use.
+DEFAULT_PARAMS = {
+    "scalping": {"ema_fast": 7, "ema_slow": 25},
+    "trend": {"lookback": 100, "adx_period": 14, "adx_threshold": 25.0},
+    "dca": {"interval_minutes": 60},
+    "grid": {"levels": 10, "tick_size": 0.01},
+}
+
+
+def kline_columns(klines) -> dict:
+    """``open_time`` (int64 ms), ``high``, ``low`` and ``close`` arrays of a history.
+
+    ``klines`` may be the frame ``fetch_historical_data`` returns, a column
+    dict from ``KlineStore.read`` or ``decode_klines``, or REST kline rows.
+    """
+    if isinstance(klines, dict) or hasattr(klines, "columns"):
+        columns = {name: np.asarray(klines[name]) for name in ("open_time", "high", "low", "close")}
+    else:
+        rows = np.asarray(klines, dtype=np.float64).reshape(-1, 12)
+        columns = {"open_time": rows[:, 0], "high": rows[:, 2], "low": rows[:, 3], "close": rows[:, 4]}
+    open_time = columns["open_time"]
+    if np.issubdtype(open_time.dtype, np.datetime64):
+        open_time = open_time.astype("datetime64[ms]")
+    columns["open_time"] = open_time.astype(np.int64)
+    for name in ("high", "low", "close"):
+        columns[name] = columns[name].astype(np.float64, copy=False)
+    return columns
+
+
+def _signal(values) -> np.ndarray:
+    """-1, 0 or 1 per candle, 0 while an indicator is not defined yet."""
+    return np.nan_to_num(np.sign(values))
+
+
+def scalping_positions(columns: dict, params: dict, capital: float):
+    close = columns["close"]
+    fast = indicators.sma(close, int(params["ema_fast"]))
+    slow = indicators.sma(close, int(params["ema_slow"]))
+    signal = _signal(fast - slow)
+    quantity = params.get("quantity") or capital / close[0]
+    return signal, signal * quantity, None
+
+
+def trend_positions(columns: dict, params: dict, capital: float):
+    close = columns["close"]
+    lookback = int(params.get("lookback", 100))
+    fast = indicators.ema(close, int(params.get("ema_fast", max(lookback // 4, 1))))
+    slow = indicators.ema(close, int(params.get("ema_slow", lookback)))
+    strength = indicators.adx(
+        columns["high"], columns["low"], close, int(params.get("adx_period", 14))
+    )
+    # like ``trend_signal``: no trend unless ADX is above the threshold
+    with np.errstate(invalid="ignore"):
+        trending = strength > float(params.get("adx_threshold", 25.0))
+    signal = np.where(trending, _signal(fast - slow), 0.0)
+    quantity = params.get("quantity") or capital / close[0]
+    return signal, signal * quantity, None
+
+
+def dca_positions(columns: dict, params: dict, capital: float):
+    close = columns["close"]
+    step = int(float(params.get("interval_minutes", 60)) * 60_000)
+    # buy in the first candle of every interval
+    slot = columns["open_time"] // step
+    buys = np.ones(len(close), dtype=bool)
+    buys[1:] = slot[1:] != slot[:-1]
+    amount = params.get("amount") or capital / max(int(buys.sum()), 1)
+    spent = np.where(buys, float(amount), 0.0)
+    return buys.astype(np.float64), np.cumsum(spent / close), spent
+
+
+def grid_positions(columns: dict, params: dict, capital: float):
+    close = columns["close"]
+    lower = params.get("lower") or close[0] * 0.9
+    upper = params.get("upper") or close[0] * 1.1
+    prices = np.asarray(
+        grid_levels(lower, upper, int(params.get("levels", 10)), params.get("tick_size", 0.01))
+    )
+    quantity = params.get("quantity") or capital / (len(prices) * close[0])
+    # number of levels below each close; a fall from a to b levels buys
+    # the levels prices[b:a], a rise sells them
+    below = np.searchsorted(prices, close, side="left")
+    position = (below[0] - below) * quantity
+    level_sums = np.concatenate(([0.0], np.cumsum(prices)))[below]
+    spent = -np.diff(level_sums, prepend=level_sums[0]) * quantity
+    signal = -np.sign(np.diff(below, prepend=below[0])).astype(np.float64)
+    return signal, position, spent
+
+
+STRATEGIES = {
+    "scalping": scalping_positions,
+    "trend": trend_positions,
+    "dca": dca_positions,
+    "grid": grid_positions,
+}
+
+
+def simulate(close, position, spent=None, fee_rate: float = 0.001, capital: float = 1000.0):
+    """Return ``(position, trades, fees, equity, spent)`` of holding ``position`` after each candle.
+
+    ``trades`` are the base quantities bought (negative: sold) at each
+    candle and ``spent`` the USDT paid for them, by default at the close.
+    The run stops when its equity reaches zero: the position is closed at
+    that candle's close, equity stays at zero and nothing trades afterwards.
+    """
+    position = np.asarray(position, dtype=np.float64)
+    trades = np.diff(position, prepend=0.0)
+    spent = trades * close if spent is None else np.array(spent, dtype=np.float64)
+    fees = np.abs(spent) * fee_rate
+    equity = capital - np.cumsum(spent + fees) + position * close
+    ruined = np.flatnonzero(equity <= 0)
+    if len(ruined):
+        stop = ruined[0]
+        position = position.copy()
+        position[stop:] = 0.0
+        trades = np.diff(position, prepend=0.0)
+        spent[stop] = trades[stop] * close[stop]
+        spent[stop + 1 :] = 0.0
+        fees[stop:] = np.abs(spent[stop:]) * fee_rate
+        equity[stop:] = 0.0
+    return position, trades, fees, equity, spent
+
+
+def metrics(equity, spent, fees, capital: float, periods_per_year: float) -> dict:
+    """Total return, annualized Sharpe ratio, max drawdown and turnover of a run."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # no returns once the capital is gone (see ``simulate``)
+        returns = np.where(equity[:-1] > 0, np.diff(equity) / equity[:-1], 0.0)
+        peak = np.maximum.accumulate(equity)
+        drawdown = np.where(peak > 0, 1 - equity / peak, 0.0)
+    returns = returns[np.isfinite(returns)]
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    sharpe = returns.mean() / std * np.sqrt(periods_per_year) if std > 0 else 0.0
+    return {
+        "return": float(equity[-1] / capital - 1) if len(equity) else 0.0,
+        "sharpe": float(sharpe),
+        "max_drawdown": float(np.clip(drawdown, 0.0, 1.0).max()) if len(drawdown) else 0.0,
+        # traded value as a multiple of the starting capital
+        "turnover": float(np.abs(spent).sum() / capital),
+        "fees": float(fees.sum()),
+        "trades": int(np.count_nonzero(spent)),
+    }
+
+
+def backtest(
+    klines,
+    strategy: str,
+    params: dict = None,
+    fee_rate: float = 0.001,
+    capital: float = 1000.0,
+    interval: str = None,
+) -> dict:
+    """Backtest ``strategy`` on ``klines`` and return its arrays and ``metrics``.
+
+    ``params`` override ``DEFAULT_PARAMS``. ``interval`` annualizes the
+    Sharpe ratio and defaults to the spacing of the candles.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy}")
+    columns = kline_columns(klines)
+    close = columns["close"]
+    params = dict(DEFAULT_PARAMS[strategy], **(params or {}))
+    if len(close) == 0:
+        raise ValueError("No klines to backtest")
+    signal, position, spent = STRATEGIES[strategy](columns, params, capital)
+    position, trades, fees, equity, spent = simulate(close, position, spent, fee_rate, capital)
+    if interval is not None:
+        step = interval_to_milliseconds(interval)
+    else:
+        step = float(np.median(np.diff(columns["open_time"]))) if len(close) > 1 else 60_000
+    return {
+        "strategy": strategy,
+        "params": params,
+        "open_time": columns["open_time"],
+        "signal": signal,
+        "position": position,
+        "trades": trades,
+        "fees": fees,
+        "equity": equity,
+        "metrics": metrics(equity, spent, fees, capital, YEAR_MS / step),
+    }
+
+
+def backtest_all(klines, strategies=None, params: dict = None, **kwargs) -> dict:
+    """Backtest several strategies on one history; ``params`` maps strategy to overrides."""
+    columns = kline_columns(klines)
+    params = params or {}
+    return {
+        name: backtest(columns, name, params.get(name), **kwargs)
+        for name in (strategies or STRATEGIES)
+    }
+
+
+async def backtest_symbol(
+    symbol: str, interval: str = "1h", lookback="365 days ago UTC", strategies=None, **kwargs
+) -> dict:
+    """Backtest strategies on ``symbol``'s history from ``fetch_historical_data``."""
+    frame = await data_training.fetch_historical_data(
+        symbol, interval, lookback, columns=["open_time", "high", "low", "close"]
+    )
+    return backtest_all(frame, strategies, interval=interval, **kwargs)
@@ -0,0 +1,96 @@
+"""Speed of the vectorized backtests on years of 1m candles.
+
+Backtests every strategy on ``years`` of synthetic 1m candles from
+``DummyClient`` and, for comparison, runs the scalping and trend strategies
+one candle at a time with the streaming indicators on the first
+``loop_candles`` candles, checking that both give the same equity. Run from
+the repository root:
+
+    python benchmarks/bench_backtest.py [years] [loop_candles]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np  # noqa: E402
+
+import backtest  # noqa: E402
+import indicators  # noqa: E402
+from dummy_client import KLINE_ANCHOR_MS, DummyClient  # noqa: E402
+from strategies.trend_following import trend_signal  # noqa: E402
+
+MINUTES_PER_YEAR = 365 * 24 * 60
+FEE_RATE = 0.001
+CAPITAL = 1000.0
+
+
+def loop_equity(columns, strategy):
+    """Equity of ``strategy`` stepping through the candles one at a time."""
+    close = columns["close"]
+    quantity = CAPITAL / close[0]
+    if strategy == "scalping":
+        fast, slow = indicators.SMA(7), indicators.SMA(25)
+    else:
+        fast, slow, adx = indicators.EMA(25), indicators.EMA(100), indicators.ADX(14)
+    position, cash, equity = 0.0, CAPITAL, []
+    for high, low, price in zip(
+        columns["high"].tolist(), columns["low"].tolist(), close.tolist()
+    ):
+        f, s = fast.update(price), slow.update(price)
+        if strategy == "scalping":
+            signal = 0 if f is None or s is None else int(f > s) - int(f < s)
+        else:
+            signal = trend_signal(f, s, adx.update(price, high, low))
+        if equity and equity[-1] <= 0:
+            # ruined: closed out and flat from then on
+            equity.append(0.0)
+            continue
+        traded = (signal * quantity - position) * price
+        cash -= traded + abs(traded) * FEE_RATE
+        position = signal * quantity
+        equity.append(cash + position * price)
+        if equity[-1] <= 0:
+            equity[-1] = 0.0
+    return np.array(equity)
+
+
+def main(years, loop_candles):
+    count = int(years * MINUTES_PER_YEAR)
+    columns = DummyClient().klines(
+        "BTCUSDT", "1m", KLINE_ANCHOR_MS - count * 60_000, count, arrays=True
+    )
+    print(f"{count:,} 1m candles ({years} years)")
+    print(
+        f"{'strategy':>9} {'time s':>8} {'candles/s':>12} {'return':>9} "
+        f"{'sharpe':>8} {'max dd':>8} {'turnover':>9}"
+    )
+    for strategy in backtest.STRATEGIES:
+        started = time.perf_counter()
+        result = backtest.backtest(columns, strategy, fee_rate=FEE_RATE, capital=CAPITAL)
+        elapsed = time.perf_counter() - started
+        m = result["metrics"]
+        print(
+            f"{strategy:>9} {elapsed:>8.3f} {count / elapsed:>12,.0f} {m['return']:>9.3f} "
+            f"{m['sharpe']:>8.2f} {m['max_drawdown']:>8.3f} {m['turnover']:>9.1f}"
+        )
+
+    head = {name: values[:loop_candles] for name, values in columns.items()}
+    print(f"\nper-candle loop on {loop_candles:,} candles")
+    for strategy in ("scalping", "trend"):
+        started = time.perf_counter()
+        expected = loop_equity(head, strategy)
+        elapsed = time.perf_counter() - started
+        equity = backtest.backtest(head, strategy, fee_rate=FEE_RATE, capital=CAPITAL)["equity"]
+        print(
+            f"{strategy:>9} {elapsed:>8.3f} {loop_candles / elapsed:>12,.0f}  "
+            f"max equity difference {np.max(np.abs(equity - expected)):.2e}"
+        )
+
+
+if __name__ == "__main__":
+    years = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    loop_candles = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    main(years, loop_candles)
@@ -0,0 +1,187 @@
+"""Throughput of the execution queue against a rate-limited, flaky exchange.
+
+Market orders from several strategies arrive at ``ARRIVALS_PER_SECOND``
+(twice the exchange limit) and go to ``DummyClient`` behind a stand-in
+exchange that adds latency, answers 429 when more than ``ORDERS_PER_SECOND``
+orders arrive within a second and loses some responses after the order was
+placed. Four senders are compared:
+
+* direct: call the client once per signal, as the strategies used to;
+* retry: call the client and blindly resend on any error;
+* queue: ``ExecutionQueue`` with token buckets and idempotent retries;
+* netted: the same with a 50 ms netting window.
+
+Run from the repository root:
+
+    python benchmarks/bench_execution_queue.py [orders] [latency_seconds]
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from binance.exceptions import BinanceAPIException  # noqa: E402
+
+from dummy_client import DummyClient  # noqa: E402
+from execution import ExecutionQueue  # noqa: E402
+from rate_limit import TokenBucket  # noqa: E402
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT", "XRPUSDT"]
+ORDERS_PER_SECOND = 50
+ARRIVALS_PER_SECOND = 100
+LOST_RESPONSES = 0.05
+
+
+class _Response:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class FlakyExchange:
+    """DummyClient front with latency, an order rate limit and lost responses."""
+
+    def __init__(self, latency: float, seed: int = 1):
+        self.__wrapped__ = DummyClient(start_balance=1e12)
+        for symbol in SYMBOLS:
+            # market orders in symbols without a price expire unfilled
+            self.__wrapped__.prices.setdefault(symbol, 100.0)
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.recent = []
+        self.rejected = 0
+
+    def __getattr__(self, name):
+        return getattr(self.__wrapped__, name)
+
+    async def _order(self, method, **params):
+        await asyncio.sleep(self.latency)
+        now = time.monotonic()
+        self.recent = [t for t in self.recent if t > now - 1]
+        if len(self.recent) >= ORDERS_PER_SECOND:
+            self.rejected += 1
+            raise BinanceAPIException(
+                _Response({"Retry-After": "1"}),
+                429,
+                json.dumps({"code": -1003, "msg": "Too many requests"}),
+            )
+        self.recent.append(now)
+        order = await method(**params)
+        if self.rng.random() < LOST_RESPONSES:
+            raise asyncio.TimeoutError()
+        return order
+
+    async def order_market_buy(self, **params):
+        return await self._order(self.__wrapped__.order_market_buy, **params)
+
+    async def order_market_sell(self, **params):
+        return await self._order(self.__wrapped__.order_market_sell, **params)
+
+    async def get_order(self, **params):
+        await asyncio.sleep(self.latency)
+        return await self.__wrapped__.get_order(**params)
+
+
+def signals(count: int, seed: int = 2):
+    """Return ``(delay, symbol, side, quantity)`` for ``count`` signals."""
+    rng = random.Random(seed)
+    return [
+        (
+            i / ARRIVALS_PER_SECOND,
+            rng.choice(SYMBOLS),
+            rng.choice(("BUY", "SELL")),
+            round(rng.uniform(0.1, 1.0), 3),
+        )
+        for i in range(count)
+    ]
+
+
+def net_position(client: DummyClient) -> Counter:
+    position = Counter()
+    for symbol in client.trade_store.symbols():
+        trades = client.trade_store.columns(symbol)
+        position[symbol] = float(
+            trades["qty"][trades["is_buyer"]].sum() - trades["qty"][~trades["is_buyer"]].sum()
+        )
+    return position
+
+
+async def send_direct(client, delay, symbol, side, quantity, retry):
+    await asyncio.sleep(delay)
+    method = client.order_market_buy if side == "BUY" else client.order_market_sell
+    while True:
+        try:
+            return await method(symbol=symbol, quantity=quantity)
+        except Exception:
+            if not retry:
+                return None
+            await asyncio.sleep(0.1)
+
+
+async def run_mode(mode, orders, latency):
+    exchange = FlakyExchange(latency)
+    if mode in ("queue", "netted"):
+        client = ExecutionQueue(
+            exchange,
+            net_window=0.05 if mode == "netted" else 0,
+            buckets={
+                "orders_10s": TokenBucket(ORDERS_PER_SECOND, 1),
+                "orders_1d": TokenBucket(200000, 86400),
+                "weight": TokenBucket(6000, 60),
+            },
+        )
+        client.retry_delay = 0.05
+    else:
+        client = exchange
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            send_direct(client, *signal, retry=mode != "direct")
+            for signal in signals(orders)
+        ),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - started
+    failed = sum(1 for r in results if r is None or isinstance(r, Exception))
+    intended = Counter()
+    for _, symbol, side, quantity in signals(orders):
+        intended[symbol] += quantity if side == "BUY" else -quantity
+    actual = net_position(exchange.__wrapped__)
+    error = sum(abs(intended[s] - actual[s]) for s in SYMBOLS)
+    return {
+        "time": elapsed,
+        "sent": len(exchange.__wrapped__.orders),
+        "rejected": exchange.rejected,
+        "failed": failed,
+        "error": error,
+    }
+
+
+async def run(orders: int, latency: float):
+    print(
+        f"{orders} signals on {len(SYMBOLS)} symbols, {latency * 1000:.0f} ms latency, "
+        f"{ORDERS_PER_SECOND} orders/s limit, {LOST_RESPONSES:.0%} lost responses"
+    )
+    print(
+        f"{'mode':>7} {'time s':>7} {'exch orders':>11} {'429s':>6} "
+        f"{'failed':>7} {'position error':>15}"
+    )
+    for mode in ("direct", "retry", "queue", "netted"):
+        r = await run_mode(mode, orders, latency)
+        print(
+            f"{mode:>7} {r['time']:>7.2f} {r['sent']:>11} {r['rejected']:>6} "
+            f"{r['failed']:>7} {r['error']:>15.3f}"
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR)
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    asyncio.run(run(orders, latency))
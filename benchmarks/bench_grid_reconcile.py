@@ -0,0 +1,112 @@
+"""Compare diff-based grid reconciliation with cancelling and re-placing everything.
+
+Runs a random price walk against ``DummyClient`` limit orders for grids of
+10 to 500 levels. Fills reach the engine through the simulated user data
+stream. Run from the repository root:
+
+    python benchmarks/bench_grid_reconcile.py [steps] [seed]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dummy_client import DummyClient  # noqa: E402
+from strategies.grid import GridEngine, grid_levels, target_orders  # noqa: E402
+from user_stream import UserDataStream  # noqa: E402
+
+SYMBOL = "BTCUSDT"
+LOWER, UPPER = 25000.0, 35000.0
+QUANTITY = 0.001
+
+
+class CountingClient:
+    """Counts order requests sent to the wrapped client."""
+
+    def __init__(self, client):
+        self.__wrapped__ = client
+        self.requests = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self.__wrapped__, name)
+        if name.startswith(("order_", "cancel_", "get_open_orders")):
+            async def counted(*args, **kwargs):
+                self.requests += 1
+                return await attr(*args, **kwargs)
+
+            return counted
+        return attr
+
+
+async def naive_reconcile(client, levels, price):
+    """Cancel every open order, then place the whole target grid."""
+    for order in await client.get_open_orders(symbol=SYMBOL):
+        await client.cancel_order(symbol=SYMBOL, orderId=order["orderId"])
+    targets = target_orders(grid_levels(LOWER, UPPER, levels), price)
+    await asyncio.gather(
+        *(
+            (client.order_limit_buy if side == "BUY" else client.order_limit_sell)(
+                symbol=SYMBOL, quantity=QUANTITY, price=f"{p:.8f}"
+            )
+            for p, side in targets.items()
+        )
+    )
+
+
+async def run_one(levels, prices, naive):
+    dummy = DummyClient(start_balance=10_000_000)
+    dummy.prices[SYMBOL] = prices[0]
+    client = CountingClient(dummy)
+    engine = GridEngine(client, SYMBOL)
+    stream = UserDataStream(client)
+    stream.add_listener(engine.on_execution_report)
+    await stream.start()
+    await asyncio.sleep(0)
+    kept = total = 0
+    started = time.perf_counter()
+    for price in prices:
+        dummy.set_price(SYMBOL, price)
+        # let the user stream deliver the fills
+        await asyncio.sleep(0)
+        before = set(dummy.open_orders)
+        if naive:
+            await naive_reconcile(client, levels, price)
+        else:
+            await engine.reconcile(LOWER, UPPER, levels, QUANTITY, price)
+        total += len(before)
+        kept += len(before & set(dummy.open_orders))
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+    await stream.stop()
+    return client.requests, elapsed, kept / total if total else 1.0
+
+
+async def run(steps: int, seed: int):
+    rng = random.Random(seed)
+    price = (LOWER + UPPER) / 2
+    prices = []
+    for _ in range(steps):
+        price = min(max(price * (1 + rng.gauss(0, 0.004)), LOWER), UPPER)
+        prices.append(price)
+    print(f"{steps} reconciliations over a random walk in {LOWER:.0f}-{UPPER:.0f}")
+    print(
+        f"{'levels':>6} {'mode':>6} {'requests':>9} {'req/run':>8} "
+        f"{'ms/run':>8} {'orders kept':>12}"
+    )
+    for levels in (10, 50, 100, 250, 500):
+        for naive in (True, False):
+            requests, elapsed, kept = await run_one(levels, prices, naive)
+            print(
+                f"{levels:>6} {'naive' if naive else 'diff':>6} {requests:>9} "
+                f"{requests / steps:>8.1f} {elapsed / steps * 1000:>8.2f} {kept:>11.1%}"
+            )
+
+
+if __name__ == "__main__":
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    asyncio.run(run(steps, seed))
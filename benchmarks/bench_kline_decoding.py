@@ -0,0 +1,117 @@
+"""Compare kline decoding paths for wall time and peak memory.
+
+Run from the repository root:
+
+    python benchmarks/bench_kline_decoding.py [rows ...]
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from data_training import decode_klines, _columns_to_frame  # noqa: E402
+
+
+def make_klines(rows: int):
+    """Build Binance-shaped kline rows (strings for prices and volumes)."""
+    rng = random.Random(42)
+    # A pool of distinct strings keeps the fixture itself from dominating RAM.
+    prices = [f"{30000 + rng.uniform(-500, 500):.8f}" for _ in range(4096)]
+    volumes = [f"{rng.uniform(0, 50):.8f}" for _ in range(4096)]
+    start = 1_500_000_000_000
+    klines = []
+    for i in range(rows):
+        t = start + i * 60_000
+        klines.append(
+            [
+                t,
+                prices[i % 4096],
+                prices[(i + 1) % 4096],
+                prices[(i + 2) % 4096],
+                prices[(i + 3) % 4096],
+                volumes[i % 4096],
+                t + 59_999,
+                volumes[(i + 1) % 4096],
+                i % 977,
+                volumes[(i + 2) % 4096],
+                volumes[(i + 3) % 4096],
+                "0",
+            ]
+        )
+    return klines
+
+
+def legacy_decode(klines):
+    """The original ``fetch_historical_data`` decoding."""
+    df = pd.DataFrame(
+        klines,
+        columns=[
+            "open_time",
+            "open",
+            "high",
+            "low",
+            "close",
+            "volume",
+            "close_time",
+            "quote_asset_volume",
+            "number_of_trades",
+            "taker_buy_base",
+            "taker_buy_quote",
+            "ignore",
+        ],
+    )
+    df["open_time"] = pd.to_datetime(df["open_time"], unit="ms")
+    df["close_time"] = pd.to_datetime(df["close_time"], unit="ms")
+    for col in ["open", "high", "low", "close", "volume"]:
+        df[col] = df[col].astype(float)
+    return df
+
+
+CANDIDATES = {
+    "legacy": legacy_decode,
+    "decode_klines": lambda k: _columns_to_frame(decode_klines(k)),
+    "decode_klines compact": lambda k: _columns_to_frame(
+        decode_klines(k, compact=True), compact=True
+    ),
+    "decode_klines ohlcv": lambda k: _columns_to_frame(
+        decode_klines(k, columns=["open_time", "open", "high", "low", "close", "volume"])
+    ),
+}
+
+
+def measure(func, klines):
+    start = time.perf_counter()
+    df = func(klines)
+    elapsed = time.perf_counter() - start
+    frame_bytes = df.memory_usage(deep=True).sum()
+    del df
+
+    tracemalloc.start()
+    df = func(klines)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del df
+    return elapsed, peak, frame_bytes
+
+
+def main(sizes):
+    print(f"{'rows':>9}  {'decoder':<22} {'time s':>8} {'peak MB':>9} {'frame MB':>9}")
+    for rows in sizes:
+        klines = make_klines(rows)
+        for name, func in CANDIDATES.items():
+            elapsed, peak, frame_bytes = measure(func, klines)
+            print(
+                f"{rows:>9}  {name:<22} {elapsed:>8.3f} {peak / 2**20:>9.1f} "
+                f"{frame_bytes / 2**20:>9.1f}"
+            )
+        del klines
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
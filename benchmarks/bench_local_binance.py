@@ -0,0 +1,136 @@
+"""End-to-end latency of the real ``AsyncClient`` against ``LocalBinance``.
+
+Runs the local stand-in server in a child process and times the bot's hot
+paths through ``binance_client.get_binance_client`` with
+``BINANCE_BASE_URL`` pointing at it: an unsigned ticker request and the
+signed account request and market order, one at a time and with
+``concurrency`` requests in flight, each compared with the same call on an
+in-process ``DummyClient``. Also times a limit order until its
+``executionReport`` arrives on the user data stream. Run from the
+repository root:
+
+    python benchmarks/bench_local_binance.py [requests] [concurrency]
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import aiohttp  # noqa: E402
+
+import binance_client  # noqa: E402
+from dummy_client import DummyClient  # noqa: E402
+from local_binance import LocalBinance  # noqa: E402
+
+API_KEY = "bench"
+API_SECRET = "bench"
+SYMBOL = "BTCUSDT"
+
+
+def run_server(conn):
+    async def serve():
+        server = LocalBinance(
+            DummyClient(start_balance=1e12), API_KEY, API_SECRET, "127.0.0.1", 0
+        )
+        await server.start()
+        conn.send(server.url)
+        # serve until the parent closes the pipe
+        await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+        await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except EOFError:
+        pass
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def measure(name, target, call, count, concurrency):
+    samples = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await call()
+            samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    print(
+        f"{name:>14} {target:>12} {concurrency:>4} {count / elapsed:>10,.0f} "
+        f"{percentile(samples, 0.5) * 1e3:>8.2f} {percentile(samples, 0.95) * 1e3:>8.2f}"
+    )
+
+
+async def order_to_event(client, count):
+    """Milliseconds from placing a limit order until its NEW event arrives."""
+    samples = []
+    async with binance_client.socket_manager(client).user_socket() as stream:
+        for _ in range(count):
+            started = time.perf_counter()
+            order = await client.order_limit_buy(symbol=SYMBOL, quantity=0.001, price=1000)
+            while True:
+                event = await stream.recv()
+                if event.get("i") == order["orderId"] and event.get("x") == "NEW":
+                    break
+            samples.append(time.perf_counter() - started)
+            await client.cancel_order(symbol=SYMBOL, orderId=order["orderId"])
+    samples.sort()
+    return percentile(samples, 0.5) * 1e3, percentile(samples, 0.95) * 1e3
+
+
+async def run(url, count, concurrency):
+    os.environ["BINANCE_BASE_URL"] = url
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    client = await binance_client.get_binance_client(
+        API_KEY, API_SECRET, session_params={"connector": connector}
+    )
+    dummy = DummyClient(start_balance=1e12)
+    # the raw clients, so the price cache does not answer the ticker requests
+    calls = {
+        "ticker": lambda c: c.get_symbol_ticker(symbol=SYMBOL),
+        "account": lambda c: c.get_account(),
+        "market order": lambda c: c.order_market_buy(symbol=SYMBOL, quantity=0.001),
+    }
+    print(f"{count} requests per row, server at {url}")
+    print(
+        f"{'call':>14} {'client':>12} {'conc':>4} {'req/s':>10} {'p50 ms':>8} {'p95 ms':>8}"
+    )
+    try:
+        for name, call in calls.items():
+            for target, label in ((dummy, "in-process"), (client.__wrapped__, "local server")):
+                for level in (1, concurrency):
+                    await measure(name, label, lambda: call(target), count, level)
+        p50, p95 = await order_to_event(client, min(count, 200))
+        print(f"order -> user event: p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+    finally:
+        await client.close_connection()
+
+
+def main(count, concurrency):
+    parent, child = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=run_server, args=(child,))
+    server.start()
+    try:
+        asyncio.run(run(parent.recv(), count, concurrency))
+    finally:
+        parent.close()
+        server.join(5)
+        if server.is_alive():
+            server.terminate()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    main(count, concurrency)
@@ -0,0 +1,54 @@
+"""Speed of the parallel parameter sweep.
+
+Sweeps the default scalping and trend grids over ``years`` of synthetic 1m
+candles from ``DummyClient``, once in this process one parameter set after
+the other and then with ``optimizer.sweep`` on 1, 2, 4, ... worker
+processes up to the number of cores (which backtest the in-sample and
+holdout parts of the history separately). Also prints how much kline data
+pickling the history into every task would have sent to the workers
+instead of sharing it. Run from the repository root:
+
+    python benchmarks/bench_optimizer.py [years]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import backtest  # noqa: E402
+import optimizer  # noqa: E402
+from dummy_client import KLINE_ANCHOR_MS, DummyClient  # noqa: E402
+
+MINUTES_PER_YEAR = 365 * 24 * 60
+
+
+def main(years):
+    count = int(years * MINUTES_PER_YEAR)
+    columns = backtest.kline_columns(
+        DummyClient().klines("BTCUSDT", "1m", KLINE_ANCHOR_MS - count * 60_000, count, arrays=True)
+    )
+    size = sum(values.nbytes for values in columns.values())
+    print(f"{count:,} 1m candles ({years} years), {size / 1e6:.1f} MB of columns")
+    levels = [1]
+    while levels[-1] * 2 <= (os.cpu_count() or 1):
+        levels.append(levels[-1] * 2)
+    print(f"{'strategy':>9} {'sets':>5} {'workers':>8} {'time s':>8} {'sets/s':>8}")
+    for strategy in ("scalping", "trend"):
+        candidates = optimizer.grid_candidates(optimizer.default_space(strategy, columns))
+        started = time.perf_counter()
+        for params in candidates:
+            backtest.backtest(columns, strategy, params)
+        elapsed = time.perf_counter() - started
+        print(f"{strategy:>9} {len(candidates):>5} {'inline':>8} {elapsed:>8.2f} {len(candidates) / elapsed:>8.1f}")
+        for workers in levels:
+            started = time.perf_counter()
+            optimizer.sweep(columns, strategy, workers=workers)
+            elapsed = time.perf_counter() - started
+            print(f"{strategy:>9} {len(candidates):>5} {workers:>8} {elapsed:>8.2f} {len(candidates) / elapsed:>8.1f}")
+        print(f"{'':>9} pickling the klines per task would send {len(candidates) * size / 1e6:,.0f} MB")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 1)
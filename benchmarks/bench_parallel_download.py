@@ -0,0 +1,51 @@
+"""Measure the speedup of windowed concurrent kline downloads.
+
+Uses ``DummyClient`` with an artificial per-request latency. Run from the
+repository root:
+
+    python benchmarks/bench_parallel_download.py [days] [latency_seconds]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from data_training import download_klines  # noqa: E402
+from dummy_client import DummyClient  # noqa: E402
+from rate_limit import TokenBucket  # noqa: E402
+
+
+async def run(days: int, latency: float):
+    client = DummyClient(latency=latency)
+    end_ms = int(time.time() * 1000)
+    start_ms = end_ms - days * 24 * 60 * 60 * 1000
+    baseline = None
+    print(f"{days} days of 1m klines, {latency * 1000:.0f} ms per request")
+    print(f"{'concurrency':>11} {'rows':>8} {'time s':>8} {'speedup':>8}")
+    for concurrency in (1, 4, 8, 16, 32):
+        # Generous budget so only the concurrency cap is measured.
+        budget = TokenBucket(100_000, 60)
+        started = time.perf_counter()
+        klines = await download_klines(
+            client,
+            "BTCUSDT",
+            "1m",
+            start_ms,
+            end_ms,
+            max_concurrency=concurrency,
+            weight_budget=budget,
+        )
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        times = [k[0] for k in klines]
+        assert times == sorted(set(times)), "klines out of order or duplicated"
+        print(f"{concurrency:>11} {len(klines):>8} {elapsed:>8.2f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    asyncio.run(run(days, latency))
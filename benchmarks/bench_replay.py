@@ -0,0 +1,68 @@
+"""Speed of the accelerated replay of the live trading loop.
+
+Replays ``days`` of synthetic 1m candles from ``DummyClient`` for the first
+``symbols`` of BTCUSDT, ETHUSDT, ... through ``replay.replay``, after
+``warmup`` days of history, with a grid of 5% either side of each symbol's
+price at the start, and prints the replay speed with what the
+strategies did. The candles are seeded, so the order, fill and message
+counts and the equity only change when the strategies' behaviour does and
+can be compared between runs. Run from the repository root:
+
+    python benchmarks/bench_replay.py [days] [symbols] [warmup]
+"""
+
+import collections
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import replay  # noqa: E402
+from dummy_client import KLINE_ANCHOR_MS, DummyClient  # noqa: E402
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT"]
+DAY_MS = 86_400_000
+# Base quantities sized so a day of every-minute scalping orders stays funded.
+CONFIG = {"dca_amount": 0.05}
+
+
+def main(days, symbols, warmup):
+    count = int((days + warmup) * 1440)
+    dummy = DummyClient()
+    history = {
+        symbol: dummy.klines(symbol, "1m", KLINE_ANCHOR_MS - count * 60_000, count, arrays=True)
+        for symbol in SYMBOLS[:symbols]
+    }
+    start_ms = KLINE_ANCHOR_MS - int(days * DAY_MS)
+    # each symbol's grid spans 5% either side of its last warmup close
+    grids = {}
+    for symbol, columns in history.items():
+        price = float(columns["close"][columns["open_time"] < start_ms][-1])
+        grids[symbol] = {"lower": round(price * 0.95, 2), "upper": round(price * 1.05, 2), "levels": 10}
+    result = replay.replay(history, "1m", start_ms, KLINE_ANCHOR_MS, config=dict(CONFIG, grid=grids))
+    print(f"{days} days of 1m candles for {symbols} symbols after {warmup} days of history")
+    print(
+        f"{result['candles']:,} candles in {result['seconds']:.2f}s: "
+        f"{result['candles_per_second']:,.0f} candles/s, {result['speedup']:,.0f}x real time"
+    )
+    runs = sum(job["runs"] for job in result["jobs"])
+    print(f"{runs:,} strategy runs, {result['execution']}")
+    kinds = collections.Counter(
+        (order["type"], order["side"], order["status"]) for order in result["orders"]
+    )
+    for (type_, side, status), n in sorted(kinds.items()):
+        print(f"{type_:>7} {side:>5} {status:>9} {n:>7,}")
+    print(
+        f"{len(result['orders']):,} orders, {result['fills']:,} fills, "
+        f"{len(result['messages']):,} messages, equity {result['equity']:,.2f} USDT"
+    )
+
+
+if __name__ == "__main__":
+    days = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    symbols = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    warmup = float(sys.argv[3]) if len(sys.argv) > 3 else 30
+    # strategies log every run; only the summary is of interest here
+    logging.disable(logging.WARNING)
+    main(days, symbols, warmup)
@@ -0,0 +1,157 @@
+"""Event throughput of the simulated exchange with thousands of resting orders.
+
+A maker keeps ``orders`` limit orders resting within 5% of the price and
+replaces every order that fills with a new one. The price
+follows a random walk of ticks with limited volume, so orders fill partially.
+Three implementations process the same stream:
+
+* scan: check every open order on each tick, as ``DummyClient.set_price``
+  used to;
+* engine: ``SimExchange`` order books on their own;
+* client: ``DummyClient`` on the engine, booking balances, trades and user
+  data events for every fill.
+
+Run from the repository root:
+
+    python benchmarks/bench_sim_exchange.py [orders] [ticks]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dummy_client import DummyClient  # noqa: E402
+from sim_exchange import SimExchange  # noqa: E402
+
+SYMBOL = "BTCUSDT"
+PRICE = 30000.0
+TICK_SIZE = 0.5
+
+
+def random_order(rng, price):
+    """(side, price) of a new resting order near ``price``."""
+    offset = round(rng.uniform(0.0005, 0.05) * price / TICK_SIZE) * TICK_SIZE
+    return ("BUY", price - offset) if rng.random() < 0.5 else ("SELL", price + offset)
+
+
+def price_path(ticks, seed=2):
+    rng = random.Random(seed)
+    price = PRICE
+    path = []
+    for _ in range(ticks):
+        price = round(price * (1 + rng.gauss(0, 0.001)) / TICK_SIZE) * TICK_SIZE
+        path.append((price, rng.uniform(0.5, 5.0)))
+    return path
+
+
+def run_scan(orders, path):
+    rng = random.Random(1)
+    book = {}
+    next_id = 0
+    for _ in range(orders):
+        next_id += 1
+        book[next_id] = [*random_order(rng, PRICE), 1.0]
+    fills = 0
+    for price, volume in path:
+        for side in ("BUY", "SELL"):
+            # bids at or above the price, asks at or below it, best price first
+            crossed = [
+                (order_id, o)
+                for order_id, o in book.items()
+                if o[0] == side and (o[1] >= price if side == "BUY" else o[1] <= price)
+            ]
+            crossed.sort(key=lambda item: (-item[1][1] if side == "BUY" else item[1][1], item[0]))
+            budget = volume
+            for order_id, o in crossed:
+                if budget <= 0:
+                    break
+                qty = min(budget, o[2])
+                budget -= qty
+                o[2] -= qty
+                fills += 1
+                if o[2] <= 1e-12:
+                    del book[order_id]
+                    next_id += 1
+                    book[next_id] = [*random_order(rng, price), 1.0]
+    return fills, next_id
+
+
+class Replacer:
+    """Engine order owner that replaces each filled order."""
+
+    def __init__(self, exchange, rng):
+        self.exchange = exchange
+        self.rng = rng
+        self.filled = []
+
+    def on_fill(self, order, quantity, price, maker):
+        if not order.active:
+            self.filled.append(price)
+
+    def place(self, price):
+        side, limit = random_order(self.rng, price)
+        self.exchange.submit(self.exchange.new_order(SYMBOL, side, "LIMIT", 1.0, limit, self))
+
+
+def run_engine(orders, path):
+    exchange = SimExchange({SYMBOL: PRICE})
+    maker = Replacer(exchange, random.Random(1))
+    for _ in range(orders):
+        maker.place(PRICE)
+    for price, volume in path:
+        exchange.tick(SYMBOL, price, volume)
+        while maker.filled:
+            maker.filled.pop()
+            maker.place(price)
+    return exchange.stats["fills"], exchange.stats["orders"]
+
+
+async def run_client(orders, path):
+    client = DummyClient(start_balance=1e12)
+    rng = random.Random(1)
+
+    async def place(price):
+        side, limit = random_order(rng, price)
+        method = client.order_limit_buy if side == "BUY" else client.order_limit_sell
+        await method(symbol=SYMBOL, quantity=1.0, price=limit)
+
+    for _ in range(orders):
+        await place(PRICE)
+    for price, volume in path:
+        client.set_price(SYMBOL, price, volume)
+        for _ in range(orders - len(client.open_orders)):
+            await place(price)
+    return client.exchange.stats["fills"], client.exchange.stats["orders"]
+
+
+def report(name, started, ticks, result):
+    elapsed = time.perf_counter() - started
+    fills, placed = result
+    # every tick, order placement and fill counts as one event
+    events = ticks + placed + fills
+    print(
+        f"{name:>7} {elapsed:>8.2f} {ticks / elapsed:>10,.0f} "
+        f"{events / elapsed:>11,.0f} {fills:>7}"
+    )
+
+
+def main(orders, ticks):
+    path = price_path(ticks)
+    print(f"{orders} resting orders, {ticks} ticks")
+    print(f"{'impl':>7} {'time s':>8} {'ticks/s':>10} {'events/s':>11} {'fills':>7}")
+    started = time.perf_counter()
+    report("scan", started, ticks, run_scan(orders, path))
+    started = time.perf_counter()
+    report("engine", started, ticks, run_engine(orders, path))
+    started = time.perf_counter()
+    report("client", started, ticks, asyncio.run(run_client(orders, path)))
+
+
+if __name__ == "__main__":
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    main(orders, ticks)
@@ -0,0 +1,82 @@
+"""Speed of ``DummyClient``'s synthetic klines.
+
+Compares the former per-candle loop (``datetime`` arithmetic and four
+``random.uniform`` calls per candle) with the vectorized generator returning
+REST rows and typed arrays. Run from the repository root:
+
+    python benchmarks/bench_synthetic_klines.py [candles]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np  # noqa: E402
+
+from dummy_client import DummyClient  # noqa: E402
+
+
+def legacy_klines(points: int, base_price: float = 30000.0) -> list:
+    """The loop ``get_historical_klines`` used to run."""
+    end = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    now = end - timedelta(hours=points - 1)
+    klines = []
+    for i in range(points):
+        open_time = int((now + timedelta(hours=i)).timestamp() * 1000)
+        open_p = base_price * (1 + random.uniform(-0.01, 0.01))
+        close_p = base_price * (1 + random.uniform(-0.01, 0.01))
+        high_p = max(open_p, close_p) * (1 + random.uniform(0, 0.01))
+        low_p = min(open_p, close_p) * (1 - random.uniform(0, 0.01))
+        volume = random.uniform(1, 10)
+        klines.append(
+            [
+                open_time,
+                str(open_p),
+                str(high_p),
+                str(low_p),
+                str(close_p),
+                str(volume),
+                open_time + 3_599_999,
+                "0",
+                0,
+                "0",
+                "0",
+                "0",
+            ]
+        )
+    return klines
+
+
+async def run(candles: int):
+    client = DummyClient()
+    lookback = f"{candles} hours ago UTC"
+    print(f"{candles} hourly candles")
+    print(f"{'generator':>10} {'time s':>8} {'candles/s':>12}")
+
+    started = time.perf_counter()
+    legacy_klines(candles)
+    elapsed = time.perf_counter() - started
+    print(f"{'legacy':>10} {elapsed:>8.3f} {candles / elapsed:>12,.0f}")
+
+    for arrays in (False, True):
+        started = time.perf_counter()
+        result = await client.get_historical_klines(
+            "BTCUSDT", "1h", lookback, arrays=arrays
+        )
+        elapsed = time.perf_counter() - started
+        count = len(result["close"]) if arrays else len(result)
+        name = "arrays" if arrays else "rows"
+        print(f"{name:>10} {elapsed:>8.3f} {count / elapsed:>12,.0f}")
+
+    again = await DummyClient().get_historical_klines("BTCUSDT", "1h", lookback, arrays=True)
+    print("same candles for the same seed:", np.array_equal(again["close"], result["close"]))
+
+
+if __name__ == "__main__":
+    candles = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    asyncio.run(run(candles))
@@ -0,0 +1,123 @@
+"""Trade history lookups of the simulated account with a long history.
+
+Records ``fills`` trades across ``SYMBOLS`` once in the former flat list of
+dicts and once in ``TradeStore``, then times recording, ``get_my_trades``
+style queries (latest page and ``fromId`` pages) and an account snapshot and
+restore. Run from the repository root:
+
+    python benchmarks/bench_trade_store.py [fills] [queries]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dummy_client import DummyClient  # noqa: E402
+from trade_store import TradeStore  # noqa: E402
+
+SYMBOLS = [f"COIN{i}USDT" for i in range(10)]
+
+
+def fills(count, seed=1):
+    rng = random.Random(seed)
+    start = 1_700_000_000_000
+    return [
+        (
+            rng.choice(SYMBOLS),
+            i + 1,
+            i + 1,
+            start + i * 1000,
+            rng.uniform(90, 110),
+            rng.uniform(0.1, 2),
+            rng.uniform(0.01, 0.2),
+            rng.random() < 0.5,
+            rng.random() < 0.5,
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_record(trades, fill):
+    symbol, trade_id, order_id, time_ms, price, qty, fee, is_buyer, is_maker = fill
+    trades.append(
+        {
+            "symbol": symbol,
+            "id": trade_id,
+            "orderId": order_id,
+            "price": str(price),
+            "qty": str(qty),
+            "quoteQty": str(price * qty),
+            "commission": str(fee),
+            "commissionAsset": "USDT",
+            "time": time_ms,
+            "isBuyer": is_buyer,
+            "isMaker": is_maker,
+        }
+    )
+
+
+def legacy_query(trades, symbol, fromId=None, limit=500):
+    selected = [
+        t for t in trades if t["symbol"] == symbol and (fromId is None or t["id"] >= fromId)
+    ]
+    return selected[-limit:] if fromId is None else selected[:limit]
+
+
+def timed(label, func, count):
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:>28} {elapsed:>8.3f} s {elapsed / count * 1e6:>10.1f} us/op")
+    return result
+
+
+def main(count, queries):
+    data = fills(count)
+    rng = random.Random(2)
+    pages = [(rng.choice(SYMBOLS), rng.randint(1, count)) for _ in range(queries)]
+    print(f"{count} fills over {len(SYMBOLS)} symbols, {queries} queries")
+
+    legacy = []
+    timed("record (list of dicts)", lambda: [legacy_record(legacy, f) for f in data], count)
+    store = TradeStore()
+    timed("record (TradeStore)", lambda: [store.append(*f) for f in data], count)
+
+    timed(
+        "latest page (list)",
+        lambda: [legacy_query(legacy, symbol) for symbol, _ in pages],
+        queries,
+    )
+    timed(
+        "latest page (TradeStore)",
+        lambda: [TradeStore.to_dicts(s, store.query(s)) for s, _ in pages],
+        queries,
+    )
+    timed(
+        "fromId page (list)",
+        lambda: [legacy_query(legacy, symbol, fromId) for symbol, fromId in pages],
+        queries,
+    )
+    timed(
+        "fromId page (TradeStore)",
+        lambda: [TradeStore.to_dicts(s, store.query(s, fromId=f)) for s, f in pages],
+        queries,
+    )
+
+    client = DummyClient()
+    client.trade_store = store
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "account.npz")
+        timed("snapshot", lambda: client.snapshot(path), 1)
+        restored = DummyClient()
+        timed("restore", lambda: restored.restore(path), 1)
+    print("restored fills:", len(restored.trade_store))
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    main(count, queries)
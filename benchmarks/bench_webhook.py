@@ -0,0 +1,198 @@
+"""Command latency in polling mode versus webhook mode, against a fake Telegram.
+
+``FakeTelegram`` stands in for the Bot API: it answers ``getUpdates`` from a
+local queue, records ``sendMessage`` replies and adds ``latency`` seconds to
+each direction of every call. ``/ping`` updates arrive at ``rate`` per second
+and are delivered either through long polling or by POSTing them to a local
+``WebhookServer``, like Telegram does. Latency is measured from the update
+reaching "Telegram" to the bot's reply reaching it.
+
+It doubles as a local test of webhook mode: nothing talks to the real API.
+Run from the repository root:
+
+    python benchmarks/bench_webhook.py [updates] [latency_seconds] [rate]
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import aiohttp  # noqa: E402
+from telegram.ext import ApplicationBuilder, CommandHandler  # noqa: E402
+from telegram.request import BaseRequest  # noqa: E402
+
+import webhook_server  # noqa: E402
+
+CHAT = {"id": 1, "type": "private"}
+USER = {"id": 1, "is_bot": False, "first_name": "bench"}
+BOT = {"id": 2, "is_bot": True, "first_name": "bot", "username": "bench_bot"}
+SECRET = "bench-secret"
+
+
+class FakeTelegram(BaseRequest):
+    """Bot API stand-in with a fixed one-way network latency."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.updates = asyncio.Queue()
+        self.replies = {}
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, **timeouts):
+        await asyncio.sleep(self.latency)
+        endpoint = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data else {}
+        if endpoint == "getUpdates":
+            result = await self._get_updates(float(params.get("timeout", 0)))
+        elif endpoint == "sendMessage":
+            self.replies[params["text"]] = time.perf_counter()
+            result = {
+                "message_id": len(self.replies),
+                "date": int(time.time()),
+                "chat": CHAT,
+                "from": BOT,
+                "text": params["text"],
+            }
+        elif endpoint == "getMe":
+            result = BOT
+        else:
+            result = True
+        await asyncio.sleep(self.latency)
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+    async def _get_updates(self, timeout: float) -> list:
+        try:
+            first = await asyncio.wait_for(self.updates.get(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while not self.updates.empty():
+            batch.append(self.updates.get_nowait())
+        return batch
+
+
+def ping_update(update_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": CHAT,
+            "from": USER,
+            "text": "/ping",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 5}],
+        },
+    }
+
+
+async def pong(update, context):
+    await update.message.reply_text(f"pong {update.update_id}")
+
+
+def build_application(fake):
+    application = (
+        ApplicationBuilder()
+        .token("123:bench")
+        .request(fake)
+        .get_updates_request(fake)
+        .build()
+    )
+    application.add_handler(CommandHandler("ping", pong))
+    webhook_server.install_latency_handlers(application)
+    return application
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run_mode(mode, updates, latency, rate):
+    fake = FakeTelegram(latency)
+    application = build_application(fake)
+    sent = {}
+    metrics = None
+    async with application:
+        if mode == "polling":
+            await application.updater.start_polling(poll_interval=0, timeout=10)
+        else:
+            server = webhook_server.WebhookServer(
+                application, url="", listen="127.0.0.1", port=free_port(), secret=SECRET
+            )
+            await server.start()
+            session = aiohttp.ClientSession()
+            endpoint = f"http://127.0.0.1:{server.port}{server.path}"
+        await application.start()
+
+        async def deliver(update_id):
+            await asyncio.sleep(update_id / rate)
+            sent[f"pong {update_id}"] = time.perf_counter()
+            update = ping_update(update_id)
+            if mode == "polling":
+                fake.updates.put_nowait(update)
+                return
+            await asyncio.sleep(latency)
+            async with session.post(
+                endpoint, json=update, headers={webhook_server.SECRET_HEADER: SECRET}
+            ) as response:
+                response.raise_for_status()
+
+        await asyncio.gather(*(deliver(i) for i in range(1, updates + 1)))
+        while len(fake.replies) < updates:
+            await asyncio.sleep(0.01)
+        if mode == "polling":
+            await application.updater.stop()
+        else:
+            async with session.get(f"http://127.0.0.1:{server.port}/metrics") as response:
+                metrics = await response.json()
+            await session.close()
+            await server.stop()
+        await application.stop()
+    latencies = sorted(fake.replies[text] - sent[text] for text in sent)
+    return latencies, metrics
+
+
+async def run(updates: int, latency: float, rate: float):
+    print(
+        f"{updates} /ping updates at {rate:g}/s, {latency * 1000:.0f} ms one-way latency"
+    )
+    print(f"{'mode':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for mode in ("polling", "webhook"):
+        for stats in webhook_server.LATENCY.values():
+            stats.samples.clear()
+        latencies, metrics = await run_mode(mode, updates, latency, rate)
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(
+            f"{mode:>8} {p50 * 1000:>8.1f} {p95 * 1000:>8.1f} {latencies[-1] * 1000:>8.1f}"
+        )
+        if metrics:
+            handling = metrics["latency"]["handling"]
+            print(
+                f"{'':>8} /metrics: {metrics['updates']} updates, handling p50 "
+                f"{handling['p50'] * 1000:.1f} ms, p95 {handling['p95'] * 1000:.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR)
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+    asyncio.run(run(updates, latency, rate))
@@ -0,0 +1,97 @@
+"""Check that the streaming indicators match their batch functions.
+
+Feeds ``series`` seeded random walks of ``length`` candles one by one into
+every streaming indicator of ``indicators`` (SMA, EMA, RSI, MACD, ATR and
+ADX, each with a few periods) and compares every value with the batch
+function on the whole arrays. Prints the largest relative difference per
+indicator and exits with status 1 if any exceeds the tolerance or if the
+two forms disagree on where the indicator is defined. Run from the
+repository root:
+
+    python benchmarks/check_indicators.py [series] [length]
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import indicators  # noqa: E402
+
+TOLERANCE = 1e-9
+
+# name -> (streaming class, batch function, whether it takes high/low, parameter sets)
+CASES = {
+    "sma": (indicators.SMA, indicators.sma, False, [(1,), (5,), (20,)]),
+    "ema": (indicators.EMA, indicators.ema, False, [(1,), (7,), (25,)]),
+    "rsi": (indicators.RSI, indicators.rsi, False, [(2,), (14,)]),
+    "macd": (indicators.MACD, indicators.macd, False, [(12, 26, 9), (5, 35, 5)]),
+    "atr": (indicators.ATR, indicators.atr, True, [(1,), (14,)]),
+    "adx": (indicators.ADX, indicators.adx, True, [(3,), (14,)]),
+}
+
+
+def random_candles(rng, length):
+    """A random walk of closes with highs and lows around them."""
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.01, length)))
+    # flat stretches exercise the zero-range and zero-loss branches
+    flat = rng.random(length) < 0.05
+    close[1:][flat[1:]] = close[:-1][flat[1:]]
+    spread = np.abs(rng.normal(0, 0.005, length)) * close
+    high = close + spread * rng.random(length)
+    low = close - spread * rng.random(length)
+    return close, high, low
+
+
+def streamed(cls, params, close, high, low):
+    """Values of the streaming indicator after each candle, NaN while undefined."""
+    indicator = cls(*params)
+    width = 3 if cls is indicators.MACD else 1
+    out = np.full((len(close), width), np.nan)
+    for i, (c, h, lo) in enumerate(zip(close.tolist(), high.tolist(), low.tolist())):
+        value = indicator.update(c, h, lo)
+        if value is not None:
+            out[i] = value
+    return out
+
+
+def batched(func, uses_range, params, close, high, low):
+    values = func(high, low, close, *params) if uses_range else func(close, *params)
+    if isinstance(values, tuple):
+        return np.column_stack(values)
+    return values[:, None]
+
+
+def main(series, length):
+    rng = np.random.default_rng(0)
+    worst = {name: 0.0 for name in CASES}
+    failed = False
+    for _ in range(series):
+        close, high, low = random_candles(rng, length)
+        for name, (cls, func, uses_range, param_sets) in CASES.items():
+            for params in param_sets:
+                stream = streamed(cls, params, close, high, low)
+                batch = batched(func, uses_range, params, close, high, low)
+                if not np.array_equal(np.isnan(stream), np.isnan(batch)):
+                    print(f"{name}{params}: streaming and batch values are defined on different candles")
+                    failed = True
+                    continue
+                defined = ~np.isnan(stream)
+                error = np.abs(stream[defined] - batch[defined]) / np.maximum(
+                    np.abs(batch[defined]), 1.0
+                )
+                worst[name] = max(worst[name], float(error.max(initial=0.0)))
+    print(f"{series} random series of {length} candles")
+    for name, error in worst.items():
+        status = "ok" if error <= TOLERANCE else "FAIL"
+        print(f"{name:>5} max relative difference {error:.2e} {status}")
+        failed = failed or error > TOLERANCE
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    series = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    length = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    sys.exit(main(series, length))
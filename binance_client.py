@@ -1,27 +1,77 @@
 import os
 import env_loader
-from binance import AsyncClient
+from binance import AsyncClient, BinanceSocketManager
 from dummy_client import DummyClient
+from price_cache import CachedClient
 
-async def get_binance_client():
+
+def is_simulated(client) -> bool:
+    """Return True if ``client``, or the client it wraps, is a ``DummyClient``."""
+    while hasattr(client, "__wrapped__"):
+        client = client.__wrapped__
+    return isinstance(client, DummyClient)
+
+
+def local_client_class(base_url: str):
+    """``AsyncClient`` subclass sending REST, stream and WebSocket API traffic to ``base_url``.
+
+    Used to point the real client at ``local_binance.LocalBinance``.
+    """
+    base_url = base_url.rstrip("/")
+    ws_url = "ws" + base_url[len("http"):]
+    return type(
+        "LocalAsyncClient",
+        (AsyncClient,),
+        {
+            "API_URL": f"{base_url}/api",
+            "WS_API_URL": f"{ws_url}/ws-api/v3",
+            "STREAM_URL": f"{ws_url}/",
+        },
+    )
+
+
+def socket_manager(client) -> BinanceSocketManager:
+    """Return a ``BinanceSocketManager`` streaming from wherever ``client`` points."""
+    manager = BinanceSocketManager(client)
+    stream_url = getattr(client, "STREAM_URL", None)
+    if stream_url:
+        manager.STREAM_URL = stream_url
+    return manager
+
+
+async def get_binance_client(api_key=None, api_secret=None, session_params=None):
     """
     Create and return a client for Binance.
 
+    Most code should borrow the shared client from ``client_manager``
+    instead of creating its own.
+
     By default a local simulation is used when the environment variable
     ``DUMMY_ACCOUNT`` is set to a truthy value. The simulated account
     starts with 1000 USDT and charges a 0.1%% fee on each trade.
     Otherwise a real ``AsyncClient`` is returned using the provided
-    API credentials. Testnet mode is disabled.
+    API credentials. Testnet mode is disabled. When ``BINANCE_BASE_URL`` is
+    set the ``AsyncClient`` talks to that server instead of Binance, e.g. a
+    ``local_binance`` stand-in for load tests.
+
+    Either client is wrapped in a ``CachedClient`` so price lookups are
+    served from the shared price cache. ``api_key`` and ``api_secret``
+    default to the ``BINANCE_API_KEY``/``BINANCE_API_SECRET`` variables and
+    ``session_params`` are passed to the aiohttp session.
     """
     if os.getenv("DUMMY_ACCOUNT", "false").lower() in ("1", "true", "yes"):
-        return DummyClient()
+        return CachedClient(DummyClient())
 
-    api_key = os.getenv("BINANCE_API_KEY")
-    api_secret = os.getenv("BINANCE_API_SECRET")
+    api_key = api_key or os.getenv("BINANCE_API_KEY")
+    api_secret = api_secret or os.getenv("BINANCE_API_SECRET")
     if not api_key or not api_secret:
         raise RuntimeError(
             "BINANCE_API_KEY or BINANCE_API_SECRET environment variables are not set"
         )
 
-    client = await AsyncClient.create(api_key, api_secret, testnet=False)
-    return client
+    base_url = os.getenv("BINANCE_BASE_URL")
+    client_class = local_client_class(base_url) if base_url else AsyncClient
+    client = await client_class.create(
+        api_key, api_secret, testnet=False, session_params=session_params
+    )
+    return CachedClient(client)
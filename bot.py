@@ -3,6 +3,7 @@ import logging
 import os
 import env_loader
 import logger_config
+import webhook_server
 from datetime import datetime
 
 # Example strategies (to be implemented in strategies package)
@@ -92,6 +93,7 @@ def main() -> None:
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("status", status))
     application.add_handler(CommandHandler("help", help_command))
+    webhook_server.install_latency_handlers(application)
 
     loop = asyncio.get_event_loop()
     # Start background strategy tasks
@@ -101,7 +103,11 @@ def main() -> None:
     loop.create_task(trend_task())
     loop.create_task(sentiment_task())
 
-    # Run the Telegram bot
+    # Run the Telegram bot, on webhook updates when a public URL is configured
+    if os.getenv("TELEGRAM_WEBHOOK_URL"):
+        # same loop as the strategy tasks above
+        loop.run_until_complete(webhook_server.serve(application))
+        return
     application.run_polling()
 
 if __name__ == "__main__":
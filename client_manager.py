@@ -0,0 +1,148 @@
+"""Long-lived, pooled exchange clients shared by every subsystem.
+
+``ClientManager`` creates one client per account on first use and hands
+out the same object afterwards, so commands and strategies reuse an open
+HTTP session instead of paying for a new connection and time sync on each
+call. A background health check pings every client and transparently
+replaces clients that stopped responding.
+"""
+
+import asyncio
+import logging
+import os
+
+import aiohttp
+
+import binance_client
+
+logger = logging.getLogger(__name__)
+
+
+class ClientManager:
+    """Owns one pooled client per account."""
+
+    def __init__(
+        self,
+        connection_limit: int = None,
+        keepalive_timeout: float = None,
+        health_check_interval: float = None,
+    ):
+        self.connection_limit = connection_limit or int(
+            os.getenv("BINANCE_CONNECTION_LIMIT", "20")
+        )
+        self.keepalive_timeout = keepalive_timeout or float(
+            os.getenv("BINANCE_KEEPALIVE_SECONDS", "60")
+        )
+        self.health_check_interval = health_check_interval or float(
+            os.getenv("BINANCE_HEALTH_CHECK_SECONDS", "60")
+        )
+        self._clients = {}
+        self._locks = {}
+        self._health_task = None
+
+    @staticmethod
+    def _credentials(account: str):
+        if account == "default":
+            return None, None
+        suffix = account.upper()
+        return (
+            os.getenv(f"BINANCE_API_KEY_{suffix}"),
+            os.getenv(f"BINANCE_API_SECRET_{suffix}"),
+        )
+
+    async def _connect(self, account: str):
+        api_key, api_secret = self._credentials(account)
+        connector = aiohttp.TCPConnector(
+            limit=self.connection_limit,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300,
+        )
+        try:
+            return await binance_client.get_binance_client(
+                api_key, api_secret, session_params={"connector": connector}
+            )
+        except BaseException:
+            await connector.close()
+            raise
+
+    async def get(self, account: str = "default"):
+        """Return the shared client for ``account``, connecting on first use."""
+        client = self._clients.get(account)
+        if client is not None:
+            return client
+        lock = self._locks.setdefault(account, asyncio.Lock())
+        async with lock:
+            if account not in self._clients:
+                self._clients[account] = await self._connect(account)
+                logger.info("Connected %s Binance client", account)
+            if self._health_task is None or self._health_task.done():
+                self._health_task = asyncio.create_task(self._health_loop())
+        return self._clients[account]
+
+    def set(self, client, account: str = "default") -> None:
+        """Hand out ``client`` for ``account`` instead of connecting one.
+
+        Used to run the bot against a prepared simulation, e.g. a replay.
+        """
+        self._clients[account] = client
+
+    async def reconnect(self, account: str = "default") -> None:
+        """Replace the connection behind ``account``'s client.
+
+        The object returned by :meth:`get` stays the same; only the client it
+        wraps is swapped, so borrowers keep working without re-borrowing.
+        """
+        async with self._locks.setdefault(account, asyncio.Lock()):
+            handle = self._clients.get(account)
+            if handle is not None and binance_client.is_simulated(handle):
+                # a new simulated account would lose its balances
+                return
+            fresh = await self._connect(account)
+            if handle is None:
+                self._clients[account] = fresh
+                return
+            stale, handle.__wrapped__ = handle.__wrapped__, fresh.__wrapped__
+        try:
+            await stale.close_connection()
+        except Exception as e:
+            logger.debug("Error closing stale %s client: %s", account, e)
+        logger.info("Reconnected %s Binance client", account)
+
+    async def check_health(self) -> dict:
+        """Ping every client, reconnecting the ones that fail."""
+        status = {}
+        for account, client in list(self._clients.items()):
+            try:
+                await client.ping()
+                status[account] = True
+            except Exception as e:
+                logger.warning("%s Binance client failed health check: %s", account, e)
+                status[account] = False
+                try:
+                    await self.reconnect(account)
+                except Exception as e:
+                    logger.error("Failed to reconnect %s client: %s", account, e)
+        return status
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self.check_health()
+
+    async def close(self) -> None:
+        """Stop health checks and close every client."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for client in self._clients.values():
+            await client.close_connection()
+        self._clients.clear()
+
+
+# Manager shared by the Telegram front end, strategies and training.
+CLIENT_MANAGER = ClientManager()
+
+
+async def get_client(account: str = "default"):
+    """Borrow the shared client for ``account`` (do not close it)."""
+    return await CLIENT_MANAGER.get(account)
@@ -1,42 +1,254 @@
+import asyncio
+import itertools
 import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 from binance import AsyncClient
+from binance.helpers import date_to_milliseconds, interval_to_milliseconds
 
 import binance_client
+import client_manager
+import kline_cache
+import rate_limit
+from online_metrics import OnlineWeightMetrics, weights_from_metrics
 
 logger = logging.getLogger(__name__)
 
 
-async def fetch_historical_data(symbol: str, interval: str, lookback: str):
-    """Download historical klines from Binance and return as DataFrame."""
-    client = await binance_client.get_binance_client()
-    try:
-        klines = await client.get_historical_klines(symbol, interval, lookback)
-    finally:
-        await client.close_connection()
-
-    df = pd.DataFrame(
-        klines,
-        columns=[
-            "open_time",
-            "open",
-            "high",
-            "low",
-            "close",
-            "volume",
-            "close_time",
-            "quote_asset_volume",
-            "number_of_trades",
-            "taker_buy_base",
-            "taker_buy_quote",
-            "ignore",
-        ],
+def _to_milliseconds(value) -> int:
+    """Convert a lookback like ``"365 days ago UTC"`` or a timestamp to ms."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    return date_to_milliseconds(value)
+
+
+# Field order of a raw Binance kline row.
+KLINE_FIELDS = list(kline_cache.COLUMNS) + ["ignore"]
+_TIME_FIELDS = ("open_time", "close_time")
+_COUNT_FIELDS = ("number_of_trades",)
+# Rows parsed per block; bounds the temporary buffer to a few MB.
+_DECODE_BLOCK_ROWS = 65536
+
+
+def _field_dtype(name: str, compact: bool):
+    if name in _TIME_FIELDS:
+        return np.int64
+    if name in _COUNT_FIELDS:
+        return np.int32 if compact else np.int64
+    return np.float32 if compact else np.float64
+
+
+def decode_klines(klines, compact: bool = False, columns=None) -> dict:
+    """Parse raw kline rows into typed NumPy arrays in a single pass.
+
+    Parameters:
+        klines: Rows as returned by ``get_klines`` or ``download_klines``.
+        compact (bool): Store prices and volumes as float32 and trade counts
+            as int32 instead of float64/int64.
+        columns: Field names to keep, defaults to every field but ``ignore``.
+
+    Times are returned as int64 milliseconds.
+    """
+    names = list(columns) if columns is not None else KLINE_FIELDS[:-1]
+    index = [KLINE_FIELDS.index(name) for name in names]
+    n = len(klines)
+    out = {name: np.empty(n, dtype=_field_dtype(name, compact)) for name in names}
+    width = len(KLINE_FIELDS)
+
+    for start in range(0, n, _DECODE_BLOCK_ROWS):
+        rows = klines[start : start + _DECODE_BLOCK_ROWS]
+        # float64 holds millisecond timestamps and trade counts exactly.
+        block = np.fromiter(
+            itertools.chain.from_iterable(rows),
+            dtype=np.float64,
+            count=len(rows) * width,
+        ).reshape(len(rows), width)
+        for name, i in zip(names, index):
+            out[name][start : start + len(rows)] = block[:, i]
+    return out
+
+
+def _columns_to_frame(columns: dict, compact: bool = False) -> pd.DataFrame:
+    data = {}
+    for name, values in columns.items():
+        if name in _TIME_FIELDS:
+            # Reinterpret the int64 milliseconds without copying.
+            values = values.view("datetime64[ms]")
+        elif compact:
+            values = values.astype(_field_dtype(name, True), copy=False)
+        data[name] = values
+    return pd.DataFrame(data, copy=False)
+
+
+async def _fetch_window(client, symbol, interval, start_ms, end_ms, limit, budget):
+    """Fetch every kline opening in ``[start_ms, end_ms)``."""
+    interval_ms = interval_to_milliseconds(interval)
+    rows = []
+    while start_ms < end_ms:
+        await budget.acquire(rate_limit.KLINE_REQUEST_WEIGHT)
+        page = await client.get_klines(
+            symbol=symbol,
+            interval=interval,
+            startTime=start_ms,
+            endTime=end_ms - 1,
+            limit=limit,
+        )
+        rows.extend(page)
+        if len(page) < limit:
+            break
+        # A full page that stops short of the window end: keep paging.
+        start_ms = page[-1][0] + interval_ms
+    return rows
+
+
+async def download_klines(
+    client,
+    symbol: str,
+    interval: str,
+    start_ms: int,
+    end_ms: int = None,
+    limit: int = 1000,
+    max_concurrency: int = None,
+    weight_budget: rate_limit.TokenBucket = None,
+) -> list:
+    """Download klines for a time range using concurrent windowed requests.
+
+    The range is split into windows of ``limit`` candles that are fetched
+    with at most ``max_concurrency`` requests in flight, each one charged
+    against ``weight_budget``. Results are stitched back in time order with
+    duplicate candles removed; gaps left by the exchange are logged.
+    """
+    interval_ms = interval_to_milliseconds(interval)
+    if end_ms is None:
+        end_ms = int(time.time() * 1000)
+    if max_concurrency is None:
+        max_concurrency = int(os.getenv("KLINE_DOWNLOAD_CONCURRENCY", "8"))
+    budget = weight_budget or rate_limit.DOWNLOAD_WEIGHT
+    semaphore = asyncio.Semaphore(max_concurrency)
+    span = limit * interval_ms
+
+    async def fetch(window_start):
+        async with semaphore:
+            return await _fetch_window(
+                client,
+                symbol,
+                interval,
+                window_start,
+                min(window_start + span, end_ms + 1),
+                limit,
+                budget,
+            )
+
+    windows = await asyncio.gather(
+        *(fetch(t) for t in range(start_ms, end_ms + 1, span))
+    )
+
+    klines = []
+    last_open = None
+    gaps = 0
+    for rows in windows:
+        for row in rows:
+            if last_open is not None and row[0] <= last_open:
+                continue
+            if last_open is not None and row[0] - last_open > interval_ms:
+                gaps += 1
+            klines.append(row)
+            last_open = row[0]
+    if gaps:
+        logger.warning("%s %s history has %d gap(s)", symbol, interval, gaps)
+    logger.debug(
+        "Downloaded %d %s %s klines in %d window(s)",
+        len(klines),
+        symbol,
+        interval,
+        len(windows),
     )
-    df["open_time"] = pd.to_datetime(df["open_time"], unit="ms")
-    df["close_time"] = pd.to_datetime(df["close_time"], unit="ms")
-    for col in ["open", "high", "low", "close", "volume"]:
-        df[col] = df[col].astype(float)
-    return df
+    return klines
+
+
+async def fetch_historical_data(
+    symbol: str,
+    interval: str,
+    lookback,
+    use_cache: bool = True,
+    compact: bool = False,
+    columns=None,
+):
+    """Download historical klines from Binance and return as DataFrame.
+
+    When ``use_cache`` is true closed candles are kept in a
+    :class:`kline_cache.KlineStore` and only the missing tail is requested
+    from the exchange on later calls. ``compact`` and ``columns`` are passed
+    to :func:`decode_klines` to shrink the returned frame.
+    """
+    start_ms = _to_milliseconds(lookback)
+    interval_ms = interval_to_milliseconds(interval)
+    client = await client_manager.get_client()
+    if not use_cache:
+        klines = await download_klines(client, symbol, interval, start_ms)
+        return _columns_to_frame(decode_klines(klines, compact=compact, columns=columns))
+
+    # Keep simulated candles away from real exchange history.
+    store = kline_cache.KlineStore()
+    if binance_client.is_simulated(client):
+        store.root = os.path.join(store.root, "dummy")
+
+    covered = store.coverage_start(symbol, interval)
+    last = store.last_open_time(symbol, interval)
+    rebuild = last is None or covered is None or covered > start_ms
+    fetch_from = start_ms if rebuild else last + interval_ms
+    klines = await download_klines(client, symbol, interval, fetch_from)
+
+    fresh = decode_klines(klines)
+    closed = fresh["close_time"] < int(time.time() * 1000)
+    closed_columns = {name: values[closed] for name, values in fresh.items()}
+    if rebuild:
+        store.replace(symbol, interval, closed_columns, start_ms=start_ms)
+    else:
+        store.append(symbol, interval, closed_columns)
+    logger.info(
+        "Fetched %d new %s %s klines (%s)",
+        len(klines),
+        symbol,
+        interval,
+        "full download" if rebuild else "incremental",
+    )
+
+    cached = store.read(symbol, interval, start_ms)
+    # The still-open candle is returned to the caller but never stored.
+    newest = cached["open_time"][-1] if len(cached["open_time"]) else -1
+    tail = fresh["open_time"] > newest
+    merged = {
+        name: np.concatenate([cached[name], fresh[name][tail]])
+        for name in (columns if columns is not None else cached)
+    }
+    return _columns_to_frame(merged, compact=compact)
+
+
+def weights_from_closes(closes) -> dict:
+    """Return recommended weights from an array of closing prices."""
+    closes = np.asarray(closes, dtype=np.float64)
+    returns = np.diff(closes) / closes[:-1]
+    returns = returns[~np.isnan(returns)]
+    return weights_from_metrics(returns.mean(), returns.std(ddof=1))
+
+
+def _timed_metrics_from_closes(closes, open_times, ew_alphas):
+    # Runs in a worker process, so it has to be a module-level function.
+    started = time.perf_counter()
+    metrics = OnlineWeightMetrics(ew_alphas)
+    metrics.update_many(closes.tolist(), open_times.tolist())
+    return metrics, time.perf_counter() - started
+
+
+def _closed_candles(df: pd.DataFrame) -> pd.DataFrame:
+    now = np.datetime64(int(time.time() * 1000), "ms")
+    return df[df["close_time"].to_numpy() < now]
 
 
 async def calculate_recommended_weights(
@@ -46,58 +258,107 @@ async def calculate_recommended_weights(
 ) -> dict:
     """Return recommended strategy weights based on simple performance metrics."""
     df = await fetch_historical_data(symbol, interval, lookback)
-    returns = df["close"].pct_change().dropna()
-    momentum = returns.mean()
-    volatility = returns.std()
-
-    metrics = {
-        "dca": max(momentum, 0.0) + 1e-9,
-        "grid": volatility + 1e-9,
-        "scalping": volatility / 2 + 1e-9,
-        "trend": abs(momentum) + 1e-9,
-        "sentiment": 1e-9,  # placeholder metric
-    }
-    total = sum(metrics.values())
-    weights = {k: v / total for k, v in metrics.items()}
+    weights = weights_from_closes(df["close"].to_numpy())
     logger.info("Recommended weights calculated: %s", weights)
     return weights
 
 
-async def calculate_recommended_weights_with_progress(
-    symbol: str,
+async def train_weights_batch(
+    symbols,
     interval: str = AsyncClient.KLINE_INTERVAL_1HOUR,
     lookback: str = "365 days ago UTC",
-    bot=None,
-    chat_id=None,
+    max_workers: int = None,
+    max_downloads: int = 4,
+    ew_alpha: float = None,
+    progress=None,
 ) -> dict:
-    """Calculate recommended weights and optionally send progress updates."""
+    """Calculate recommended weights for many symbols at once.
 
-    if bot and chat_id:
-        await bot.send_message(chat_id=chat_id, text="Fetching historical data...")
+    Histories are downloaded concurrently (at most ``max_downloads`` symbols
+    at a time) and the metrics are computed in a process pool so the event
+    loop stays free for trading.
 
-    df = await fetch_historical_data(symbol, interval, lookback)
+    Returns a dict mapping each symbol to ``{"weights": {...},
+    "metrics": OnlineWeightMetrics, "download_seconds": float,
+    "compute_seconds": float}``. The metrics cover every closed candle and
+    can be kept up to date with :func:`update_online_metrics`. When
+    ``ew_alpha`` is given the weights use the exponentially weighted
+    statistics. Symbols whose download failed are logged and left out.
 
-    if bot and chat_id:
-        await bot.send_message(chat_id=chat_id, text="Calculating weight metrics...")
+    ``progress``, if given, is awaited as ``progress(symbol, result)`` as
+    soon as each symbol is done, with ``result`` None when it failed.
+    """
+    semaphore = asyncio.Semaphore(max_downloads)
 
-    returns = df["close"].pct_change().dropna()
-    momentum = returns.mean()
-    volatility = returns.std()
+    async def download(symbol):
+        async with semaphore:
+            started = time.perf_counter()
+            df = await fetch_historical_data(
+                symbol, interval, lookback, columns=["open_time", "close", "close_time"]
+            )
+            df = _closed_candles(df)
+            open_times = df["open_time"].to_numpy().view(np.int64)
+            return (df["close"].to_numpy(), open_times), time.perf_counter() - started
 
-    metrics = {
-        "dca": max(momentum, 0.0) + 1e-9,
-        "grid": volatility + 1e-9,
-        "scalping": volatility / 2 + 1e-9,
-        "trend": abs(momentum) + 1e-9,
-        "sentiment": 1e-9,
-    }
+    loop = asyncio.get_running_loop()
+    results = {}
 
-    total = sum(metrics.values())
-    weights = {k: v / total for k, v in metrics.items()}
+    async def train(pool, symbol):
+        try:
+            (closes, open_times), download_seconds = await download(symbol)
+        except Exception as e:
+            logger.error("Failed to download %s history: %s", symbol, e)
+        else:
+            ew_alphas = (ew_alpha,) if ew_alpha else ()
+            try:
+                metrics, compute_seconds = await loop.run_in_executor(
+                    pool, _timed_metrics_from_closes, closes, open_times, ew_alphas
+                )
+            except Exception as e:
+                logger.error("Failed to calculate %s weights: %s", symbol, e)
+            else:
+                results[symbol] = {
+                    "weights": metrics.weights(ew_alpha),
+                    "metrics": metrics,
+                    "download_seconds": download_seconds,
+                    "compute_seconds": compute_seconds,
+                }
+        if progress is not None:
+            await progress(symbol, results.get(symbol))
 
-    logger.info("Recommended weights calculated: %s", weights)
+    # Forking a process that runs an event loop and threads is unsafe.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+        # each symbol is computed as soon as its own download is done
+        await asyncio.gather(*(train(pool, s) for s in symbols))
+    # keep the caller's symbol order
+    results = {s: results[s] for s in symbols if s in results}
+    logger.info("Trained weights for %d/%d symbols", len(results), len(symbols))
+    return results
 
-    if bot and chat_id:
-        await bot.send_message(chat_id=chat_id, text="Training complete.")
 
-    return weights
+async def update_online_metrics(
+    symbol: str,
+    metrics: OnlineWeightMetrics,
+    interval: str = AsyncClient.KLINE_INTERVAL_1HOUR,
+) -> int:
+    """Feed candles closed since ``metrics`` was last updated into it.
+
+    Only the new candles are read (from the kline cache, which fetches the
+    missing tail), so the cost does not grow with the history length.
+    Returns the number of candles added.
+    """
+    if metrics.last_open_time is None:
+        raise ValueError(f"{symbol} metrics have not been seeded")
+    df = await fetch_historical_data(
+        symbol,
+        interval,
+        metrics.last_open_time + 1,
+        columns=["open_time", "close", "close_time"],
+    )
+    df = _closed_candles(df)
+    added = metrics.update_many(
+        df["close"].tolist(), df["open_time"].to_numpy().view(np.int64).tolist()
+    )
+    logger.debug("Added %d %s candles to online metrics", added, symbol)
+    return added
@@ -1,16 +1,214 @@
 import asyncio
+import json
+import math
+import os
+import re
+import time
+import zlib
+
+import numpy as np
+from binance.helpers import date_to_milliseconds, interval_to_milliseconds
+
+import kline_cache
+from sim_exchange import SimExchange
+from trade_store import TradeStore
+
+# Candles per block of a synthetic price path.
+KLINE_BLOCK = 1024
+# Open time (2024-01-01, a Monday, UTC) at which synthetic paths start from
+# the symbol's base price; candle open times are aligned to it.
+KLINE_ANCHOR_MS = 1_704_067_200_000
+_YEAR_MS = 365 * 24 * 60 * 60 * 1000
+_LOOKBACK_RE = re.compile(r"^\s*(\d+)\s+(second|minute|hour|day|week)s?\s+ago", re.I)
+_UNIT_MS = {"second": 1000, "minute": 60_000, "hour": 3_600_000, "day": 86_400_000}
+_UNIT_MS["week"] = 7 * _UNIT_MS["day"]
+
+
+def lookback_to_milliseconds(value, now_ms: int) -> int:
+    """Convert ``"N hours ago UTC"``, a date string or a timestamp to ms."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _LOOKBACK_RE.match(str(value))
+    if match:
+        return now_ms - int(match.group(1)) * _UNIT_MS[match.group(2).lower()]
+    return date_to_milliseconds(value)
+
+
+class SyntheticKlines:
+    """Seeded geometric Brownian motion candles.
+
+    Each (symbol, interval) has its own path, split into blocks of
+    ``KLINE_BLOCK`` candles. Prices at block boundaries follow a random walk
+    from ``KLINE_ANCHOR_MS`` and the candles of a block follow a Brownian
+    bridge between them, each block drawing from its own seeded stream. Any
+    window is therefore generated without the candles before it, and the same
+    seed gives the same candles however the requests are split.
+    """
+
+    def __init__(self, seed: int = 0, drift: float = 0.0, volatility: float = 0.5):
+        self.seed = seed
+        # annualized drift and volatility of the log price
+        self.drift = drift
+        self.volatility = volatility
+
+    def _boundaries(self, key, first_block, last_block, mean, scale) -> np.ndarray:
+        """Log-price offsets at the starts of blocks ``first_block..last_block``."""
+        forward = np.zeros(max(last_block, 0) + 1)
+        if last_block > 0:
+            steps = np.random.default_rng([self.seed, key, 0]).standard_normal(last_block)
+            forward[1:] = np.cumsum(mean + scale * steps)
+        backward = np.zeros(max(-first_block, 0) + 1)
+        if first_block < 0:
+            steps = np.random.default_rng([self.seed, key, 1]).standard_normal(-first_block)
+            backward[1:] = np.cumsum(-mean - scale * steps)
+        blocks = np.arange(first_block, last_block + 1)
+        return np.where(
+            blocks >= 0,
+            forward[np.clip(blocks, 0, None)],
+            backward[np.clip(-blocks, 0, None)],
+        )
+
+    def generate(self, symbol, interval, base_price, first_open, count) -> dict:
+        """Return ``count`` candles from ``first_open`` as typed arrays.
+
+        The arrays are keyed like ``kline_cache.COLUMNS``; ``first_open`` is
+        rounded down to a candle open time.
+        """
+        step = interval_to_milliseconds(interval)
+        if not step:
+            raise ValueError(f"Unsupported interval {interval}")
+        key = zlib.crc32(f"{symbol}:{interval}".encode())
+        years = step / _YEAR_MS
+        vol = self.volatility * math.sqrt(years)
+        drift = (self.drift - self.volatility**2 / 2) * years
+        first = (int(first_open) - KLINE_ANCHOR_MS) // step
+        first_block = first // KLINE_BLOCK
+        last_block = (first + max(count, 1) - 1) // KLINE_BLOCK
+        bounds = self._boundaries(
+            key,
+            first_block,
+            last_block + 1,
+            drift * KLINE_BLOCK,
+            vol * math.sqrt(KLINE_BLOCK),
+        )
+        blocks = last_block - first_block + 1
+        shocks = np.empty((blocks, KLINE_BLOCK))
+        extra = np.empty((blocks, 3, KLINE_BLOCK))
+        for i in range(blocks):
+            # 2**40 keeps the entropy of blocks before the anchor non-negative
+            rng = np.random.default_rng([self.seed, key, 2, first_block + i + 2**40])
+            shocks[i] = rng.standard_normal(KLINE_BLOCK)
+            extra[i] = rng.standard_normal((3, KLINE_BLOCK))
+        walk = np.zeros((blocks, KLINE_BLOCK + 1))
+        np.cumsum(drift + vol * shocks, axis=1, out=walk[:, 1:])
+        # bend each block's walk so it ends on the next boundary
+        frac = np.arange(KLINE_BLOCK + 1) / KLINE_BLOCK
+        gap = (bounds[1:] - bounds[:-1]) - walk[:, -1]
+        walk += bounds[:-1, None] + gap[:, None] * frac
+        start = first - first_block * KLINE_BLOCK
+        stop = start + count
+        log_open = walk[:, :-1].reshape(-1)[start:stop]
+        log_close = walk[:, 1:].reshape(-1)[start:stop]
+        extra = extra.transpose(1, 0, 2).reshape(3, -1)[:, start:stop]
+        open_ = base_price * np.exp(log_open)
+        close = base_price * np.exp(log_close)
+        high = np.maximum(open_, close) * np.exp(0.5 * vol * np.abs(extra[0]))
+        low = np.minimum(open_, close) * np.exp(-0.5 * vol * np.abs(extra[1]))
+        volume = np.exp(1.5 + 0.5 * extra[2])
+        open_time = KLINE_ANCHOR_MS + (first + np.arange(count, dtype=np.int64)) * step
+        return {
+            "open_time": open_time,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+            "close_time": open_time + (step - 1),
+            "quote_asset_volume": volume * (open_ + high + low + close) / 4,
+            "number_of_trades": (volume * 20).astype(np.int64) + 1,
+            "taker_buy_base": volume / 2,
+            "taker_buy_quote": volume * (open_ + high + low + close) / 8,
+        }
+
+
+def kline_rows(arrays: dict) -> list:
+    """Format kline arrays as REST rows, with prices as strings."""
+    columns = []
+    for name in kline_cache.COLUMNS:
+        values = arrays[name]
+        if values.dtype.kind == "f":
+            columns.append([f"{v:.8f}" for v in values.tolist()])
+        else:
+            columns.append(values.tolist())
+    columns.append(["0"] * len(arrays["open_time"]))
+    return list(map(list, zip(*columns)))
+
+
+class _DummyUserSocket:
+    """Stand-in for ``BinanceSocketManager.user_socket()`` on a ``DummyClient``."""
+
+    def __init__(self, client):
+        self._client = client
+        self._queue = asyncio.Queue()
+
+    async def __aenter__(self):
+        self._client._user_queues.append(self._queue)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._client._user_queues.remove(self._queue)
+        return False
+
+    async def recv(self):
+        return await self._queue.get()
+
 
 class DummyClient:
     """Simple simulated Binance client for offline testing."""
 
-    def __init__(self, start_balance=1000.0, fee_rate=0.001):
+    def __init__(
+        self,
+        start_balance=1000.0,
+        fee_rate=0.001,
+        latency=0.0,
+        seed=None,
+        exchange=None,
+        maker_fee_rate=None,
+        order_latency=0.0,
+    ):
         # balances stored as {asset: {'free': float, 'locked': float}}
         self.balances = {"USDT": {"free": float(start_balance), "locked": 0.0}}
-        # trade history list
-        self.trades = []
-        # static prices for a couple of symbols
-        self.prices = {"BTCUSDT": 30000.0, "ETHUSDT": 2000.0}
+        # fills per symbol, for ``get_my_trades``
+        self.trade_store = TradeStore()
+        # matching engine; clients sharing one trade with each other
+        self.exchange = exchange or SimExchange(
+            {"BTCUSDT": 30000.0, "ETHUSDT": 2000.0}
+        )
+        # last traded prices, moved by fills and ``set_price``
+        self.prices = self.exchange.prices
+        # taker and maker fees as a fraction of the traded value
         self.fee_rate = fee_rate
+        self.maker_fee_rate = fee_rate if maker_fee_rate is None else maker_fee_rate
+        # artificial delay in seconds applied to market data requests
+        self.latency = latency
+        # artificial delay in seconds applied to order placement and cancels
+        self.order_latency = order_latency
+        # resting limit orders by orderId, in the REST ``/openOrders`` format
+        self.open_orders = {}
+        # every order placed, by clientOrderId, for ``get_order``
+        self.orders = {}
+        # orderId -> (engine order, REST order)
+        self._by_id = {}
+        # queues of the open user data sockets
+        self._user_queues = []
+        # reproducible candles for the kline endpoints
+        if seed is None:
+            seed = int(os.getenv("DUMMY_SEED", "0"))
+        self.synthetic = SyntheticKlines(seed)
+        self._kline_bases = {}
+
+    async def ping(self):
+        return {}
 
     async def get_account(self):
         return {
@@ -20,92 +218,344 @@ class DummyClient:
             ]
         }
 
-    async def get_my_trades(self, symbol):
-        return [t for t in self.trades if t["symbol"] == symbol]
+    async def get_my_trades(
+        self,
+        symbol,
+        fromId=None,
+        startTime=None,
+        endTime=None,
+        orderId=None,
+        limit=500,
+        arrays=False,
+    ):
+        """Return fills like ``/myTrades``; with ``arrays`` as a structured array."""
+        rows = self.trade_store.query(
+            symbol,
+            fromId=fromId,
+            startTime=startTime,
+            endTime=endTime,
+            orderId=orderId,
+            limit=limit,
+        )
+        return rows if arrays else TradeStore.to_dicts(symbol, rows)
 
     async def get_avg_price(self, symbol):
         price = self.prices.get(symbol, 0.0)
         return {"price": str(price)}
 
-    async def get_historical_klines(self, symbol, interval, lookback):
-        """Return synthetic kline data for the requested period."""
-        from datetime import datetime, timedelta
-        import random
-
-        # very rough parsing of lookback like "365 days ago UTC"
-        try:
-            days = int(str(lookback).split()[0])
-        except Exception:
-            days = 365
-
-        # assume hourly interval regardless of the value passed
-        points = days * 24
-        now = datetime.utcnow() - timedelta(hours=points)
-
-        klines = []
-        base_price = self.prices.get(symbol, 100.0)
-        for i in range(points):
-            open_time = int((now + timedelta(hours=i)).timestamp() * 1000)
-            close_time = int((now + timedelta(hours=i + 1)).timestamp() * 1000)
-            open_p = base_price * (1 + random.uniform(-0.01, 0.01))
-            close_p = base_price * (1 + random.uniform(-0.01, 0.01))
-            high_p = max(open_p, close_p) * (1 + random.uniform(0, 0.01))
-            low_p = min(open_p, close_p) * (1 - random.uniform(0, 0.01))
-            volume = random.uniform(1, 10)
-            klines.append(
-                [
-                    open_time,
-                    str(open_p),
-                    str(high_p),
-                    str(low_p),
-                    str(close_p),
-                    str(volume),
-                    close_time,
-                    "0",
-                    0,
-                    "0",
-                    "0",
-                    "0",
-                ]
-            )
-        return klines
+    async def get_symbol_ticker(self, symbol=None):
+        if symbol is None:
+            return [{"symbol": s, "price": str(p)} for s, p in self.prices.items()]
+        if symbol not in self.prices:
+            raise RuntimeError(f"Invalid symbol {symbol}")
+        return {"symbol": symbol, "price": str(self.prices[symbol])}
+
+    def _kline_base(self, symbol):
+        # the path starts from the symbol's price when it was first requested
+        return self._kline_bases.setdefault(symbol, self.prices.get(symbol, 100.0))
+
+    def klines(self, symbol, interval, first_open, count, arrays=False):
+        """Return ``count`` synthetic candles opening at or after ``first_open``."""
+        data = self.synthetic.generate(
+            symbol, interval, self._kline_base(symbol), first_open, max(int(count), 0)
+        )
+        return data if arrays else kline_rows(data)
+
+    def _open_times(self, interval, start_ms, end_ms):
+        """First and last candle open time within ``[start_ms, end_ms]``."""
+        step = interval_to_milliseconds(interval)
+        first = start_ms + (KLINE_ANCHOR_MS - start_ms) % step
+        last = end_ms - (end_ms - KLINE_ANCHOR_MS) % step
+        return first, last, step
+
+    async def get_historical_klines(
+        self, symbol, interval, lookback, end_str=None, limit=None, arrays=False
+    ):
+        """Return synthetic candles from ``lookback`` until ``end_str`` or now.
+
+        ``lookback`` and ``end_str`` accept what ``AsyncClient`` does, e.g.
+        ``"24 hours ago UTC"`` or a millisecond timestamp. With ``arrays``
+        the candles are returned as typed NumPy arrays instead of REST rows.
+        """
+        now = int(time.time() * 1000)
+        end = now if end_str is None else lookback_to_milliseconds(end_str, now)
+        first, last, step = self._open_times(
+            interval, lookback_to_milliseconds(lookback, now), min(end, now)
+        )
+        count = (last - first) // step + 1
+        if limit is not None:
+            count = min(count, limit)
+        return self.klines(symbol, interval, first, count, arrays=arrays)
+
+    async def get_klines(
+        self, symbol, interval, startTime=None, endTime=None, limit=500, arrays=False
+    ):
+        """Return up to ``limit`` synthetic candles like the ``/klines`` endpoint."""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        now = int(time.time() * 1000)
+        end = now if endTime is None else min(endTime, now)
+        first, last, step = self._open_times(interval, startTime or 0, end)
+        if startTime is None:
+            first = last - (limit - 1) * step
+        count = min((last - first) // step + 1, limit)
+        return self.klines(symbol, interval, first, count, arrays=arrays)
 
-    async def order_market_buy(self, symbol, quantity):
+    async def order_market_buy(self, symbol, quantity, newClientOrderId=None):
         price = self.prices.get(symbol, 0.0)
-        cost = price * quantity
-        fee = cost * self.fee_rate
-        if self.balances["USDT"]["free"] < cost + fee:
+        cost = price * float(quantity)
+        if self.balances["USDT"]["free"] < cost * (1 + self.fee_rate):
             raise RuntimeError("Insufficient USDT balance")
-        self.balances["USDT"]["free"] -= cost + fee
-        base = symbol.replace("USDT", "")
-        self.balances.setdefault(base, {"free": 0.0, "locked": 0.0})
-        self.balances[base]["free"] += quantity
-        self.trades.append({
-            "symbol": symbol,
-            "qty": str(quantity),
-            "price": str(price),
-            "isBuyer": True,
-        })
-        return {"status": "FILLED"}
+        return await self._submit(symbol, "BUY", "MARKET", quantity, None, newClientOrderId)
 
-    async def order_market_sell(self, symbol, quantity):
-        price = self.prices.get(symbol, 0.0)
-        base = symbol.replace("USDT", "")
+    async def order_market_sell(self, symbol, quantity, newClientOrderId=None):
         # In dummy mode allow selling even if balance is insufficient by
         # permitting negative positions. This avoids errors when a strategy
         # attempts to close a nonexistent holding.
-        self.balances.setdefault(base, {"free": 0.0, "locked": 0.0})
-        self.balances[base]["free"] -= quantity
-        proceeds = price * quantity
-        fee = proceeds * self.fee_rate
-        self.balances["USDT"]["free"] += proceeds - fee
-        self.trades.append({
+        return await self._submit(symbol, "SELL", "MARKET", quantity, None, newClientOrderId)
+
+    async def order_limit_buy(self, symbol, quantity, price, **params):
+        cost = float(price) * float(quantity)
+        if self.balances["USDT"]["free"] < cost:
+            raise RuntimeError("Insufficient USDT balance")
+        return await self._submit(symbol, "BUY", "LIMIT", quantity, price, **params)
+
+    async def order_limit_sell(self, symbol, quantity, price, **params):
+        return await self._submit(symbol, "SELL", "LIMIT", quantity, price, **params)
+
+    async def _submit(
+        self, symbol, side, type_, quantity, price, newClientOrderId=None, timeInForce="GTC"
+    ):
+        if self.order_latency:
+            await asyncio.sleep(self.order_latency)
+        order = self.exchange.new_order(symbol, side, type_, quantity, price, owner=self)
+        rest = {
             "symbol": symbol,
-            "qty": str(quantity),
-            "price": str(price),
-            "isBuyer": False,
-        })
-        return {"status": "FILLED"}
+            "orderId": order.order_id,
+            "clientOrderId": newClientOrderId or f"dummy{order.order_id}",
+            "price": "0" if price is None else str(order.price),
+            "origQty": str(order.quantity),
+            "executedQty": "0",
+            "cummulativeQuoteQty": "0",
+            "status": "NEW",
+            "timeInForce": timeInForce,
+            "type": type_,
+            "side": side,
+            "time": int(time.time() * 1000),
+        }
+        if type_ == "MARKET":
+            rest["fills"] = []
+        elif side == "BUY":
+            # lock the quote asset until the order fills or is cancelled
+            cost = order.price * order.quantity
+            self.balances["USDT"]["free"] -= cost
+            self.balances["USDT"]["locked"] += cost
+        self.orders[rest["clientOrderId"]] = rest
+        self._by_id[order.order_id] = (order, rest)
+        if type_ == "LIMIT":
+            self.open_orders[order.order_id] = rest
+            self._emit_execution(rest, "NEW")
+        self.exchange.submit(order)
+        if order.status == "EXPIRED":
+            rest["status"] = "EXPIRED"
+            self._emit_execution(rest, "EXPIRED")
+        return dict(rest)
+
+    def on_fill(self, order, quantity, price, maker):
+        """Book a fill reported by the matching engine."""
+        _, rest = self._by_id[order.order_id]
+        base = order.symbol.replace("USDT", "")
+        self.balances.setdefault(base, {"free": 0.0, "locked": 0.0})
+        value = price * quantity
+        fee = value * (self.maker_fee_rate if maker else self.fee_rate)
+        if order.side == "BUY":
+            if order.type == "LIMIT":
+                locked = order.price * quantity
+                self.balances["USDT"]["locked"] -= locked
+                self.balances["USDT"]["free"] += locked
+            self.balances["USDT"]["free"] -= value + fee
+            self.balances[base]["free"] += quantity
+        else:
+            # like market sells, dummy limit sells may go short
+            self.balances[base]["free"] -= quantity
+            self.balances["USDT"]["free"] += value - fee
+        rest["executedQty"] = str(order.filled)
+        rest["cummulativeQuoteQty"] = str(float(rest["cummulativeQuoteQty"]) + value)
+        rest["status"] = "FILLED" if not order.active else "PARTIALLY_FILLED"
+        if "fills" in rest:
+            rest["fills"].append(
+                {
+                    "price": str(price),
+                    "qty": str(quantity),
+                    "commission": str(fee),
+                    "commissionAsset": "USDT",
+                }
+            )
+        if not order.active:
+            self.open_orders.pop(order.order_id, None)
+        self._record_trade(rest, quantity, price, fee, maker)
+        self._emit_execution(rest, "TRADE", quantity, price, fee)
+
+    def _record_trade(self, order, quantity, price, fee, maker):
+        trade_id = self.exchange.next_trade_id()
+        self.trade_store.append(
+            order["symbol"],
+            trade_id,
+            order["orderId"],
+            int(time.time() * 1000),
+            price,
+            quantity,
+            fee,
+            order["side"] == "BUY",
+            maker,
+        )
+        order["lastTradeId"] = trade_id
+
+    async def get_order(self, symbol, orderId=None, origClientOrderId=None):
+        rest = self.orders.get(origClientOrderId)
+        if rest is None and orderId in self._by_id:
+            rest = self._by_id[orderId][1]
+        if rest is None or rest["symbol"] != symbol:
+            raise RuntimeError("Order does not exist.")
+        return dict(rest)
+
+    async def cancel_order(self, symbol, orderId=None, origClientOrderId=None):
+        if self.order_latency:
+            await asyncio.sleep(self.order_latency)
+        rest = self.open_orders.get(orderId)
+        if rest is None and origClientOrderId is not None:
+            rest = self.orders.get(origClientOrderId)
+        if rest is None or rest["symbol"] != symbol:
+            raise RuntimeError("Unknown order sent.")
+        # orders restored from a snapshot have no engine order once closed
+        order = self._by_id[rest["orderId"]][0]
+        if order is None or not self.exchange.cancel(order):
+            raise RuntimeError("Unknown order sent.")
+        del self.open_orders[order.order_id]
+        if order.side == "BUY":
+            cost = order.price * order.remaining
+            self.balances["USDT"]["locked"] -= cost
+            self.balances["USDT"]["free"] += cost
+        rest["status"] = "CANCELED"
+        self._emit_execution(rest, "CANCELED")
+        return dict(rest)
+
+    async def get_open_orders(self, symbol=None):
+        return [
+            dict(o)
+            for o in self.open_orders.values()
+            if symbol is None or o["symbol"] == symbol
+        ]
+
+    async def get_order_book(self, symbol, limit=100):
+        book = self.exchange.book(symbol)
+        return {
+            "lastUpdateId": self.exchange.stats["orders"] + self.exchange.stats["fills"],
+            "bids": [[str(p), str(q)] for p, q in book.bids.depth(limit)],
+            "asks": [[str(p), str(q)] for p, q in book.asks.depth(limit)],
+        }
+
+    def set_price(self, symbol, price, quantity=None):
+        """Trade ``symbol`` at ``price`` outside the book, filling crossed orders.
+
+        ``quantity`` caps how much resting volume the trade fills.
+        """
+        self.exchange.tick(symbol, price, quantity)
+
+    def replay_kline(self, symbol, kline):
+        """Drive ``symbol``'s price through a kline row (see ``SimExchange``)."""
+        self.exchange.replay_kline(symbol, kline)
+
+    def _emit_execution(self, order, execution_type, last_qty=0.0, last_price=0.0, fee=0.0):
+        """Publish an ``executionReport`` to every open user data socket."""
+        event = {
+            "e": "executionReport",
+            "E": int(time.time() * 1000),
+            "s": order["symbol"],
+            "c": order["clientOrderId"],
+            "S": order["side"],
+            "o": order["type"],
+            "f": order["timeInForce"],
+            "q": order["origQty"],
+            "p": order["price"],
+            "x": execution_type,
+            "X": order["status"],
+            "i": order["orderId"],
+            "l": str(last_qty),
+            "z": order["executedQty"],
+            "L": str(last_price),
+            "n": str(fee),
+            "N": "USDT",
+            "T": int(time.time() * 1000),
+            "t": order.get("lastTradeId", -1) if execution_type == "TRADE" else -1,
+        }
+        for queue in self._user_queues:
+            queue.put_nowait(event)
+
+    def snapshot(self, path):
+        """Save the account (balances, orders, trades, prices) to ``path``.
+
+        Trades are stored as NumPy arrays and the rest as JSON in one
+        uncompressed ``.npz`` file, so ``restore`` loads large fixtures fast.
+        """
+        state = {
+            "balances": self.balances,
+            "prices": self.prices,
+            "orders": list(self.orders.values()),
+            "open_orders": list(self.open_orders),
+            "kline_bases": self._kline_bases,
+            "seed": self.synthetic.seed,
+        }
+        arrays = {f"trades_{s}": a for s, a in self.trade_store.arrays().items()}
+        account = np.frombuffer(json.dumps(state).encode(), dtype=np.uint8)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, account=account, **arrays)
+        os.replace(tmp, path)
+
+    def restore(self, path):
+        """Replace the account with a ``snapshot``; open orders rest on the book again.
+
+        The account's current orders are taken off the matching engine first,
+        so only the snapshot's open orders rest there afterwards.
+        """
+        with np.load(path) as data:
+            state = json.loads(data["account"].tobytes())
+            arrays = {
+                name[len("trades_"):]: data[name]
+                for name in data.files
+                if name.startswith("trades_")
+            }
+        self.balances = state["balances"]
+        self.prices.update(state["prices"])
+        self._kline_bases = state["kline_bases"]
+        self.synthetic = SyntheticKlines(state["seed"])
+        self.trade_store.load(arrays)
+        self.exchange.withdraw(self)
+        self.orders = {rest["clientOrderId"]: rest for rest in state["orders"]}
+        self._by_id = {rest["orderId"]: (None, rest) for rest in state["orders"]}
+        self.open_orders = {}
+        for order_id in state["open_orders"]:
+            rest = self._by_id[order_id][1]
+            order = self.exchange.restore_order(
+                order_id,
+                rest["symbol"],
+                rest["side"],
+                rest["type"],
+                float(rest["origQty"]),
+                float(rest["price"]),
+                float(rest["executedQty"]),
+                owner=self,
+            )
+            self._by_id[order_id] = (order, rest)
+            self.open_orders[order_id] = rest
+        self.exchange.reserve_ids(
+            max(self._by_id, default=0), self.trade_store.last_id()
+        )
+
+    def user_socket(self):
+        """Return a user data socket receiving this account's order events."""
+        return _DummyUserSocket(self)
 
     async def close_connection(self):
         # Nothing to close in the dummy client
@@ -0,0 +1,278 @@
+"""Rate-limited order execution between the strategies and the exchange.
+
+``ExecutionQueue`` wraps a client and sends every order through token
+buckets for Binance's limit classes (order count per 10 seconds and per day,
+request weight per minute). The buckets are corrected from the
+``x-mbx-used-weight-1m`` / ``x-mbx-order-count-*`` response headers, and a
+429 or 418 response pauses all sending for the ``Retry-After`` period.
+
+Market orders for the same symbol that arrive within ``net_window`` seconds
+are netted into one order. Each order carries a deterministic
+``newClientOrderId``; when a request fails without a definite answer
+(timeout, connection error, 5xx) the order is looked up by that ID before
+it is sent again, so retries never place it twice.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import logging
+import os
+import time
+
+import aiohttp
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+
+from rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Request weight of the order endpoints used here.
+ORDER_WEIGHT = 1
+GET_ORDER_WEIGHT = 4
+
+# Response header reporting the usage of each limit class.
+USAGE_HEADERS = {
+    "orders_10s": "x-mbx-order-count-10s",
+    "orders_1d": "x-mbx-order-count-1d",
+    "weight": "x-mbx-used-weight-1m",
+}
+
+
+def default_buckets() -> dict:
+    """Token buckets sized from the ``ORDER_LIMIT_*`` environment variables."""
+    return {
+        "orders_10s": TokenBucket(int(os.getenv("ORDER_LIMIT_PER_10S", "100")), 10),
+        "orders_1d": TokenBucket(int(os.getenv("ORDER_LIMIT_PER_DAY", "200000")), 86400),
+        "weight": TokenBucket(int(os.getenv("REQUEST_WEIGHT_PER_MINUTE", "6000")), 60),
+    }
+
+
+def client_order_id(symbol: str, side: str, quantity: float, key) -> str:
+    """Deterministic ``newClientOrderId`` for one order intent."""
+    digest = hashlib.sha1(f"{symbol}|{side}|{quantity:.8f}|{key}".encode()).hexdigest()
+    return f"x{digest[:31]}"
+
+
+def _uncertain(error) -> bool:
+    """Whether the order behind a failed request may still have been placed."""
+    if isinstance(error, (asyncio.TimeoutError, aiohttp.ClientError, BinanceRequestException)):
+        return True
+    return isinstance(error, BinanceAPIException) and error.status_code >= 500
+
+
+def _not_found(error) -> bool:
+    if isinstance(error, BinanceAPIException):
+        return error.code == -2013
+    return "does not exist" in str(error)
+
+
+class ExecutionQueue:
+    """Client wrapper that rate-limits, nets and retries orders."""
+
+    def __init__(self, client, net_window: float = None, max_retries: int = 3, buckets=None):
+        self.__wrapped__ = client
+        if net_window is None:
+            net_window = float(os.getenv("ORDER_NET_WINDOW_MS", "250")) / 1000
+        self.net_window = net_window
+        self.max_retries = max_retries
+        self.retry_delay = 0.5
+        self.buckets = buckets or default_buckets()
+        self._resume_at = 0.0
+        self._pending = {}
+        self._flushes = {}
+        self._sequence = itertools.count()
+        self.stats = {"submitted": 0, "sent": 0, "netted": 0, "retried": 0, "throttled": 0}
+
+    def __getattr__(self, name):
+        return getattr(self.__wrapped__, name)
+
+    async def order_market_buy(self, symbol, quantity, **params):
+        return await self.submit(symbol, "BUY", quantity, **params)
+
+    async def order_market_sell(self, symbol, quantity, **params):
+        return await self.submit(symbol, "SELL", quantity, **params)
+
+    async def order_limit_buy(self, symbol, quantity, price, **params):
+        return await self._send_order(
+            self.__wrapped__.order_limit_buy, symbol, "BUY", quantity, price=price, **params
+        )
+
+    async def order_limit_sell(self, symbol, quantity, price, **params):
+        return await self._send_order(
+            self.__wrapped__.order_limit_sell, symbol, "SELL", quantity, price=price, **params
+        )
+
+    async def cancel_order(self, symbol, **params):
+        return await self._call(self.__wrapped__.cancel_order, symbol=symbol, **params)
+
+    async def submit(self, symbol: str, side: str, quantity: float, **params):
+        """Queue a market order; opposite orders within the window are netted.
+
+        Orders with extra parameters (e.g. ``quoteOrderQty``) are sent on
+        their own. Every order of a netted batch resolves to the same
+        exchange response, or to a ``NETTED`` status when the batch cancels
+        out.
+        """
+        self.stats["submitted"] += 1
+        if params or self.net_window <= 0:
+            send = (
+                self.__wrapped__.order_market_buy
+                if side == "BUY"
+                else self.__wrapped__.order_market_sell
+            )
+            return await self._send_order(send, symbol, side, quantity, **params)
+        future = asyncio.get_running_loop().create_future()
+        signed = quantity if side == "BUY" else -quantity
+        self._pending.setdefault(symbol, []).append((signed, future))
+        if symbol not in self._flushes:
+            self._flushes[symbol] = asyncio.create_task(self._flush_later(symbol))
+        return await future
+
+    async def flush(self) -> None:
+        """Send every queued market order now."""
+        for task in list(self._flushes.values()):
+            task.cancel()
+        self._flushes.clear()
+        await asyncio.gather(*(self._flush(symbol) for symbol in list(self._pending)))
+
+    def discard_pending(self) -> None:
+        """Drop queued market orders without sending them (on shutdown)."""
+        for task in self._flushes.values():
+            task.cancel()
+        self._flushes.clear()
+        for batch in self._pending.values():
+            for _, future in batch:
+                future.cancel()
+        self._pending.clear()
+
+    async def _flush_later(self, symbol: str) -> None:
+        await asyncio.sleep(self.net_window)
+        self._flushes.pop(symbol, None)
+        await self._flush(symbol)
+
+    async def _flush(self, symbol: str) -> None:
+        batch = self._pending.pop(symbol, [])
+        if not batch:
+            return
+        net = round(sum(signed for signed, _ in batch), 8)
+        self.stats["netted"] += len(batch) - (1 if net else 0)
+        try:
+            if net == 0:
+                result = {"symbol": symbol, "status": "NETTED", "executedQty": "0"}
+            else:
+                side = "BUY" if net > 0 else "SELL"
+                send = (
+                    self.__wrapped__.order_market_buy
+                    if side == "BUY"
+                    else self.__wrapped__.order_market_sell
+                )
+                result = await self._send_order(send, symbol, side, abs(net))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for _, future in batch:
+            if not future.done():
+                future.set_result(result)
+
+    async def _send_order(self, send, symbol, side, quantity, **params):
+        """Place an order, retrying uncertain failures without duplicating it."""
+        cid = params.pop("newClientOrderId", None) or client_order_id(
+            symbol, side, quantity, f"{int(time.time() * 1000)}-{next(self._sequence)}"
+        )
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats["retried"] += 1
+                await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+                try:
+                    existing = await self._lookup(symbol, cid)
+                except Exception as e:
+                    logger.warning("Could not look up order %s: %s", cid, e)
+                    error = e
+                    continue
+                if existing is not None:
+                    logger.info("Order %s was placed before the failure", cid)
+                    return existing
+            try:
+                order = await self._call(
+                    send,
+                    orders=True,
+                    symbol=symbol,
+                    quantity=quantity,
+                    newClientOrderId=cid,
+                    **params,
+                )
+                self.stats["sent"] += 1
+                return order
+            except Exception as e:
+                if not _uncertain(e):
+                    raise
+                logger.warning(
+                    "Order %s %s %s failed (%r), checking before retrying",
+                    side,
+                    quantity,
+                    symbol,
+                    e,
+                )
+                error = e
+        raise error
+
+    async def _lookup(self, symbol, cid):
+        try:
+            return await self._call(
+                self.__wrapped__.get_order,
+                weight=GET_ORDER_WEIGHT,
+                symbol=symbol,
+                origClientOrderId=cid,
+            )
+        except Exception as e:
+            if _not_found(e):
+                return None
+            raise
+
+    async def _call(self, method, weight: int = ORDER_WEIGHT, orders: bool = False, **params):
+        """Call ``method`` within the rate limits, waiting out 429/418 responses."""
+        while True:
+            delay = self._resume_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if orders:
+                await self.buckets["orders_10s"].acquire()
+                await self.buckets["orders_1d"].acquire()
+            await self.buckets["weight"].acquire(weight)
+            try:
+                result = await method(**params)
+            except BinanceAPIException as e:
+                if e.status_code not in (418, 429):
+                    raise
+                self.stats["throttled"] += 1
+                retry_after = _retry_after(e)
+                self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+                logger.warning("Rate limited (%s), pausing for %.1fs", e.status_code, retry_after)
+                continue
+            self._update_usage()
+            return result
+
+    def _update_usage(self) -> None:
+        client = self.__wrapped__
+        while hasattr(client, "__wrapped__"):
+            client = client.__wrapped__
+        response = getattr(client, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            return
+        for name, header in USAGE_HEADERS.items():
+            used = headers.get(header)
+            if used is not None:
+                self.buckets[name].sync(float(used))
+
+
+def _retry_after(error) -> float:
+    headers = getattr(error.response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After", 1))
+    except (TypeError, ValueError):
+        return 1.0
@@ -0,0 +1,401 @@
+"""Technical indicators in streaming and batch form.
+
+The streaming classes (``SMA``, ``EMA``, ``RSI``, ``MACD``, ``ATR`` and
+``ADX``) update in constant time per closed candle and expose the latest
+result as ``value`` (``None`` until enough candles have been seen). The
+batch functions of the same names compute the full series over NumPy
+arrays, with NaN where the indicator is not defined yet, and produce the
+same numbers as feeding the candles one by one.
+
+Moving averages of gains, losses, true range and directional movement use
+Wilder's smoothing seeded with a simple average, and EMAs are seeded with
+the SMA of their first ``period`` values.
+"""
+
+import math
+
+import numpy as np
+
+
+class SMA:
+    """Simple moving average over a fixed window."""
+
+    def __init__(self, period: int):
+        self.period = int(period)
+        self._window = np.zeros(self.period, dtype=np.float64)
+        self._count = 0
+        self._sum = 0.0
+        self.value = None
+
+    def update(self, close: float, high: float = None, low: float = None):
+        slot = self._count % self.period
+        self._sum += close - self._window[slot]
+        self._window[slot] = close
+        self._count += 1
+        if slot == self.period - 1:
+            # Re-sum once per window so rounding errors cannot accumulate.
+            self._sum = float(self._window.sum())
+        if self._count >= self.period:
+            self.value = self._sum / self.period
+        return self.value
+
+
+class EMA:
+    """Exponential moving average with ``alpha = 2 / (period + 1)``."""
+
+    def __init__(self, period: int):
+        self.period = int(period)
+        self.alpha = 2.0 / (self.period + 1)
+        self._seed = SMA(self.period)
+        self.value = None
+
+    def update(self, close: float, high: float = None, low: float = None):
+        if self.value is None:
+            self.value = self._seed.update(close)
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * close
+        return self.value
+
+
+class RSI:
+    """Wilder's relative strength index."""
+
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+        self._prev = None
+        self._count = 0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+        self.value = None
+
+    def update(self, close: float, high: float = None, low: float = None):
+        if self._prev is None:
+            self._prev = close
+            return None
+        change = close - self._prev
+        self._prev = close
+        gain = max(change, 0.0)
+        loss = max(-change, 0.0)
+        self._count += 1
+        if self._count <= self.period:
+            self._avg_gain += gain / self.period
+            self._avg_loss += loss / self.period
+            if self._count < self.period:
+                return None
+        else:
+            decay = (self.period - 1) / self.period
+            self._avg_gain = decay * self._avg_gain + gain / self.period
+            self._avg_loss = decay * self._avg_loss + loss / self.period
+        self.value = _rsi_value(self._avg_gain, self._avg_loss)
+        return self.value
+
+
+def _rsi_value(avg_gain, avg_loss):
+    if avg_loss == 0:
+        return 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+class MACD:
+    """MACD line, signal line and histogram as a ``(macd, signal, hist)`` tuple."""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self._fast = EMA(fast)
+        self._slow = EMA(slow)
+        self._signal = EMA(signal)
+        self.value = None
+
+    def update(self, close: float, high: float = None, low: float = None):
+        fast = self._fast.update(close)
+        slow = self._slow.update(close)
+        if fast is None or slow is None:
+            return None
+        line = fast - slow
+        signal = self._signal.update(line)
+        if signal is not None:
+            self.value = (line, signal, line - signal)
+        return self.value
+
+
+class ATR:
+    """Wilder's average true range."""
+
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+        self._prev_close = None
+        self._count = 0
+        self._atr = 0.0
+        self.value = None
+
+    def update(self, close: float, high: float, low: float):
+        tr = _true_range(high, low, self._prev_close)
+        self._prev_close = close
+        self._count += 1
+        if self._count <= self.period:
+            self._atr += tr / self.period
+            if self._count < self.period:
+                return None
+        else:
+            self._atr = ((self.period - 1) * self._atr + tr) / self.period
+        self.value = self._atr
+        return self.value
+
+
+def _true_range(high, low, prev_close):
+    if prev_close is None:
+        return high - low
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+class ADX:
+    """Wilder's average directional index."""
+
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+        self._prev = None  # (high, low, close) of the previous candle
+        self._count = 0
+        self._tr = 0.0
+        self._plus_dm = 0.0
+        self._minus_dm = 0.0
+        self._dx_count = 0
+        self._adx = 0.0
+        self.plus_di = None
+        self.minus_di = None
+        self.value = None
+
+    def update(self, close: float, high: float, low: float):
+        prev, self._prev = self._prev, (high, low, close)
+        if prev is None:
+            return None
+        up = high - prev[0]
+        down = prev[1] - low
+        plus_dm = up if up > down and up > 0 else 0.0
+        minus_dm = down if down > up and down > 0 else 0.0
+        tr = _true_range(high, low, prev[2])
+
+        self._count += 1
+        if self._count <= self.period:
+            self._tr += tr
+            self._plus_dm += plus_dm
+            self._minus_dm += minus_dm
+            if self._count < self.period:
+                return None
+        else:
+            decay = (self.period - 1) / self.period
+            self._tr = decay * self._tr + tr
+            self._plus_dm = decay * self._plus_dm + plus_dm
+            self._minus_dm = decay * self._minus_dm + minus_dm
+
+        self.plus_di, self.minus_di, dx = _directional(
+            self._tr, self._plus_dm, self._minus_dm
+        )
+        self._dx_count += 1
+        if self._dx_count <= self.period:
+            self._adx += dx / self.period
+            if self._dx_count < self.period:
+                return None
+        else:
+            self._adx = ((self.period - 1) * self._adx + dx) / self.period
+        self.value = self._adx
+        return self.value
+
+
+def _directional(tr, plus_dm, minus_dm):
+    """Return ``(+DI, -DI, DX)`` from smoothed TR and directional movement."""
+    plus_di = 100.0 * plus_dm / tr if tr else 0.0
+    minus_di = 100.0 * minus_dm / tr if tr else 0.0
+    total = plus_di + minus_di
+    dx = 100.0 * abs(plus_di - minus_di) / total if total else 0.0
+    return plus_di, minus_di, dx
+
+
+# Batch implementations -----------------------------------------------------
+
+
+def _recursive_filter(x, decay: float, gain: float, init: float):
+    """Return ``y`` with ``y[t] = decay * y[t-1] + gain * x[t]``, ``y[-1] = init``.
+
+    Splits ``x`` into blocks short enough that ``decay ** -block`` stays far
+    from overflow and filters all blocks at once as cumulative sums along
+    the rows of a matrix. Only the carry from one block into the next is
+    computed in a loop, once per block.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    if decay == 0:
+        return gain * x
+    block = int(max(1, min(512, 100 / -math.log10(decay)))) if decay < 1 else 512
+    block = min(block, max(n, 1))
+    j = np.arange(block, dtype=np.float64)
+    grow = decay ** -j
+    shrink = decay ** j
+    rows = -(-n // block)
+    padded = np.zeros(rows * block)
+    padded[:n] = x
+    # each block filtered as if the value before it were zero
+    local = np.cumsum(padded.reshape(rows, block) * (gain * grow), axis=1) * shrink
+    carries = np.empty(rows)
+    carry = init
+    tail = decay**block
+    for k, end in enumerate(local[:, -1].tolist()):
+        carries[k] = carry
+        carry = end + tail * carry
+    local += carries[:, None] * (decay * shrink)
+    return local.reshape(-1)[:n]
+
+
+def sma(close, period: int):
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(len(close), np.nan)
+    if len(close) >= period:
+        csum = np.cumsum(np.concatenate(([0.0], close)))
+        out[period - 1 :] = (csum[period:] - csum[:-period]) / period
+    return out
+
+
+def _ema_from(values, period: int, offset: int):
+    """EMA of ``values[offset:]`` placed into a full-length NaN array."""
+    out = np.full(len(values), np.nan)
+    start = offset + period - 1
+    if len(values) <= start:
+        return out
+    alpha = 2.0 / (period + 1)
+    seed = values[offset : start + 1].mean()
+    out[start] = seed
+    out[start + 1 :] = _recursive_filter(values[start + 1 :], 1 - alpha, alpha, seed)
+    return out
+
+
+def ema(close, period: int):
+    return _ema_from(np.asarray(close, dtype=np.float64), int(period), 0)
+
+
+def rsi(close, period: int = 14):
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return out
+    change = np.diff(close)
+    gain = np.maximum(change, 0.0)
+    loss = np.maximum(-change, 0.0)
+    decay = (period - 1) / period
+    avg_gain = np.empty(len(change))
+    avg_loss = np.empty(len(change))
+    avg_gain[period - 1] = gain[:period].mean()
+    avg_loss[period - 1] = loss[:period].mean()
+    avg_gain[period:] = _recursive_filter(gain[period:], decay, 1 / period, avg_gain[period - 1])
+    avg_loss[period:] = _recursive_filter(loss[period:], decay, 1 / period, avg_loss[period - 1])
+    g = avg_gain[period - 1 :]
+    l = avg_loss[period - 1 :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = 100.0 - 100.0 / (1.0 + g / l)
+    out[period:] = np.where(l == 0, 100.0, values)
+    return out
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9):
+    """Return ``(macd, signal, hist)`` arrays."""
+    close = np.asarray(close, dtype=np.float64)
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = _ema_from(line, int(signal), int(max(fast, slow)) - 1)
+    line = np.where(np.isnan(signal_line), np.nan, line)
+    return line, signal_line, line - signal_line
+
+
+def _true_range_series(high, low, close):
+    tr = high - low
+    prev = close[:-1]
+    tr[1:] = np.maximum.reduce(
+        [high[1:] - low[1:], np.abs(high[1:] - prev), np.abs(low[1:] - prev)]
+    )
+    return tr
+
+
+def atr(high, low, close, period: int = 14):
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    out = np.full(len(close), np.nan)
+    if len(close) < period:
+        return out
+    tr = _true_range_series(high, low, close)
+    seed = tr[:period].mean()
+    out[period - 1] = seed
+    out[period:] = _recursive_filter(tr[period:], (period - 1) / period, 1 / period, seed)
+    return out
+
+
+def adx(high, low, close, period: int = 14):
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    n = len(close)
+    out = np.full(n, np.nan)
+    if n < 2 * period:
+        return out
+    up = high[1:] - high[:-1]
+    down = low[:-1] - low[1:]
+    plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+    minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+    tr = _true_range_series(high, low, close)[1:]
+
+    decay = (period - 1) / period
+    smoothed = []
+    for series in (tr, plus_dm, minus_dm):
+        s = np.empty(len(series))
+        s[period - 1] = series[:period].sum()
+        s[period:] = _recursive_filter(series[period:], decay, 1.0, s[period - 1])
+        smoothed.append(s[period - 1 :])
+    s_tr, s_plus, s_minus = smoothed
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plus_di = np.where(s_tr != 0, 100.0 * s_plus / s_tr, 0.0)
+        minus_di = np.where(s_tr != 0, 100.0 * s_minus / s_tr, 0.0)
+        total = plus_di + minus_di
+        dx = np.where(total != 0, 100.0 * np.abs(plus_di - minus_di) / total, 0.0)
+
+    seed = dx[:period].mean()
+    values = np.empty(len(dx) - period + 1)
+    values[0] = seed
+    values[1:] = _recursive_filter(dx[period:], decay, 1 / period, seed)
+    out[2 * period - 1 :] = values
+    return out
+
+
+# Per-symbol registry ---------------------------------------------------------
+
+INDICATORS = {"sma": SMA, "ema": EMA, "rsi": RSI, "macd": MACD, "atr": ATR, "adx": ADX}
+
+
+class IndicatorEngine:
+    """Streaming indicators per (symbol, interval), fed by closed candles.
+
+    Indicators are created on first lookup, warmed up from the candles the
+    ``MarketDataHub`` already holds, and then updated by the hub for every
+    newly closed candle.
+    """
+
+    def __init__(self, market_data=None, interval: str = "1h"):
+        self.market_data = market_data
+        self.interval = market_data.interval if market_data is not None else interval
+        self._indicators = {}
+        if market_data is not None:
+            market_data.add_listener(self.on_candle)
+
+    def on_candle(self, symbol: str, interval: str, candle) -> None:
+        """Update every indicator of ``symbol`` with a closed candle tuple."""
+        for indicator in self._indicators.get((symbol, interval), {}).values():
+            indicator.update(candle[4], candle[2], candle[3])
+
+    def get(self, symbol: str, kind: str, *params, interval: str = None):
+        """Return the current value of an indicator, e.g. ``get(s, "sma", 7)``."""
+        interval = interval or self.interval
+        indicators = self._indicators.setdefault((symbol, interval), {})
+        key = (kind, params)
+        if key not in indicators:
+            indicator = INDICATORS[kind](*params)
+            buffer = None
+            if self.market_data is not None:
+                buffer = self.market_data.buffer(symbol, interval)
+            if buffer is not None and len(buffer):
+                for close, high, low in zip(
+                    buffer.last(), buffer.last(field="high"), buffer.last(field="low")
+                ):
+                    indicator.update(close, high, low)
+            indicators[key] = indicator
+        return indicators[key].value
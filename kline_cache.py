@@ -0,0 +1,134 @@
+"""On-disk store for historical klines.
+
+Klines are kept per symbol and interval as one raw binary file per column,
+so reading a range is a memory map plus a slice and adding new candles is a
+plain append. Only closed candles are written; the store never rewrites
+existing rows unless the requested history reaches further back than what
+is on disk.
+"""
+
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Column name -> on-disk dtype, in Binance kline order (``ignore`` is dropped).
+COLUMNS = {
+    "open_time": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+    "close_time": np.int64,
+    "quote_asset_volume": np.float64,
+    "number_of_trades": np.int64,
+    "taker_buy_base": np.float64,
+    "taker_buy_quote": np.float64,
+}
+
+# ``open_time`` is written last so an interrupted append leaves the other
+# columns longer than ``open_time`` and the extra rows are ignored on read.
+_WRITE_ORDER = [c for c in COLUMNS if c != "open_time"] + ["open_time"]
+
+
+class KlineStore:
+    """Append-only columnar kline store rooted at a directory."""
+
+    def __init__(self, root=None):
+        self.root = root or os.getenv("KLINE_CACHE_DIR", "kline_cache")
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def _path(self, symbol, interval, column):
+        return os.path.join(self._dir(symbol, interval), f"{column}.bin")
+
+    def _meta_path(self, symbol, interval):
+        return os.path.join(self._dir(symbol, interval), "meta.json")
+
+    def rows(self, symbol, interval) -> int:
+        """Return the number of complete rows stored for ``symbol``."""
+        path = self._path(symbol, interval, "open_time")
+        if not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // np.dtype(np.int64).itemsize
+
+    def coverage_start(self, symbol, interval):
+        """Return the earliest start time (ms) the stored history covers."""
+        try:
+            with open(self._meta_path(symbol, interval)) as f:
+                return json.load(f)["start"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def last_open_time(self, symbol, interval):
+        """Return the open time (ms) of the newest stored candle, or ``None``."""
+        n = self.rows(symbol, interval)
+        if n == 0:
+            return None
+        times = np.memmap(
+            self._path(symbol, interval, "open_time"), dtype=np.int64, mode="r", shape=(n,)
+        )
+        return int(times[-1])
+
+    def read(self, symbol, interval, start_ms=None) -> dict:
+        """Return stored columns as arrays, optionally from ``start_ms`` on."""
+        n = self.rows(symbol, interval)
+        if n == 0:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+
+        maps = {
+            name: np.memmap(
+                self._path(symbol, interval, name), dtype=dtype, mode="r", shape=(n,)
+            )
+            for name, dtype in COLUMNS.items()
+        }
+        first = 0
+        if start_ms is not None:
+            first = int(np.searchsorted(maps["open_time"], start_ms, side="left"))
+        return {name: np.array(arr[first:]) for name, arr in maps.items()}
+
+    def append(self, symbol, interval, columns: dict) -> int:
+        """Append rows newer than the last stored candle and return how many."""
+        last = self.last_open_time(symbol, interval)
+        open_time = np.asarray(columns["open_time"], dtype=np.int64)
+        mask = slice(None) if last is None else open_time > last
+        count = int(open_time[mask].size)
+        if count == 0:
+            return 0
+
+        os.makedirs(self._dir(symbol, interval), exist_ok=True)
+        n = self.rows(symbol, interval)
+        for name in _WRITE_ORDER:
+            path = self._path(symbol, interval, name)
+            values = np.asarray(columns[name], dtype=COLUMNS[name])[mask]
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                # Drop any rows left behind by an interrupted append.
+                f.truncate(n * values.itemsize)
+                f.seek(0, os.SEEK_END)
+                values.tofile(f)
+        logger.debug("Stored %d %s %s klines", count, symbol, interval)
+        return count
+
+    def replace(self, symbol, interval, columns: dict, start_ms=None) -> None:
+        """Overwrite the stored history for ``symbol`` with ``columns``."""
+        os.makedirs(self._dir(symbol, interval), exist_ok=True)
+        path = self._path(symbol, interval, "open_time")
+        if os.path.exists(path):
+            os.remove(path)
+        for name in _WRITE_ORDER:
+            np.asarray(columns[name], dtype=COLUMNS[name]).tofile(
+                self._path(symbol, interval, name)
+            )
+        with open(self._meta_path(symbol, interval), "w") as f:
+            json.dump({"start": start_ms}, f)
+        logger.info(
+            "Rebuilt %s %s kline cache with %d rows",
+            symbol,
+            interval,
+            len(columns["open_time"]),
+        )
@@ -0,0 +1,208 @@
+"""Persistent per-symbol position ledger.
+
+``PositionLedger`` keeps quantity, average cost basis, realized PnL and fees
+for every symbol and is updated once per fill, either from ``TRADE``
+execution reports on the user data stream or from a ``get_my_trades``
+backfill. The id of the last applied trade is stored with each position, so
+a backfill only requests trades newer than it. Reading a position never
+touches the trade history.
+"""
+
+import asyncio
+import json
+import logging
+import os
+
+from user_stream import STREAM_CONNECTED
+
+logger = logging.getLogger(__name__)
+
+# Trades requested per get_my_trades call (the Binance maximum).
+BACKFILL_LIMIT = 1000
+
+
+def _new_position() -> dict:
+    return {"qty": 0.0, "cost": 0.0, "realized": 0.0, "fees": 0.0, "last_trade_id": -1}
+
+
+def apply_fill(position: dict, signed_qty: float, price: float) -> None:
+    """Update ``position`` in place for a fill using average cost.
+
+    ``signed_qty`` is positive for buys and negative for sells. Reducing a
+    position realizes PnL against the average cost; crossing zero opens the
+    opposite position at ``price``.
+    """
+    qty = position["qty"]
+    if qty == 0 or (qty > 0) == (signed_qty > 0):
+        position["qty"] = qty + signed_qty
+        position["cost"] += signed_qty * price
+        return
+    avg = position["cost"] / qty
+    closed = min(abs(signed_qty), abs(qty))
+    direction = 1.0 if qty > 0 else -1.0
+    position["realized"] += closed * (price - avg) * direction
+    position["cost"] -= closed * avg * direction
+    remaining = abs(signed_qty) - closed
+    position["qty"] = qty + signed_qty
+    if abs(position["qty"]) < 1e-12:
+        position["qty"] = 0.0
+        position["cost"] = 0.0
+    elif remaining > 0:
+        position["cost"] = position["qty"] * price
+
+
+class PositionLedger:
+    """Positions per symbol, kept current from fills and saved to disk."""
+
+    def __init__(self, path: str = None, client=None):
+        self.path = path or os.getenv("LEDGER_PATH", "ledger.json")
+        # client the stream listener backfills through
+        self.client = client
+        self.positions = {}
+        # symbols whose history may be missing trades; fills for them are
+        # held back until a backfill has caught up
+        self._fresh = set()
+        self._held = {}
+        self._backfills = {}
+        self._locks = {}
+        self.streaming = False
+        self._loaded = False
+
+    def load(self) -> None:
+        try:
+            with open(self.path) as f:
+                self.positions = json.load(f)
+        except FileNotFoundError:
+            self.positions = {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable ledger: %s", e)
+            self.positions = {}
+        self._loaded = True
+
+    def save(self) -> None:
+        """Atomically write the ledger to disk."""
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.positions, f)
+        os.replace(tmp, self.path)
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+    def position(self, symbol: str) -> dict:
+        """Return ``symbol``'s position with its average price."""
+        self._ensure_loaded()
+        position = dict(self.positions.get(symbol) or _new_position())
+        qty = position["qty"]
+        position["avg_price"] = position["cost"] / qty if qty else 0.0
+        return position
+
+    def apply_trade(self, trade: dict) -> bool:
+        """Apply one trade in the REST ``/myTrades`` format.
+
+        Trades at or before the symbol's last trade id are ignored, so the
+        same fill can safely arrive from both the stream and a backfill.
+        """
+        self._ensure_loaded()
+        symbol = trade["symbol"]
+        position = self.positions.setdefault(symbol, _new_position())
+        trade_id = int(trade["id"])
+        if trade_id <= position["last_trade_id"]:
+            return False
+        qty = float(trade["qty"])
+        price = float(trade["price"])
+        apply_fill(position, qty if trade["isBuyer"] else -qty, price)
+        commission = float(trade.get("commission", 0) or 0)
+        asset = trade.get("commissionAsset")
+        if commission and asset and symbol.startswith(asset):
+            # commission paid in the base asset reduces the holding
+            position["qty"] -= commission
+        elif commission and (not asset or symbol.endswith(asset)):
+            position["fees"] += commission
+        position["last_trade_id"] = trade_id
+        return True
+
+    def on_user_event(self, event: dict) -> None:
+        """User data stream listener applying ``TRADE`` execution reports.
+
+        A fill for a symbol the ledger has not caught up on yet is held and
+        a backfill of that symbol is started, which applies it afterwards.
+        """
+        kind = event.get("e")
+        if kind == STREAM_CONNECTED:
+            # fills may have been missed while disconnected
+            self.streaming = True
+            self._fresh.clear()
+            return
+        if kind != "executionReport" or event.get("x") != "TRADE":
+            return
+        trade = {
+            "symbol": event["s"],
+            "id": event["t"],
+            "price": event["L"],
+            "qty": event["l"],
+            "commission": event.get("n", 0),
+            "commissionAsset": event.get("N"),
+            "isBuyer": event["S"] == "BUY",
+        }
+        if trade["symbol"] not in self._fresh:
+            self._held.setdefault(trade["symbol"], []).append(trade)
+            self._schedule_backfill(trade["symbol"])
+            return
+        if self.apply_trade(trade):
+            self.save()
+
+    def _schedule_backfill(self, symbol: str) -> None:
+        if self.client is None or symbol in self._backfills:
+            return
+        task = asyncio.create_task(self.backfill(self.client, symbol))
+        self._backfills[symbol] = task
+        task.add_done_callback(lambda t: self._backfill_done(symbol, t))
+
+    def _backfill_done(self, symbol: str, task) -> None:
+        self._backfills.pop(symbol, None)
+        if not task.cancelled() and task.exception() is not None:
+            # the held fills stay; the next one retries
+            logger.warning("Ledger backfill of %s failed: %s", symbol, task.exception())
+
+    async def backfill(self, client, symbol: str) -> int:
+        """Apply every trade of ``symbol`` after its last trade id."""
+        self._ensure_loaded()
+        lock = self._locks.setdefault(symbol, asyncio.Lock())
+        async with lock:
+            applied = 0
+            while True:
+                last = self.positions.get(symbol, _new_position())["last_trade_id"]
+                trades = await client.get_my_trades(
+                    symbol=symbol, fromId=last + 1, limit=BACKFILL_LIMIT
+                )
+                for trade in trades:
+                    applied += self.apply_trade(dict(trade, symbol=symbol))
+                if len(trades) < BACKFILL_LIMIT:
+                    break
+            # fills that arrived on the stream during the backfill
+            for trade in self._held.pop(symbol, []):
+                applied += self.apply_trade(trade)
+            if self.streaming:
+                self._fresh.add(symbol)
+            if applied:
+                self.save()
+            return applied
+
+    async def sync(self, client, symbols, concurrency: int = 8) -> None:
+        """Backfill those of ``symbols`` the stream has not kept current."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(symbol):
+            async with semaphore:
+                try:
+                    await self.backfill(client, symbol)
+                except Exception as e:
+                    logger.debug("No trade history for %s: %s", symbol, e)
+
+        await asyncio.gather(*(one(s) for s in symbols if s not in self._fresh))
+
+
+# Ledger of the account traded by this process.
+LEDGER = PositionLedger()
@@ -0,0 +1,520 @@
+"""Local stand-in for the Binance spot API, for end-to-end load tests.
+
+``LocalBinance`` is an aiohttp server implementing the endpoints and
+streams the bot uses on top of a ``DummyClient`` account and its
+``SimExchange``:
+
+* ``/api/v3/...``: ping, time, ticker prices, average price, klines and
+  depth, plus the signed account, trade history and order endpoints, with
+  API key, HMAC signature and ``recvWindow`` checks and the
+  ``x-mbx-used-weight-1m`` / ``x-mbx-order-count-*`` usage headers;
+* ``/ws/<symbol>@kline_<interval>``: kline streams built from the trades
+  passed to ``tick`` (``replay`` drives them along synthetic candles);
+* ``/ws-api/v3``: the part of the WebSocket API ``python-binance`` uses to
+  subscribe to the user data stream.
+
+With ``BINANCE_BASE_URL`` set (e.g. ``http://127.0.0.1:8765``),
+``binance_client.get_binance_client`` returns a real ``AsyncClient`` talking
+to this server, so request signing, session reuse and JSON decoding run as
+they do in production, without the network. Start the server with
+``python local_binance.py``.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import os
+import time
+from urllib.parse import quote, urlencode
+
+from aiohttp import WSMsgType, web
+from binance.helpers import interval_to_milliseconds
+
+from dummy_client import KLINE_ANCHOR_MS, DummyClient
+from market_data import kline_event
+from sim_exchange import kline_path
+
+logger = logging.getLogger(__name__)
+
+# Request weight of each endpoint, and of the ones called without a symbol.
+WEIGHTS = {
+    "/api/v3/ping": 1,
+    "/api/v3/time": 1,
+    "/api/v3/ticker/price": 2,
+    "/api/v3/avgPrice": 2,
+    "/api/v3/klines": 2,
+    "/api/v3/depth": 5,
+    "/api/v3/account": 20,
+    "/api/v3/myTrades": 20,
+    "/api/v3/order": 4,
+    "/api/v3/openOrders": 6,
+}
+ALL_SYMBOLS_WEIGHTS = {"/api/v3/ticker/price": 4, "/api/v3/openOrders": 80}
+# Default ``recvWindow`` in milliseconds.
+RECV_WINDOW = 5000
+
+
+class ApiError(Exception):
+    """An error answered in Binance's ``{"code", "msg"}`` format."""
+
+    def __init__(self, status: int, code: int, msg: str):
+        super().__init__(msg)
+        self.status = status
+        self.code = code
+        self.msg = msg
+
+
+class UsageCounter:
+    """Usage within fixed windows of ``seconds``, like Binance's interval counters."""
+
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.start = 0
+        self.used = 0
+
+    def add(self, amount: int, now: float) -> int:
+        start = int(now) - int(now) % self.seconds
+        if start != self.start:
+            self.start, self.used = start, 0
+        self.used += amount
+        return self.used
+
+
+def _required(params: dict, name: str) -> str:
+    value = params.get(name)
+    if not value:
+        raise ApiError(
+            400,
+            -1102,
+            f"Mandatory parameter '{name}' was not sent, was empty/null, or malformed.",
+        )
+    return value
+
+
+def _int(params: dict, name: str):
+    value = params.get(name)
+    return None if value in (None, "") else int(value)
+
+
+class LocalBinance:
+    """Serves the simulated ``account`` over Binance's REST and WebSocket APIs."""
+
+    def __init__(
+        self,
+        account: DummyClient = None,
+        api_key: str = None,
+        api_secret: str = None,
+        host: str = None,
+        port: int = None,
+    ):
+        self.account = account or DummyClient()
+        # the bot's own credentials are accepted by default, so one .env serves both
+        self.api_key = api_key or os.getenv("BINANCE_API_KEY") or "local"
+        self.api_secret = api_secret or os.getenv("BINANCE_API_SECRET") or "local"
+        self.host = host or os.getenv("LOCAL_BINANCE_HOST", "127.0.0.1")
+        self.port = port if port is not None else int(os.getenv("LOCAL_BINANCE_PORT", "8765"))
+        self._weight = UsageCounter(60)
+        self._orders_10s = UsageCounter(10)
+        self._orders_1d = UsageCounter(86400)
+        # (symbol, interval) -> queues of the sockets streaming those klines
+        self._kline_queues = {}
+        # (symbol, interval) -> the candle being built, as a REST kline row
+        self._candles = {}
+        self._subscription_ids = itertools.count(1)
+        self._runner = None
+        self.stats = {"requests": 0, "errors": 0, "orders": 0, "events": 0}
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._api_middleware])
+        routes = [
+            web.get("/api/v3/ping", self._ping),
+            web.get("/api/v3/time", self._time),
+            web.get("/api/v3/ticker/price", self._ticker),
+            web.get("/api/v3/avgPrice", self._avg_price),
+            web.get("/api/v3/klines", self._klines),
+            web.get("/api/v3/depth", self._depth),
+            web.get("/api/v3/account", self._account),
+            web.get("/api/v3/myTrades", self._my_trades),
+            web.post("/api/v3/order", self._new_order),
+            web.get("/api/v3/order", self._get_order),
+            web.delete("/api/v3/order", self._cancel_order),
+            web.get("/api/v3/openOrders", self._open_orders),
+            web.get("/ws/{stream}", self._kline_stream),
+            web.get("/ws-api/v3", self._ws_api),
+        ]
+        app.add_routes(routes)
+        return app
+
+    async def start(self) -> None:
+        # no access log: it would dominate the cost of a load test
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        # port 0 binds a free port
+        self.port = self._runner.addresses[0][1]
+        logger.info("Local Binance listening on %s", self.url)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # market
+
+    def tick(self, symbol: str, price: float, quantity: float = None) -> None:
+        """Trade ``symbol`` at ``price`` outside the book and update its kline streams.
+
+        Stream candles follow the wall clock; a candle is sent as closed with
+        the first trade after its close time.
+        """
+        price = float(price)
+        self.account.set_price(symbol, price, quantity)
+        now = int(time.time() * 1000)
+        for (stream_symbol, interval), queues in self._kline_queues.items():
+            if stream_symbol != symbol or not queues:
+                continue
+            for event in self._update_candle(symbol, interval, price, quantity or 0.0, now):
+                data = json.dumps(event)
+                for queue in queues:
+                    queue.put_nowait(data)
+
+    def _update_candle(self, symbol, interval, price, quantity, now) -> list:
+        step = interval_to_milliseconds(interval)
+        open_time = now - (now - KLINE_ANCHOR_MS) % step
+        events = []
+        candle = self._candles.get((symbol, interval))
+        if candle is not None and candle[0] != open_time:
+            events.append(kline_event(symbol, interval, candle, closed=True))
+            candle = None
+        if candle is None:
+            candle = [open_time, price, price, price, price, 0.0, open_time + step - 1]
+            self._candles[(symbol, interval)] = candle
+        candle[2] = max(candle[2], price)
+        candle[3] = min(candle[3], price)
+        candle[4] = price
+        candle[5] += quantity
+        events.append(kline_event(symbol, interval, candle, closed=False))
+        return events
+
+    async def replay(self, symbols, interval: str = "1m", delay: float = 1.0, count: int = None):
+        """Move prices along the account's synthetic ``interval`` candles.
+
+        From the current candle on, the next candle of every symbol is
+        traded through (see ``kline_path``) every ``delay`` seconds, until
+        ``count`` candles have been replayed or forever.
+        """
+        step = interval_to_milliseconds(interval)
+        now = int(time.time() * 1000)
+        open_time = now - (now - KLINE_ANCHOR_MS) % step
+        for n in itertools.count():
+            if count is not None and n >= count:
+                return
+            for symbol in symbols:
+                row = self.account.klines(symbol, interval, open_time + n * step, 1)[0]
+                for price, quantity in kline_path(row):
+                    self.tick(symbol, price, quantity)
+            await asyncio.sleep(delay)
+
+    # REST
+
+    @web.middleware
+    async def _api_middleware(self, request, handler):
+        if not request.path.startswith("/api/"):
+            return await handler(request)
+        self.stats["requests"] += 1
+        now = time.time()
+        placing = request.method == "POST" and request.path == "/api/v3/order"
+        if request.method != "GET":
+            weight = 1
+        elif "symbol" not in request.query:
+            weight = ALL_SYMBOLS_WEIGHTS.get(request.path, WEIGHTS.get(request.path, 1))
+        else:
+            weight = WEIGHTS.get(request.path, 1)
+        headers = {"x-mbx-used-weight-1m": str(self._weight.add(weight, now))}
+        if placing:
+            headers["x-mbx-order-count-10s"] = str(self._orders_10s.add(1, now))
+            headers["x-mbx-order-count-1d"] = str(self._orders_1d.add(1, now))
+        try:
+            response = await handler(request)
+        except ValueError:
+            self.stats["errors"] += 1
+            response = web.json_response(
+                {"code": -1100, "msg": "Illegal characters found in a parameter."}, status=400
+            )
+        except ApiError as e:
+            self.stats["errors"] += 1
+            response = web.json_response({"code": e.code, "msg": e.msg}, status=e.status)
+        response.headers.update(headers)
+        return response
+
+    async def _params(self, request, signed: bool = False) -> dict:
+        params = list(request.query.items())
+        if request.method != "GET":
+            params += list((await request.post()).items())
+        if signed:
+            self._check_api_key(request.headers.get("X-MBX-APIKEY"))
+            signature = dict(params).get("signature")
+            # the client signs "key=value" pairs in the order it sends them
+            payload = "&".join(
+                f"{k}={quote(v) if k == 'symbol' else v}"
+                for k, v in params
+                if k != "signature"
+            )
+            self._check_signature(payload, signature)
+        params = {k: v for k, v in params if k != "signature"}
+        if signed:
+            self._check_timestamp(params)
+        return params
+
+    def _check_api_key(self, api_key) -> None:
+        if api_key != self.api_key:
+            raise ApiError(401, -2015, "Invalid API-key, IP, or permissions for action.")
+
+    def _check_signature(self, payload: str, signature) -> None:
+        expected = hmac.new(
+            self.api_secret.encode(), payload.encode(), hashlib.sha256
+        ).hexdigest()
+        if not signature or not hmac.compare_digest(expected, signature):
+            raise ApiError(400, -1022, "Signature for this request is not valid.")
+
+    @staticmethod
+    def _check_timestamp(params: dict) -> None:
+        timestamp = _int(params, "timestamp")
+        if timestamp is None:
+            _required(params, "timestamp")
+        window = _int(params, "recvWindow") or RECV_WINDOW
+        now = time.time() * 1000
+        if timestamp > now + 1000 or now - timestamp > window:
+            raise ApiError(400, -1021, "Timestamp for this request is outside of the recvWindow.")
+
+    @staticmethod
+    async def _call(coro, code: int):
+        """Await an account call, answering its errors with ``code``."""
+        try:
+            return await coro
+        except (RuntimeError, ValueError) as e:
+            raise ApiError(400, code, str(e)) from e
+
+    async def _ping(self, request):
+        return web.json_response({})
+
+    async def _time(self, request):
+        return web.json_response({"serverTime": int(time.time() * 1000)})
+
+    async def _ticker(self, request):
+        params = await self._params(request)
+        ticker = await self._call(self.account.get_symbol_ticker(params.get("symbol")), -1121)
+        return web.json_response(ticker)
+
+    async def _avg_price(self, request):
+        params = await self._params(request)
+        price = await self.account.get_avg_price(_required(params, "symbol"))
+        return web.json_response(dict(price, mins=5))
+
+    async def _klines(self, request):
+        params = await self._params(request)
+        rows = await self._call(
+            self.account.get_klines(
+                symbol=_required(params, "symbol"),
+                interval=_required(params, "interval"),
+                startTime=_int(params, "startTime"),
+                endTime=_int(params, "endTime"),
+                limit=min(_int(params, "limit") or 500, 1000),
+            ),
+            -1120,
+        )
+        return web.json_response(rows)
+
+    async def _depth(self, request):
+        params = await self._params(request)
+        book = await self.account.get_order_book(
+            _required(params, "symbol"), limit=min(_int(params, "limit") or 100, 5000)
+        )
+        return web.json_response(book)
+
+    async def _account(self, request):
+        await self._params(request, signed=True)
+        return web.json_response(await self.account.get_account())
+
+    async def _my_trades(self, request):
+        params = await self._params(request, signed=True)
+        trades = await self.account.get_my_trades(
+            _required(params, "symbol"),
+            fromId=_int(params, "fromId"),
+            startTime=_int(params, "startTime"),
+            endTime=_int(params, "endTime"),
+            orderId=_int(params, "orderId"),
+            limit=_int(params, "limit") or 500,
+        )
+        return web.json_response(trades)
+
+    async def _new_order(self, request):
+        params = await self._params(request, signed=True)
+        symbol = _required(params, "symbol")
+        side = _required(params, "side")
+        type_ = _required(params, "type")
+        quantity = _required(params, "quantity")
+        if side not in ("BUY", "SELL"):
+            raise ApiError(400, -1117, "Invalid side.")
+        client_order_id = params.get("newClientOrderId")
+        if type_ == "MARKET":
+            place = self.account.order_market_buy if side == "BUY" else self.account.order_market_sell
+            coro = place(symbol=symbol, quantity=quantity, newClientOrderId=client_order_id)
+        elif type_ == "LIMIT":
+            place = self.account.order_limit_buy if side == "BUY" else self.account.order_limit_sell
+            coro = place(
+                symbol=symbol,
+                quantity=quantity,
+                price=_required(params, "price"),
+                newClientOrderId=client_order_id,
+                timeInForce=params.get("timeInForce", "GTC"),
+            )
+        else:
+            raise ApiError(400, -1116, "Invalid orderType.")
+        self.stats["orders"] += 1
+        order = await self._call(coro, -2010)
+        order["transactTime"] = order["time"]
+        return web.json_response(order)
+
+    async def _get_order(self, request):
+        params = await self._params(request, signed=True)
+        order = await self._call(
+            self.account.get_order(
+                _required(params, "symbol"),
+                orderId=_int(params, "orderId"),
+                origClientOrderId=params.get("origClientOrderId"),
+            ),
+            -2013,
+        )
+        return web.json_response(order)
+
+    async def _cancel_order(self, request):
+        params = await self._params(request, signed=True)
+        order = await self._call(
+            self.account.cancel_order(
+                _required(params, "symbol"),
+                orderId=_int(params, "orderId"),
+                origClientOrderId=params.get("origClientOrderId"),
+            ),
+            -2011,
+        )
+        return web.json_response(order)
+
+    async def _open_orders(self, request):
+        params = await self._params(request, signed=True)
+        return web.json_response(await self.account.get_open_orders(params.get("symbol")))
+
+    # WebSocket
+
+    async def _serve_socket(self, request, queue, on_message=None):
+        """Send the JSON strings put on ``queue`` until the client disconnects."""
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        async def write():
+            while True:
+                await ws.send_str(await queue.get())
+
+        writer = asyncio.create_task(write())
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.TEXT and on_message is not None:
+                    on_message(msg.data)
+        finally:
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+        return ws
+
+    async def _kline_stream(self, request):
+        symbol, _, stream = request.match_info["stream"].partition("@")
+        if not stream.startswith("kline_"):
+            raise web.HTTPNotFound()
+        key = (symbol.upper(), stream[len("kline_"):])
+        queue = asyncio.Queue()
+        queues = self._kline_queues.setdefault(key, set())
+        queues.add(queue)
+        try:
+            return await self._serve_socket(request, queue)
+        finally:
+            queues.discard(queue)
+
+    async def _ws_api(self, request):
+        queue = asyncio.Queue()
+        subscriptions = {}
+
+        def on_message(data):
+            try:
+                message = json.loads(data)
+            except ValueError:
+                message = {}
+            response = self._ws_api_call(message, queue, subscriptions)
+            queue.put_nowait(json.dumps(response))
+
+        try:
+            return await self._serve_socket(request, queue, on_message)
+        finally:
+            for task in subscriptions.values():
+                task.cancel()
+            await asyncio.gather(*subscriptions.values(), return_exceptions=True)
+
+    def _ws_api_call(self, message: dict, queue, subscriptions: dict) -> dict:
+        request_id = message.get("id")
+        method = message.get("method")
+        params = message.get("params") or {}
+        try:
+            if method == "userDataStream.subscribe.signature":
+                self._check_api_key(params.get("apiKey"))
+                self._check_signature(
+                    urlencode(sorted((k, v) for k, v in params.items() if k != "signature")),
+                    params.get("signature"),
+                )
+                self._check_timestamp(params)
+                subscription_id = next(self._subscription_ids)
+                subscriptions[subscription_id] = asyncio.create_task(
+                    self._user_events(subscription_id, queue)
+                )
+                result = {"subscriptionId": subscription_id}
+            elif method == "userDataStream.unsubscribe":
+                task = subscriptions.pop(params.get("subscriptionId"), None)
+                if task is not None:
+                    task.cancel()
+                result = {}
+            elif method == "ping":
+                result = {}
+            else:
+                raise ApiError(400, -1000, f"Unsupported method {method}.")
+        except (ApiError, ValueError) as e:
+            code, status = (e.code, e.status) if isinstance(e, ApiError) else (-1100, 400)
+            return {"id": request_id, "status": status, "error": {"code": code, "msg": str(e)}}
+        return {"id": request_id, "status": 200, "result": result}
+
+    async def _user_events(self, subscription_id: int, queue) -> None:
+        async with self.account.user_socket() as socket:
+            while True:
+                event = await socket.recv()
+                self.stats["events"] += 1
+                queue.put_nowait(json.dumps({"subscriptionId": subscription_id, "event": event}))
+
+
+async def main():
+    server = LocalBinance()
+    await server.start()
+    symbols = [s.strip() for s in os.getenv("SYMBOLS", "BTCUSDT,ETHUSDT").split(",") if s.strip()]
+    try:
+        await server.replay(symbols, delay=float(os.getenv("LOCAL_BINANCE_TICK_SECONDS", "1")))
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    import env_loader  # noqa: F401
+    import logger_config  # noqa: F401
+
+    asyncio.run(main())
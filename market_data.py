@@ -0,0 +1,292 @@
+"""Shared in-memory market data fed by kline streams.
+
+``MarketDataHub`` keeps one kline stream per symbol and interval and stores
+the most recent candles in fixed-size ring buffers. Strategies read prices
+from the hub instead of downloading klines from the exchange on every tick.
+"""
+
+import asyncio
+import logging
+import time
+
+import numpy as np
+from binance.helpers import interval_to_milliseconds
+
+import binance_client
+from dummy_client import DummyClient
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before reopening a stream that failed.
+RECONNECT_DELAY = 5
+
+
+class KlineBuffer:
+    """Ring buffer holding the last ``size`` closed candles of one stream."""
+
+    FIELDS = ("open_time", "open", "high", "low", "close", "volume", "close_time")
+
+    def __init__(self, size: int = 500):
+        self.size = size
+        # float64 holds millisecond timestamps exactly
+        self._data = np.zeros((size, len(self.FIELDS)), dtype=np.float64)
+        self._count = 0
+        # the candle that is still open, as a tuple in FIELDS order
+        self.current = None
+
+    def __len__(self):
+        return min(self._count, self.size)
+
+    @property
+    def last_open_time(self):
+        if not self._count:
+            return None
+        return int(self._data[(self._count - 1) % self.size, 0])
+
+    def append(self, candle) -> bool:
+        """Store a closed candle; return False if it is not newer than the last."""
+        last = self.last_open_time
+        if last is not None and candle[0] < last:
+            return False
+        if last is not None and candle[0] == last:
+            # corrected copy of the newest candle
+            self._data[(self._count - 1) % self.size] = candle
+            return False
+        self._data[self._count % self.size] = candle
+        self._count += 1
+        if self.current is not None and self.current[0] <= candle[0]:
+            self.current = None
+        return True
+
+    def last(self, n: int = None, field: str = "close", include_current: bool = False):
+        """Return up to ``n`` most recent values of ``field``, oldest first."""
+        column = self.FIELDS.index(field)
+        stored = len(self)
+        extra = int(include_current and self.current is not None)
+        take = stored if n is None else max(min(n - extra, stored), 0)
+        end = self._count % self.size
+        index = np.arange(end - take, end) % self.size
+        values = self._data[index, column]
+        if extra:
+            values = np.append(values, self.current[column])
+        return values
+
+
+def _candle_from_row(row):
+    """Convert a REST kline row to a tuple in ``KlineBuffer.FIELDS`` order."""
+    return (
+        float(row[0]),
+        float(row[1]),
+        float(row[2]),
+        float(row[3]),
+        float(row[4]),
+        float(row[5]),
+        float(row[6]),
+    )
+
+
+def _candle_from_event(k):
+    """Convert the ``k`` payload of a kline stream event to a candle tuple."""
+    return (
+        float(k["t"]),
+        float(k["o"]),
+        float(k["h"]),
+        float(k["l"]),
+        float(k["c"]),
+        float(k["v"]),
+        float(k["T"]),
+    )
+
+
+def kline_event(symbol: str, interval: str, row, closed: bool = True) -> dict:
+    """Build a kline stream event from a REST kline row."""
+    return {
+        "e": "kline",
+        "E": int(row[6]),
+        "s": symbol,
+        "k": {
+            "t": int(row[0]),
+            "T": int(row[6]),
+            "s": symbol,
+            "i": interval,
+            "o": str(row[1]),
+            "h": str(row[2]),
+            "l": str(row[3]),
+            "c": str(row[4]),
+            "v": str(row[5]),
+            "x": closed,
+        },
+    }
+
+
+class ReplayKlineStream:
+    """Local stand-in for a kline socket that replays klines from an iterable.
+
+    ``klines`` holds REST-style kline rows (a list or a generator) and each
+    one is emitted as a closed kline event, ``delay`` seconds apart.
+    ``recv`` returns ``None`` once the rows are exhausted.
+    """
+
+    def __init__(self, symbol: str, interval: str, klines, delay: float = 0.0):
+        self.symbol = symbol
+        self.interval = interval
+        self._rows = iter(klines)
+        self.delay = delay
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def recv(self):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        row = next(self._rows, None)
+        if row is None:
+            return None
+        return kline_event(self.symbol, self.interval, row)
+
+
+def _dummy_klines(client: DummyClient, symbol: str, interval: str):
+    """Endless synthetic candles, one per interval from the current one on.
+
+    They continue the price path ``client.get_klines`` returns.
+    """
+    step = interval_to_milliseconds(interval)
+    open_time = int(time.time() * 1000)
+    while True:
+        rows = client.klines(symbol, interval, open_time, 64)
+        yield from rows
+        open_time = rows[-1][0] + step
+
+
+class MarketDataHub:
+    """Keeps kline streams and ring buffers for the symbols being traded."""
+
+    def __init__(
+        self, client, interval: str = "1h", buffer_size: int = 500, stream_factory=None
+    ):
+        self.client = client
+        self.interval = interval
+        self.buffer_size = buffer_size
+        self.buffers = {}
+        self._tasks = {}
+        self._listeners = []
+        self._stream_factory = stream_factory or self._default_stream
+        self._socket_manager = None
+
+    def _default_stream(self, symbol: str, interval: str):
+        if binance_client.is_simulated(self.client):
+            return ReplayKlineStream(
+                symbol,
+                interval,
+                _dummy_klines(self.client, symbol, interval),
+                delay=interval_to_milliseconds(interval) / 1000,
+            )
+        if self._socket_manager is None:
+            self._socket_manager = binance_client.socket_manager(self.client)
+        return self._socket_manager.kline_socket(symbol, interval=interval)
+
+    def add_listener(self, callback) -> None:
+        """Call ``callback(symbol, interval, candle)`` for every closed candle."""
+        self._listeners.append(callback)
+
+    def buffer(self, symbol: str, interval: str = None) -> KlineBuffer:
+        return self.buffers.get((symbol, interval or self.interval))
+
+    def subscribe(self, symbol: str, interval: str = None) -> KlineBuffer:
+        """Start streaming ``symbol`` if it is not streamed already."""
+        key = (symbol, interval or self.interval)
+        if key not in self.buffers:
+            self.buffers[key] = KlineBuffer(self.buffer_size)
+            self._tasks[key] = asyncio.create_task(self._run(*key))
+        return self.buffers[key]
+
+    async def start(self, symbols, interval: str = None) -> None:
+        for symbol in symbols:
+            self.subscribe(symbol, interval)
+
+    async def stop(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    def closes(
+        self,
+        symbol: str,
+        n: int = None,
+        interval: str = None,
+        include_current: bool = False,
+    ):
+        """Return recent closing prices for ``symbol``, oldest first."""
+        buffer = self.buffer(symbol, interval)
+        if buffer is None:
+            return np.empty(0)
+        return buffer.last(n, "close", include_current=include_current)
+
+    def last_price(self, symbol: str, interval: str = None):
+        """Return the latest traded price seen on the stream, if any."""
+        buffer = self.buffer(symbol, interval)
+        if buffer is None:
+            return None
+        if buffer.current is not None:
+            return buffer.current[4]
+        if len(buffer):
+            return float(buffer.last(1)[-1])
+        return None
+
+    async def _backfill(self, symbol: str, interval: str) -> None:
+        rows = await self.client.get_klines(
+            symbol=symbol, interval=interval, limit=self.buffer_size
+        )
+        now = time.time() * 1000
+        for row in rows:
+            candle = _candle_from_row(row)
+            if candle[6] < now:
+                self._on_closed(symbol, interval, candle)
+            else:
+                self.buffers[(symbol, interval)].current = candle
+
+    def _on_closed(self, symbol: str, interval: str, candle) -> None:
+        if not self.buffers[(symbol, interval)].append(candle):
+            return
+        for callback in self._listeners:
+            try:
+                callback(symbol, interval, candle)
+            except Exception as e:
+                logger.exception("Market data listener failed: %s", e)
+
+    def _handle(self, symbol: str, interval: str, msg: dict) -> None:
+        if msg.get("e") == "error":
+            raise RuntimeError(msg.get("m", "stream error"))
+        if msg.get("e") != "kline":
+            return
+        k = msg["k"]
+        candle = _candle_from_event(k)
+        if k["x"]:
+            self._on_closed(symbol, interval, candle)
+        else:
+            self.buffers[(symbol, interval)].current = candle
+
+    async def _run(self, symbol: str, interval: str) -> None:
+        while True:
+            try:
+                # Backfill on every (re)connect so gaps are closed.
+                await self._backfill(symbol, interval)
+                async with self._stream_factory(symbol, interval) as stream:
+                    logger.info("Streaming %s %s klines", symbol, interval)
+                    while True:
+                        msg = await stream.recv()
+                        if msg is None:
+                            logger.info("%s %s stream ended", symbol, interval)
+                            return
+                        self._handle(symbol, interval, msg)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(
+                    "%s %s kline stream failed, reconnecting: %s", symbol, interval, e
+                )
+                await asyncio.sleep(RECONNECT_DELAY)
@@ -0,0 +1,133 @@
+"""Streaming return statistics for strategy weight calculation.
+
+``OnlineWeightMetrics`` keeps the running mean and variance of candle
+returns (Welford's algorithm, plus optional exponentially weighted
+variants) so weights can be refreshed one closed candle at a time instead
+of recomputing the whole history.
+"""
+
+import json
+import logging
+import math
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def weights_from_metrics(momentum: float, volatility: float) -> dict:
+    """Turn return momentum and volatility into normalized strategy weights."""
+    metrics = {
+        "dca": max(momentum, 0.0) + 1e-9,
+        "grid": volatility + 1e-9,
+        "scalping": volatility / 2 + 1e-9,
+        "trend": abs(momentum) + 1e-9,
+        "sentiment": 1e-9,  # placeholder metric
+    }
+    total = sum(metrics.values())
+    return {k: float(v / total) for k, v in metrics.items()}
+
+
+class OnlineWeightMetrics:
+    """Running statistics of close-to-close returns for one symbol."""
+
+    def __init__(self, ew_alphas=()):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.last_close = None
+        self.last_open_time = None
+        # alpha -> [mean, variance] of the exponentially weighted variant
+        self.ew = {float(a): None for a in ew_alphas}
+
+    def update(self, close: float, open_time: int = None) -> bool:
+        """Add one closed candle; return False if it was already counted."""
+        if open_time is not None:
+            if self.last_open_time is not None and open_time <= self.last_open_time:
+                return False
+            self.last_open_time = int(open_time)
+        close = float(close)
+        previous, self.last_close = self.last_close, close
+        if not previous:
+            return True
+
+        ret = close / previous - 1.0
+        self.count += 1
+        delta = ret - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (ret - self.mean)
+
+        for alpha, state in self.ew.items():
+            if state is None:
+                self.ew[alpha] = [ret, 0.0]
+                continue
+            diff = ret - state[0]
+            increment = alpha * diff
+            state[0] += increment
+            state[1] = (1 - alpha) * (state[1] + diff * increment)
+        return True
+
+    def update_many(self, closes, open_times=None) -> int:
+        """Add several closed candles in order and return how many were new."""
+        if open_times is None:
+            return sum(self.update(c) for c in closes)
+        return sum(self.update(c, t) for c, t in zip(closes, open_times))
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def weights(self, ew_alpha: float = None) -> dict:
+        """Return strategy weights from the running (or EW) statistics."""
+        if ew_alpha is not None:
+            state = self.ew.get(float(ew_alpha))
+            if state is not None:
+                return weights_from_metrics(state[0], math.sqrt(state[1]))
+            logger.warning("EW alpha %s is not tracked, using full history", ew_alpha)
+        return weights_from_metrics(self.mean, math.sqrt(self.variance))
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "last_close": self.last_close,
+            "last_open_time": self.last_open_time,
+            "ew": [[alpha, state] for alpha, state in self.ew.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "OnlineWeightMetrics":
+        metrics = cls()
+        metrics.count = data["count"]
+        metrics.mean = data["mean"]
+        metrics.m2 = data["m2"]
+        metrics.last_close = data["last_close"]
+        metrics.last_open_time = data["last_open_time"]
+        metrics.ew = {float(alpha): state for alpha, state in data.get("ew", [])}
+        return metrics
+
+
+def _state_path(path=None):
+    return path or os.getenv("WEIGHT_STATE_PATH", "weight_state.json")
+
+
+def load_states(path=None) -> dict:
+    """Load saved metrics as ``{symbol: OnlineWeightMetrics}``."""
+    try:
+        with open(_state_path(path)) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable weight state: %s", e)
+        return {}
+    return {symbol: OnlineWeightMetrics.from_dict(d) for symbol, d in data.items()}
+
+
+def save_states(states: dict, path=None) -> None:
+    """Atomically write ``{symbol: OnlineWeightMetrics}`` to disk."""
+    path = _state_path(path)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({symbol: m.to_dict() for symbol, m in states.items()}, f)
+    os.replace(tmp, path)
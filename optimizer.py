@@ -0,0 +1,335 @@
+"""Parallel parameter sweeps of the strategies over historical klines.
+
+``sweep`` backtests one strategy (see ``backtest``) with every parameter
+set of a grid, or with random samples of a search space, on a process pool
+with one worker per CPU core. The kline columns are copied once into a
+``multiprocessing.shared_memory`` block that every worker maps, so a task
+carries only its parameters and returns only its metrics. The results are
+ranked by one metric, and ``apply_params`` writes a winner into
+``trading_tasks.CONFIG``. The last ``holdout`` fraction of the history is
+left out of the sweep; every parameter set is also backtested on it, so a
+winner can be checked on candles it was not chosen on before it is applied.
+
+A search space maps parameter names to a list of values, or for random
+search also to a ``(low, high)`` range, sampled uniformly (as integers
+when both bounds are).
+"""
+
+import asyncio
+import functools
+import itertools
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import backtest
+import client_manager
+import data_training
+import trading_tasks
+
+logger = logging.getLogger(__name__)
+
+# Default search spaces; the grid bounds are chosen per history by
+# ``default_space`` since they are prices.
+SEARCH_SPACES = {
+    "scalping": {
+        "ema_fast": [3, 5, 7, 9, 12, 15, 20],
+        "ema_slow": [15, 20, 25, 30, 40, 50, 60, 80],
+    },
+    "trend": {
+        "lookback": [40, 60, 80, 100, 120, 150, 200],
+        "adx_period": [10, 14, 20],
+        "adx_threshold": [15.0, 20.0, 25.0, 30.0, 35.0],
+    },
+    "dca": {"interval_minutes": [15, 30, 60, 120, 240, 480, 720, 1440]},
+    "grid": {"levels": [5, 10, 15, 20, 30]},
+}
+
+# Metrics where a smaller value ranks higher.
+LOWER_IS_BETTER = {"max_drawdown", "fees", "turnover", "trades"}
+
+# Swept parameter -> (CONFIG entry, key within it or None for the entry itself).
+# Entries in PER_SYMBOL hold one dict per symbol, which the key is set in.
+CONFIG_KEYS = {
+    "scalping": {
+        "ema_fast": ("scalping_indicators", "ema_fast"),
+        "ema_slow": ("scalping_indicators", "ema_slow"),
+    },
+    "trend": {
+        "lookback": ("trend_indicators", "lookback"),
+        "ema_fast": ("trend_indicators", "ema_fast"),
+        "ema_slow": ("trend_indicators", "ema_slow"),
+        "adx_period": ("trend_indicators", "adx_period"),
+        "adx_threshold": ("trend_indicators", "adx_threshold"),
+    },
+    "dca": {"interval_minutes": ("dca_interval_minutes", None)},
+    "grid": {
+        "lower": ("grid", "lower"),
+        "upper": ("grid", "upper"),
+        "levels": ("grid", "levels"),
+    },
+}
+PER_SYMBOL = {"grid"}
+
+# Fraction of the history, at its end, kept out of the sweep by default.
+HOLDOUT = 0.25
+
+# Kline columns of the shared block, set in each worker by ``_attach``.
+_SHARED = None
+_COLUMNS = None
+
+
+def default_space(strategy: str, columns: dict) -> dict:
+    """``SEARCH_SPACES[strategy]``, with grid bounds at quantiles of the closes."""
+    if strategy not in SEARCH_SPACES:
+        raise ValueError(f"Unknown strategy {strategy}")
+    space = dict(SEARCH_SPACES[strategy])
+    if strategy == "grid":
+        close = columns["close"]
+        space["lower"] = np.round(np.quantile(close, [0.05, 0.1, 0.2, 0.3]), 2).tolist()
+        space["upper"] = np.round(np.quantile(close, [0.7, 0.8, 0.9, 0.95]), 2).tolist()
+    return space
+
+
+def _valid(params: dict) -> bool:
+    if params.get("ema_fast", 0) >= params.get("ema_slow", np.inf):
+        return False
+    return params.get("lower", 0) < params.get("upper", np.inf)
+
+
+def grid_candidates(space: dict) -> list:
+    """Every combination of the values in ``space``."""
+    for name, values in space.items():
+        if isinstance(values, tuple):
+            raise ValueError(f"Grid search needs a list of values for {name}")
+    names = list(space)
+    combos = (dict(zip(names, values)) for values in itertools.product(*space.values()))
+    return [params for params in combos if _valid(params)]
+
+
+def random_candidates(space: dict, samples: int, seed: int = 0) -> list:
+    """Up to ``samples`` distinct random parameter sets from ``space``."""
+    rng = np.random.default_rng(seed)
+    candidates, seen = [], set()
+    # invalid and repeated draws are retried, within reason
+    for _ in range(samples * 20):
+        if len(candidates) == samples:
+            break
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = int(rng.integers(low, high + 1))
+                else:
+                    params[name] = float(rng.uniform(low, high))
+            else:
+                params[name] = values[int(rng.integers(len(values)))]
+                if isinstance(params[name], np.generic):
+                    params[name] = params[name].item()
+        key = tuple(sorted(params.items()))
+        if key not in seen and _valid(params):
+            seen.add(key)
+            candidates.append(params)
+    return candidates
+
+
+def _share(columns: dict):
+    """Copy ``columns`` into a new shared memory block; return it and its layout."""
+    layout, offset = [], 0
+    for name, values in columns.items():
+        layout.append((name, values.dtype.str, len(values), offset))
+        offset += values.nbytes
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for (name, dtype, length, start), values in zip(layout, columns.values()):
+        np.ndarray(length, dtype, buffer=block.buf, offset=start)[:] = values
+    return block, layout
+
+
+def _attach(name: str, layout: list) -> None:
+    """Pool initializer: map the parent's kline columns without copying them."""
+    global _SHARED, _COLUMNS
+    _SHARED = shared_memory.SharedMemory(name=name)
+    _COLUMNS = {
+        column: np.ndarray(length, dtype, buffer=_SHARED.buf, offset=start)
+        for column, dtype, length, start in layout
+    }
+
+
+def _split(columns: dict, split: int):
+    """In-sample and holdout columns of a history cut at ``split`` (views, no copies)."""
+    return (
+        {name: values[:split] for name, values in columns.items()},
+        {name: values[split:] for name, values in columns.items()},
+    )
+
+
+def _evaluate(strategy: str, options: dict, split: int, params: dict) -> dict:
+    in_sample, holdout = _split(_COLUMNS, split)
+    result = backtest.backtest(in_sample, strategy, params, **options)["metrics"]
+    if len(holdout["close"]):
+        result["holdout"] = backtest.backtest(holdout, strategy, params, **options)["metrics"]
+    return result
+
+
+def rank(results: list, metric: str = "sharpe") -> list:
+    """Sort results best first by their in-sample ``metric``.
+
+    Runs that lost the whole capital come last whatever their metric; a
+    Sharpe ratio of per-candle returns can stay positive up to the loss.
+    """
+    sign = 1 if metric in LOWER_IS_BETTER else -1
+    return sorted(results, key=lambda r: (r["return"] <= -1, sign * r[metric]))
+
+
+def sweep(
+    klines,
+    strategy: str,
+    space: dict = None,
+    search: str = "grid",
+    samples: int = 100,
+    metric: str = "sharpe",
+    workers: int = None,
+    seed: int = 0,
+    holdout: float = HOLDOUT,
+    **options,
+) -> list:
+    """Backtest ``strategy`` with many parameter sets and return them ranked.
+
+    ``search`` is ``"grid"`` (every combination of ``space``) or
+    ``"random"`` (``samples`` draws from it); ``space`` defaults to
+    ``default_space``. ``workers`` processes share the klines (default: one
+    per core) and ``options`` are passed to ``backtest.backtest``. Each
+    result holds the ``params`` and the ``backtest.metrics`` of one run on
+    all but the last ``holdout`` fraction of the candles, which is ranked,
+    and under ``"holdout"`` the metrics of the same parameters on those
+    last candles (absent when ``holdout`` is 0).
+    """
+    columns = backtest.kline_columns(klines)
+    if not len(columns["close"]):
+        raise ValueError("No klines to sweep")
+    if not 0 <= holdout < 1:
+        raise ValueError(f"holdout must be in [0, 1), not {holdout}")
+    split = len(columns["close"]) - int(len(columns["close"]) * holdout)
+    # the default grid bounds may only look at the in-sample prices
+    space = space or default_space(strategy, _split(columns, split)[0])
+    if search == "grid":
+        candidates = grid_candidates(space)
+    elif search == "random":
+        candidates = random_candidates(space, samples, seed)
+    else:
+        raise ValueError(f"Unknown search {search}")
+    workers = min(workers or os.cpu_count() or 1, max(len(candidates), 1))
+    block, layout = _share(columns)
+    try:
+        # spawned like the training pool: forking a process that runs an
+        # event loop and threads is unsafe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            workers, mp_context=context, initializer=_attach, initargs=(block.name, layout)
+        ) as pool:
+            metrics = pool.map(
+                functools.partial(_evaluate, strategy, options, split),
+                candidates,
+                chunksize=max(len(candidates) // (workers * 4), 1),
+            )
+            results = [dict(m, params=p) for p, m in zip(candidates, metrics)]
+    finally:
+        block.close()
+        block.unlink()
+    logger.info("Swept %d %s parameter sets on %d workers", len(results), strategy, workers)
+    return rank(results, metric)
+
+
+async def sweep_symbol(
+    symbol: str, strategy: str, interval: str = "1h", lookback="365 days ago UTC", **kwargs
+) -> list:
+    """Sweep ``strategy`` on ``symbol``'s history from ``fetch_historical_data``.
+
+    The sweep runs in a thread so the event loop keeps trading meanwhile.
+    """
+    frame = await data_training.fetch_historical_data(
+        symbol, interval, lookback, columns=["open_time", "high", "low", "close"]
+    )
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, functools.partial(sweep, frame, strategy, interval=interval, **kwargs)
+    )
+
+
+def apply_params(strategy: str, params: dict, symbol: str = None) -> dict:
+    """Write the tunable ``params`` of ``strategy`` into ``CONFIG``; return what changed.
+
+    Parameters without a ``CONFIG`` entry (e.g. backtest sizes) are skipped.
+    Per-symbol settings (the grid) are written for ``symbol`` only, which
+    they require. Worker processes receive the new ``CONFIG`` as well.
+    """
+    config = trading_tasks.CONFIG
+    if symbol is None and any(
+        CONFIG_KEYS.get(strategy, {}).get(name, (None,))[0] in PER_SYMBOL for name in params
+    ):
+        raise ValueError(f"{strategy} parameters are set per symbol; pass the symbol")
+    applied = {}
+    for name, value in params.items():
+        target = CONFIG_KEYS.get(strategy, {}).get(name)
+        if target is None:
+            continue
+        if isinstance(value, np.generic):
+            value = value.item()
+        entry, key = target
+        if key is None:
+            config[entry] = value
+        elif entry in PER_SYMBOL:
+            config[entry].setdefault(symbol, {})[key] = value
+        else:
+            config[entry][key] = value
+        applied[name] = value
+    if applied:
+        logger.info("Applied %s parameters %s%s", strategy, applied, f" to {symbol}" if symbol else "")
+        trading_tasks.publish_config()
+    return applied
+
+
+def format_results(results: list, top: int = 10) -> str:
+    """The best ``top`` results as a text table, with holdout return and Sharpe."""
+    lines = [
+        f"{'return':>8} {'sharpe':>7} {'max dd':>7} {'trades':>7} "
+        f"{'ho ret':>8} {'ho shp':>7}  params",
+    ]
+    for r in results[:top]:
+        params = ", ".join(f"{k}={v:g}" for k, v in r["params"].items())
+        held = r.get("holdout")
+        holdout = f"{held['return']:>8.3f} {held['sharpe']:>7.2f}" if held else f"{'-':>8} {'-':>7}"
+        lines.append(
+            f"{r['return']:>8.3f} {r['sharpe']:>7.2f} {r['max_drawdown']:>7.3f} "
+            f"{r['trades']:>7} {holdout}  {params}"
+        )
+    return "\n".join(lines)
+
+
+async def main(strategy: str, symbol: str, interval: str, search: str, samples: int):
+    try:
+        results = await sweep_symbol(symbol, strategy, interval, search=search, samples=samples)
+    finally:
+        await client_manager.CLIENT_MANAGER.close()
+    print(format_results(results))
+
+
+if __name__ == "__main__":
+    import env_loader  # noqa: F401
+    import logger_config  # noqa: F401
+
+    asyncio.run(
+        main(
+            sys.argv[1] if len(sys.argv) > 1 else "scalping",
+            sys.argv[2] if len(sys.argv) > 2 else "BTCUSDT",
+            sys.argv[3] if len(sys.argv) > 3 else "1h",
+            sys.argv[4] if len(sys.argv) > 4 else "grid",
+            int(sys.argv[5]) if len(sys.argv) > 5 else 100,
+        )
+    )
@@ -0,0 +1,155 @@
+"""Shared TTL cache for price lookups.
+
+``CachedClient`` wraps a Binance (or dummy) client and serves
+``get_avg_price`` and ``get_symbol_ticker`` from a ``PriceCache``. Each
+entry expires after the TTL configured for its kind of request, concurrent
+requests for the same key share one exchange call, and ``get_prices``
+fetches many symbols with a single bulk ticker request.
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PriceCache:
+    """TTL cache with request coalescing and hit/miss counters."""
+
+    def __init__(self, ttl: float = 2.0, ttls: dict = None):
+        self.ttl = ttl
+        # per kind TTLs, e.g. {"avg_price": 10.0, "price": 2.0}
+        self.ttls = dict(ttls or {})
+        self._entries = {}
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def ttl_for(self, key) -> float:
+        return self.ttls.get(key[0], self.ttl)
+
+    def peek(self, key):
+        """Return a fresh cached value or ``None`` without counting."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def put(self, key, value) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_for(key), value)
+
+    async def get(self, key, fetch):
+        """Return the cached value for ``key`` or await ``fetch()`` once for it."""
+        value = self.peek(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting.
+            future.exception()
+            raise
+        else:
+            self.put(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self._entries),
+        }
+
+
+# Cache shared by every wrapped client in the process.
+PRICE_CACHE = PriceCache(
+    ttl=float(os.getenv("PRICE_CACHE_TTL", "2")),
+    ttls={"avg_price": float(os.getenv("AVG_PRICE_CACHE_TTL", "10"))},
+)
+
+
+class CachedClient:
+    """Client wrapper that answers price requests from a ``PriceCache``."""
+
+    def __init__(self, client, cache: PriceCache = None):
+        self.__wrapped__ = client
+        self.cache = cache or PRICE_CACHE
+
+    def __getattr__(self, name):
+        return getattr(self.__wrapped__, name)
+
+    async def get_avg_price(self, symbol, **params):
+        return await self.cache.get(
+            ("avg_price", symbol),
+            lambda: self.__wrapped__.get_avg_price(symbol=symbol, **params),
+        )
+
+    async def get_symbol_ticker(self, symbol=None, **params):
+        if symbol is None:
+            tickers = await self._all_tickers()
+            return [{"symbol": s, "price": p} for s, p in tickers.items()]
+        price = await self.cache.get(
+            ("price", symbol), lambda: self._ticker_price(symbol, params)
+        )
+        return {"symbol": symbol, "price": price}
+
+    async def _ticker_price(self, symbol, params):
+        ticker = await self.__wrapped__.get_symbol_ticker(symbol=symbol, **params)
+        return ticker["price"]
+
+    async def _all_tickers(self) -> dict:
+        async def fetch():
+            tickers = await self.__wrapped__.get_symbol_ticker()
+            prices = {t["symbol"]: t["price"] for t in tickers}
+            for s, p in prices.items():
+                self.cache.put(("price", s), p)
+            return prices
+
+        return await self.cache.get(("all_tickers",), fetch)
+
+    async def get_prices(self, symbols) -> dict:
+        """Return ``{symbol: float price}``, using one bulk ticker call for misses.
+
+        Symbols the exchange does not list are left out.
+        """
+        prices = {}
+        missing = []
+        for symbol in symbols:
+            price = self.cache.peek(("price", symbol))
+            if price is None:
+                missing.append(symbol)
+            else:
+                self.cache.hits += 1
+                prices[symbol] = float(price)
+        if len(missing) == 1:
+            try:
+                ticker = await self.get_symbol_ticker(symbol=missing[0])
+                prices[missing[0]] = float(ticker["price"])
+            except Exception as e:
+                logger.debug("No ticker for %s: %s", missing[0], e)
+        elif missing:
+            tickers = await self._all_tickers()
+            for symbol in missing:
+                if symbol in tickers:
+                    prices[symbol] = float(tickers[symbol])
+        return prices
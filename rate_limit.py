@@ -0,0 +1,49 @@
+"""Token buckets for staying under Binance request limits."""
+
+import asyncio
+import os
+import time
+
+# Binance weight of one /api/v3/klines request.
+KLINE_REQUEST_WEIGHT = 2
+
+
+class TokenBucket:
+    """Bucket holding up to ``capacity`` tokens refilled over ``period`` seconds."""
+
+    def __init__(self, capacity: float, period: float):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take ``tokens`` if available without waiting."""
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def sync(self, used: float) -> None:
+        """Lower the available tokens to match ``used`` as reported by the exchange."""
+        self._refill()
+        self.tokens = min(self.tokens, max(self.capacity - used, 0.0))
+
+    async def acquire(self, tokens: float = 1) -> None:
+        """Wait until ``tokens`` are available and take them."""
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot acquire {tokens} tokens from a bucket of {self.capacity}")
+        while not self.try_acquire(tokens):
+            await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+# Share of the account's request weight that historical downloads may use.
+DOWNLOAD_WEIGHT = TokenBucket(
+    int(os.getenv("KLINE_DOWNLOAD_WEIGHT_PER_MINUTE", "1200")), 60
+)
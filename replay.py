@@ -0,0 +1,425 @@
+"""Accelerated replay of the live trading loop on recorded klines.
+
+``replay`` runs the bot as ``trading_tasks.start_trading`` does - the
+scheduler, the strategies' ``execute`` coroutines, the signal aggregator,
+the execution queue, the market data hub and the user data stream - against
+a ``ReplayClient``, a ``DummyClient`` whose klines and prices follow a kline
+history. It runs on an event loop driven by a ``VirtualClock``: whenever
+every task is waiting for a timer, the clock jumps to that timer instead of
+sleeping, and ``time.time`` and ``time.monotonic`` read the same clock. So
+``asyncio.sleep``, the scheduler's wall-clock boundaries and the rate limits
+all run on replayed time and a day of 1m candles replays in seconds.
+
+Every order placed and every Telegram message sent is recorded with the
+replayed time it happened at. Orders fill at the recorded prices: each
+candle is traded through (see ``sim_exchange.kline_path``) once it closes.
+"""
+
+import asyncio
+import contextlib
+import logging
+import math
+import os
+import selectors
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+from binance.helpers import interval_to_milliseconds
+
+import client_manager
+import data_training
+import kline_cache
+import ledger
+import trading_tasks
+from dummy_client import KLINE_ANCHOR_MS, DummyClient, kline_rows
+from price_cache import CachedClient, PriceCache
+from strategies import grid
+
+logger = logging.getLogger(__name__)
+
+# Chat ID the strategies' messages are addressed to during a replay.
+REPLAY_CHAT_ID = "replay"
+
+
+class VirtualClock:
+    """Replayed time shared by the event loop, ``time.time`` and ``time.monotonic``.
+
+    The event loop counts seconds since ``start``, where floats are fine
+    enough for its timer resolution, and ``time`` adds them to ``start``.
+    """
+
+    def __init__(self, start: float):
+        self.start = float(start)
+        self.elapsed = 0.0
+
+    def time(self) -> float:
+        return self.start + self.elapsed
+
+    def advance(self, seconds: float) -> None:
+        # always move forward, even by less than the float resolution
+        self.elapsed = max(self.elapsed + seconds, math.nextafter(self.elapsed, math.inf))
+
+    @contextlib.contextmanager
+    def patch(self):
+        """Make ``time.time`` and ``time.monotonic`` return the clock's time."""
+        with mock.patch.object(time, "time", self.time), mock.patch.object(
+            time, "monotonic", self.time
+        ):
+            yield self
+
+    def new_event_loop(self) -> asyncio.AbstractEventLoop:
+        return _VirtualEventLoop(self)
+
+    def run(self, coro):
+        """Run ``coro`` to completion on a virtual-time event loop, like ``asyncio.run``."""
+        loop = self.new_event_loop()
+        try:
+            with self.patch():
+                try:
+                    return loop.run_until_complete(coro)
+                finally:
+                    tasks = asyncio.all_tasks(loop)
+                    for task in tasks:
+                        task.cancel()
+                    if tasks:
+                        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+                    loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
+
+
+class _VirtualSelector:
+    """Selector that advances the clock instead of waiting for the next timer.
+
+    I/O that is ready is still reported first. With no timer pending it
+    waits for real I/O, e.g. work handed to a thread; such work runs in
+    real time while the replay keeps advancing.
+    """
+
+    def __init__(self, clock: VirtualClock):
+        self._clock = clock
+        self._selector = selectors.DefaultSelector()
+
+    def select(self, timeout=None):
+        events = self._selector.select(0)
+        if events or timeout == 0:
+            return events
+        if timeout is None:
+            return self._selector.select(None)
+        self._clock.advance(timeout)
+        return []
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+class _VirtualEventLoop(asyncio.SelectorEventLoop):
+    def __init__(self, clock: VirtualClock):
+        super().__init__(_VirtualSelector(clock))
+        self._virtual_clock = clock
+
+    def time(self) -> float:
+        return self._virtual_clock.elapsed
+
+
+def kline_arrays(klines) -> dict:
+    """Every ``kline_cache.COLUMNS`` array of a kline history, times in int64 ms.
+
+    ``klines`` may be the frame ``fetch_historical_data`` returns, a column
+    dict from ``KlineStore.read`` or ``DummyClient.klines`` or REST rows.
+    """
+    if isinstance(klines, dict) or hasattr(klines, "columns"):
+        columns = {name: np.asarray(klines[name]) for name in kline_cache.COLUMNS}
+    else:
+        columns = data_training.decode_klines(klines)
+    for name in ("open_time", "close_time"):
+        if np.issubdtype(columns[name].dtype, np.datetime64):
+            columns[name] = columns[name].astype("datetime64[ms]").view(np.int64)
+    return {
+        name: columns[name].astype(dtype, copy=False)
+        for name, dtype in kline_cache.COLUMNS.items()
+    }
+
+
+def resample_klines(columns: dict, interval: str) -> dict:
+    """Combine consecutive candles into candles of the longer ``interval``."""
+    step = interval_to_milliseconds(interval)
+    slot = (columns["open_time"] - KLINE_ANCHOR_MS) // step
+    starts = np.flatnonzero(np.diff(slot, prepend=slot[:1] - 1)) if len(slot) else slot
+    ends = np.append(starts[1:], len(slot)) - 1
+    open_time = KLINE_ANCHOR_MS + slot[starts] * step
+    out = {
+        "open_time": open_time,
+        "open": columns["open"][starts],
+        "high": np.maximum.reduceat(columns["high"], starts) if len(starts) else columns["high"],
+        "low": np.minimum.reduceat(columns["low"], starts) if len(starts) else columns["low"],
+        "close": columns["close"][ends],
+        "close_time": open_time + (step - 1),
+    }
+    for name in kline_cache.COLUMNS:
+        if name not in out:
+            values = columns[name]
+            out[name] = np.add.reduceat(values, starts) if len(starts) else values
+    return {name: out[name].astype(dtype, copy=False) for name, dtype in kline_cache.COLUMNS.items()}
+
+
+class ReplayClient(DummyClient):
+    """``DummyClient`` serving recorded klines instead of synthetic ones.
+
+    ``history`` maps symbols to klines of ``interval`` (anything
+    ``kline_arrays`` accepts, assumed gap-free); longer intervals are
+    resampled from them. Symbols without a history keep synthetic candles.
+    The kline endpoints only show what is known at ``time.time()``: the
+    candle still open is built from the candles of ``interval`` that have
+    closed, up to the current price.
+    """
+
+    def __init__(self, history: dict, interval: str = "1m", **kwargs):
+        super().__init__(**kwargs)
+        self.interval = interval
+        self.history = {symbol: kline_arrays(klines) for symbol, klines in history.items()}
+        self._resampled = {}
+        for symbol, columns in self.history.items():
+            if len(columns["close"]):
+                self.prices[symbol] = float(columns["open"][0])
+
+    def recorded(self, symbol: str, interval: str):
+        """The recorded candles of ``symbol`` in ``interval``, or ``None``."""
+        columns = self.history.get(symbol)
+        if columns is None or interval == self.interval:
+            return columns
+        key = (symbol, interval)
+        if key not in self._resampled:
+            self._resampled[key] = resample_klines(columns, interval)
+        return self._resampled[key]
+
+    def klines(self, symbol, interval, first_open, count, arrays=False):
+        """Return ``count`` recorded candles from the one open at ``first_open``."""
+        columns = self.recorded(symbol, interval)
+        if columns is None:
+            return super().klines(symbol, interval, first_open, count, arrays=arrays)
+        first = max(int(np.searchsorted(columns["open_time"], first_open, side="right")) - 1, 0)
+        data = {name: values[first : first + max(int(count), 0)] for name, values in columns.items()}
+        return data if arrays else kline_rows(data)
+
+    def _as_of_now(self, symbol, interval, data: dict) -> dict:
+        """Replace the still-open last candle of ``data`` by what is known of it now."""
+        base = self.history.get(symbol)
+        now = int(time.time() * 1000)
+        if base is None or not len(data["open_time"]) or data["close_time"][-1] < now:
+            return data
+        data = {name: values.copy() for name, values in data.items()}
+        lo = int(np.searchsorted(base["open_time"], data["open_time"][-1], side="left"))
+        hi = int(np.searchsorted(base["close_time"], now, side="left"))
+        price = self.prices.get(symbol, float(data["open"][-1]))
+        if hi > lo:
+            closed = {name: values[lo:hi] for name, values in base.items()}
+            data["open"][-1] = closed["open"][0]
+            data["high"][-1] = max(closed["high"].max(), price)
+            data["low"][-1] = min(closed["low"].min(), price)
+            for name in ("volume", "quote_asset_volume", "number_of_trades", "taker_buy_base", "taker_buy_quote"):
+                data[name][-1] = closed[name].sum()
+        else:
+            for name in ("open", "high", "low"):
+                data[name][-1] = price
+            for name in ("volume", "quote_asset_volume", "number_of_trades", "taker_buy_base", "taker_buy_quote"):
+                data[name][-1] = 0
+        data["close"][-1] = price
+        return data
+
+    async def get_historical_klines(
+        self, symbol, interval, lookback, end_str=None, limit=None, arrays=False
+    ):
+        data = await super().get_historical_klines(
+            symbol, interval, lookback, end_str, limit, arrays=True
+        )
+        data = self._as_of_now(symbol, interval, data)
+        return data if arrays else kline_rows(data)
+
+    async def get_klines(
+        self, symbol, interval, startTime=None, endTime=None, limit=500, arrays=False
+    ):
+        data = await super().get_klines(symbol, interval, startTime, endTime, limit, arrays=True)
+        data = self._as_of_now(symbol, interval, data)
+        return data if arrays else kline_rows(data)
+
+
+class RecordingBot:
+    """Telegram bot stand-in keeping every message with its replayed time."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.messages.append(
+            dict(kwargs, time=int(time.time() * 1000), chat_id=chat_id, text=text)
+        )
+
+
+async def _drive_prices(client: ReplayClient, symbol: str, first: int, stop: int, counter: list):
+    """Trade ``symbol`` through each recorded candle as it closes."""
+    columns = client.history[symbol]
+    rows = np.column_stack(
+        [columns[name] for name in ("open_time", "open", "high", "low", "close", "volume")]
+    )[first:stop].tolist()
+    for close_time, row in zip(columns["close_time"][first:stop].tolist(), rows):
+        delay = (close_time + 1) / 1000 - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        client.replay_kline(symbol, row)
+        counter[0] += 1
+
+
+async def _run(client: ReplayClient, start_ms: int, end_ms: int) -> dict:
+    symbols = list(client.history)
+    counter = [0]
+    for symbol in symbols:
+        columns = client.history[symbol]
+        first = int(np.searchsorted(columns["open_time"], start_ms, side="left"))
+        # the market as it was when the replay starts
+        if first:
+            client.set_price(symbol, float(columns["close"][first - 1]))
+    trading = await trading_tasks.start_trading()
+    # training would fit the weights on the very history being replayed
+    trading_tasks.SCHEDULER.pause("weight_training")
+    drivers = []
+    for symbol in symbols:
+        columns = client.history[symbol]
+        first = int(np.searchsorted(columns["open_time"], start_ms, side="left"))
+        stop = int(np.searchsorted(columns["close_time"], end_ms, side="right"))
+        drivers.append(asyncio.create_task(_drive_prices(client, symbol, first, stop, counter)))
+    try:
+        await asyncio.sleep(max(end_ms / 1000 - time.time(), 0))
+        await asyncio.gather(*drivers)
+    finally:
+        jobs = trading_tasks.SCHEDULER.jobs()
+        execution = dict(trading_tasks.BINANCE_CLIENT.stats)
+        await trading_tasks.stop_trading()
+        await asyncio.gather(trading, return_exceptions=True)
+    return {"candles": counter[0], "jobs": jobs, "execution": execution}
+
+
+def replay(
+    history: dict,
+    interval: str = "1m",
+    start_ms: int = None,
+    end_ms: int = None,
+    start_balance: float = 1_000_000.0,
+    config: dict = None,
+) -> dict:
+    """Replay the trading loop on ``history`` and return what it did.
+
+    ``history`` maps symbols to their recorded klines of ``interval``, which
+    are traded from ``start_ms`` (default: the first candle) until
+    ``end_ms`` (default: the last candle's close); candles before
+    ``start_ms`` are the history the strategies see when they start.
+    ``config`` overrides ``trading_tasks.CONFIG`` entries for the replay.
+
+    Returns the replayed ``candles``, the wall-clock ``seconds`` taken,
+    ``candles_per_second`` and ``speedup`` (replayed per wall-clock
+    second), every ``orders`` placed (REST format, final status), the
+    ``fills`` count, the Telegram ``messages``, final ``balances``,
+    ``equity`` in USDT and the scheduler's ``jobs`` statistics. Must not be
+    called from a running event loop.
+    """
+    client = ReplayClient(history, interval, start_balance=start_balance)
+    times = [c["open_time"] for c in client.history.values() if len(c["open_time"])]
+    closes = [c["close_time"] for c in client.history.values() if len(c["close_time"])]
+    if not times:
+        raise ValueError("No klines to replay")
+    if start_ms is None:
+        start_ms = min(int(t[0]) for t in times)
+    if end_ms is None:
+        end_ms = max(int(t[-1]) for t in closes) + 1
+    bot = RecordingBot()
+    manager = client_manager.ClientManager()
+    # its own price cache: entries would outlive the replay's clock
+    manager.set(CachedClient(client, PriceCache()))
+    clock = VirtualClock(start_ms / 1000)
+    with contextlib.ExitStack() as stack:
+        directory = stack.enter_context(tempfile.TemporaryDirectory())
+        stack.enter_context(mock.patch.object(client_manager, "CLIENT_MANAGER", manager))
+        stack.enter_context(
+            mock.patch.object(
+                ledger, "LEDGER", ledger.PositionLedger(os.path.join(directory, "ledger.json"))
+            )
+        )
+        stack.enter_context(mock.patch.dict(grid.ENGINES, clear=True))
+        stack.enter_context(
+            mock.patch.dict(trading_tasks.CONFIG, dict(config or {}, symbols=list(client.history)))
+        )
+        stack.enter_context(
+            mock.patch.multiple(
+                trading_tasks,
+                TELEGRAM_BOT=bot,
+                TELEGRAM_CHAT_ID=REPLAY_CHAT_ID,
+                TRADING_WORKERS=0,
+                BINANCE_CLIENT=None,
+                MARKET_DATA=None,
+                INDICATOR_ENGINE=None,
+                USER_STREAM=None,
+                SIGNALS=None,
+                SCHEDULER=None,
+            )
+        )
+        started = time.perf_counter()
+        result = clock.run(_run(client, start_ms, end_ms))
+        seconds = time.perf_counter() - started
+    equity = client.balances["USDT"]["free"] + client.balances["USDT"]["locked"]
+    for asset, balance in client.balances.items():
+        if asset != "USDT":
+            equity += (balance["free"] + balance["locked"]) * client.prices.get(asset + "USDT", 0.0)
+    result.update(
+        seconds=seconds,
+        candles_per_second=result["candles"] / seconds if seconds else 0.0,
+        speedup=(end_ms - start_ms) / 1000 / seconds if seconds else 0.0,
+        orders=list(client.orders.values()),
+        fills=len(client.trade_store),
+        messages=bot.messages,
+        balances={asset: dict(b) for asset, b in client.balances.items()},
+        equity=equity,
+    )
+    return result
+
+
+def main(days: float, interval: str, warmup_days: float) -> None:
+    """Replay the last ``days`` of the kline cache for ``CONFIG["symbols"]``."""
+    store = kline_cache.KlineStore()
+    history = {}
+    for symbol in trading_tasks.CONFIG["symbols"]:
+        columns = store.read(symbol, interval)
+        if not len(columns["open_time"]):
+            logger.warning("No %s %s klines in %s, replaying synthetic ones", symbol, interval, store.root)
+            step = interval_to_milliseconds(interval)
+            count = int((days + warmup_days) * 86_400_000 // step)
+            columns = DummyClient().klines(
+                symbol, interval, KLINE_ANCHOR_MS - count * step, count, arrays=True
+            )
+        history[symbol] = columns
+    end_ms = max(int(c["close_time"][-1]) for c in history.values()) + 1
+    start_ms = end_ms - int(days * 86_400_000)
+    result = replay(history, interval, start_ms, end_ms)
+    print(
+        f"Replayed {result['candles']:,} {interval} candles in {result['seconds']:.2f}s: "
+        f"{result['candles_per_second']:,.0f} candles/s, {result['speedup']:,.0f}x real time"
+    )
+    print(
+        f"{len(result['orders'])} orders, {result['fills']} fills, "
+        f"{len(result['messages'])} messages, equity {result['equity']:.2f} USDT"
+    )
+
+
+if __name__ == "__main__":
+    import env_loader  # noqa: F401
+    import logger_config  # noqa: F401
+
+    # strategies log every run; keep the replay's output to the summary
+    logging.getLogger().setLevel(logging.WARNING)
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 1.0,
+        sys.argv[2] if len(sys.argv) > 2 else "1m",
+        float(sys.argv[3]) if len(sys.argv) > 3 else 30.0,
+    )
@@ -0,0 +1,227 @@
+"""Wall-clock job scheduler for the trading loops.
+
+Jobs run at fixed boundaries (multiples of their interval since the epoch,
+plus an optional offset), so runs do not drift by the time each execution
+takes and hourly jobs fire right after an hourly candle closes. A single
+heap-ordered loop drives every job; jobs can be paused, re-timed while
+running and inspected through :meth:`Scheduler.jobs`.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """A coroutine function run periodically by a ``Scheduler``."""
+
+    def __init__(
+        self,
+        name: str,
+        func,
+        interval,
+        align: bool = True,
+        offset: float = 0.0,
+        jitter: float = 0.0,
+        max_concurrency: int = 1,
+        skip_if_running: bool = True,
+    ):
+        self.name = name
+        self.func = func
+        # seconds, or a callable returning seconds (read before every run)
+        self._interval = interval
+        self.align = align
+        self.offset = offset
+        self.jitter = jitter
+        self.max_concurrency = max_concurrency
+        self.skip_if_running = skip_if_running
+        self.paused = False
+        self.next_run = None
+        self.last_run = None
+        self.last_duration = None
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.running = 0
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._version = 0
+
+    @property
+    def interval(self) -> float:
+        value = self._interval() if callable(self._interval) else self._interval
+        return float(value)
+
+    def following(self, after: float) -> float:
+        """Return the first run time strictly after ``after`` (without jitter)."""
+        interval = self.interval
+        if self.align:
+            k = math.floor((after - self.offset) / interval) + 1
+            return self.offset + k * interval
+        return after + interval
+
+    def info(self) -> dict:
+        return {
+            "name": self.name,
+            "interval": self.interval,
+            "next_run": self.next_run,
+            "last_run": self.last_run,
+            "last_duration": self.last_duration,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "running": self.running,
+            "paused": self.paused,
+        }
+
+
+class Scheduler:
+    """Runs ``Job`` objects at drift-free wall-clock boundaries."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._wakeup = None
+        self._running = set()
+        self._task = None
+
+    def add_job(
+        self, name: str, func, interval, run_immediately: bool = False, **options
+    ) -> Job:
+        """Register ``func`` (a coroutine function) to run every ``interval`` s.
+
+        ``options`` are passed to :class:`Job`. With ``run_immediately`` the
+        first run happens right away instead of at the next boundary.
+        """
+        if name in self._jobs:
+            raise ValueError(f"Job {name!r} already exists")
+        job = Job(name, func, interval, **options)
+        self._jobs[name] = job
+        now = time.time()
+        first = now if run_immediately else self._with_jitter(job, job.following(now))
+        self._schedule(job, first)
+        return job
+
+    def remove_job(self, name: str) -> None:
+        job = self._jobs.pop(name)
+        job._version += 1
+        self._notify()
+
+    def set_interval(self, name: str, interval) -> None:
+        """Change a job's interval and reschedule its next run."""
+        job = self._jobs[name]
+        job._interval = interval
+        now = time.time()
+        last = job.last_run if job.last_run is not None else now
+        self._schedule(job, self._with_jitter(job, max(job.following(last), now)))
+
+    def pause(self, name: str) -> None:
+        self._jobs[name].paused = True
+
+    def resume(self, name: str) -> None:
+        self._jobs[name].paused = False
+
+    def jobs(self) -> list:
+        """Return run statistics and the next run time of every job."""
+        return [job.info() for job in self._jobs.values()]
+
+    def _with_jitter(self, job: Job, when: float) -> float:
+        return when + (random.uniform(0, job.jitter) if job.jitter else 0.0)
+
+    def _schedule(self, job: Job, when: float) -> None:
+        job._version += 1
+        job.next_run = when
+        heapq.heappush(self._heap, (when, next(self._counter), job, job._version))
+        self._notify()
+
+    def _notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _sleep_until(self, when) -> None:
+        """Sleep until ``when`` or until the schedule changes."""
+        self._wakeup.clear()
+        waiter = asyncio.ensure_future(self._wakeup.wait())
+        sleeper = None
+        if when is not None:
+            sleeper = asyncio.ensure_future(asyncio.sleep(max(when - time.time(), 0)))
+        try:
+            await asyncio.wait(
+                [t for t in (waiter, sleeper) if t is not None],
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            for task in (waiter, sleeper):
+                if task is not None:
+                    task.cancel()
+
+    async def _execute(self, job: Job, scheduled: float) -> None:
+        try:
+            async with job._slots:
+                started = time.time()
+                job.last_run = started
+                if started - scheduled > 1:
+                    logger.debug(
+                        "Job %s started %.1fs late", job.name, started - scheduled
+                    )
+                try:
+                    await job.func()
+                    job.runs += 1
+                except Exception as e:
+                    job.failures += 1
+                    logger.exception("Job %s failed: %s", job.name, e)
+                finally:
+                    job.last_duration = time.time() - started
+        finally:
+            job.running -= 1
+
+    def _launch(self, job: Job, scheduled: float) -> None:
+        if job.paused:
+            return
+        if job.skip_if_running and job.running >= job.max_concurrency:
+            job.skipped += 1
+            logger.warning("Skipping %s: previous run still in progress", job.name)
+            return
+        # counted from launch so queued runs also block skip-if-running jobs
+        job.running += 1
+        task = asyncio.create_task(self._execute(job, scheduled))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def run(self) -> None:
+        """Run jobs until cancelled or :meth:`stop` is called."""
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.current_task()
+        try:
+            while True:
+                if not self._heap:
+                    await self._sleep_until(None)
+                    continue
+                when, _, job, version = self._heap[0]
+                if version != job._version or self._jobs.get(job.name) is not job:
+                    heapq.heappop(self._heap)  # superseded entry
+                    continue
+                if when > time.time():
+                    await self._sleep_until(when)
+                    continue
+                heapq.heappop(self._heap)
+                self._launch(job, when)
+                # Boundaries after ``now`` only: missed runs are not replayed.
+                following = job.following(max(when, time.time()))
+                self._schedule(job, self._with_jitter(job, following))
+        finally:
+            for task in list(self._running):
+                task.cancel()
+            self._wakeup = None
+            self._task = None
+
+    def stop(self) -> None:
+        """Cancel :meth:`run` and every job still executing."""
+        if self._task is not None:
+            self._task.cancel()
@@ -0,0 +1,325 @@
+"""Price-time-priority matching engine for the simulated exchange.
+
+``SimExchange`` keeps an ``OrderBook`` per symbol. Resting limit orders are
+queued per price level, and the best level of each side is found through a
+heap of prices, so placing, cancelling and matching an order touch only the
+levels involved instead of every open order. Incoming orders are matched:
+
+* against resting orders of other owners, best price first and oldest first
+  at a price (an owner's orders never trade with each other);
+* then against the outside market at the symbol's last price, which
+  ``tick`` and ``replay_kline`` drive. A tick at price ``p`` is an outside
+  trade: bids at or above ``p`` and asks at or below it fill at their own
+  limit price, up to the tick's quantity, so orders can fill partially.
+
+Fills are reported to each order's owner as ``owner.on_fill(order, quantity,
+price, maker)``; balances and fees are kept by the owner (``DummyClient``).
+"""
+
+import heapq
+import itertools
+from collections import deque
+
+# Quantities below this count as zero.
+EPSILON = 1e-12
+
+
+def kline_path(kline) -> list:
+    """``(price, quantity)`` ticks through a kline row: open, the nearer
+    extreme, the other, close.
+
+    The candle's volume is split evenly between the four ticks.
+    """
+    open_, high, low, close, volume = (float(v) for v in kline[1:6])
+    path = (open_, low, high, close) if close >= open_ else (open_, high, low, close)
+    return [(price, volume / 4 if volume else None) for price in path]
+
+
+class Order:
+    """An order known to the matching engine."""
+
+    __slots__ = (
+        "order_id",
+        "symbol",
+        "side",
+        "type",
+        "price",
+        "quantity",
+        "filled",
+        "owner",
+        "status",
+    )
+
+    def __init__(self, order_id, symbol, side, type_, quantity, price=None, owner=None):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.type = type_
+        self.price = price
+        self.quantity = quantity
+        self.filled = 0.0
+        self.owner = owner
+        self.status = "NEW"
+
+    @property
+    def remaining(self) -> float:
+        return self.quantity - self.filled
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("NEW", "PARTIALLY_FILLED")
+
+
+class BookSide:
+    """Resting orders of one side of a book, in price-time priority."""
+
+    def __init__(self, bids: bool):
+        # heap keys: -price for bids so the best price is always on top
+        self.sign = -1 if bids else 1
+        self.levels = {}
+        # active orders per level; cancelled orders stay queued until reached
+        self.live = {}
+        self._heap = []
+        self._in_heap = set()
+
+    def __len__(self) -> int:
+        return sum(self.live.values())
+
+    def add(self, order: Order) -> None:
+        price = order.price
+        level = self.levels.get(price)
+        if level is None:
+            level = self.levels[price] = deque()
+            self.live[price] = 0
+            if price not in self._in_heap:
+                self._in_heap.add(price)
+                heapq.heappush(self._heap, self.sign * price)
+        level.append(order)
+        self.live[price] += 1
+
+    def discard(self, order: Order) -> None:
+        """Forget a cancelled or filled order of this side."""
+        price = order.price
+        self.live[price] -= 1
+        if self.live[price] == 0:
+            # the heap entry goes stale and is dropped when it reaches the top
+            del self.levels[price]
+            del self.live[price]
+
+    def best(self):
+        while self._heap:
+            price = self.sign * self._heap[0]
+            if price in self.levels:
+                return price
+            heapq.heappop(self._heap)
+            self._in_heap.discard(price)
+        return None
+
+    def crosses(self, price, limit) -> bool:
+        """Whether a resting ``price`` is acceptable to a taker's ``limit``."""
+        return limit is None or self.sign * price <= self.sign * limit
+
+    def take(self, quantity, limit, owner, fills) -> float:
+        """Fill up to ``quantity`` from resting orders at prices within ``limit``.
+
+        Appends ``(order, quantity, price)`` to ``fills`` and returns the
+        quantity left. Orders of ``owner`` are skipped.
+        """
+        skipped = []
+        while quantity > EPSILON:
+            price = self.best()
+            if price is None or not self.crosses(price, limit):
+                break
+            level = self.levels[price]
+            kept = []
+            while level and quantity > EPSILON:
+                order = level.popleft()
+                if not order.active:
+                    continue
+                if owner is not None and order.owner is owner:
+                    kept.append(order)
+                    continue
+                qty = min(quantity, order.remaining)
+                order.filled += qty
+                quantity -= qty
+                fills.append((order, qty, price))
+                if order.remaining > EPSILON:
+                    order.status = "PARTIALLY_FILLED"
+                    kept.append(order)
+                else:
+                    order.status = "FILLED"
+                    self.live[price] -= 1
+            level.extendleft(reversed(kept))
+            if self.live[price] == 0:
+                del self.levels[price]
+                del self.live[price]
+            elif quantity > EPSILON:
+                # only the owner's own orders are left at this price
+                skipped.append(heapq.heappop(self._heap))
+        for key in skipped:
+            heapq.heappush(self._heap, key)
+        return quantity
+
+    def depth(self, limit: int) -> list:
+        """``[price, quantity]`` of the best ``limit`` levels."""
+        prices = sorted(self.levels, key=lambda p: self.sign * p)[:limit]
+        return [
+            [price, sum(o.remaining for o in self.levels[price] if o.active)]
+            for price in prices
+        ]
+
+
+class OrderBook:
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = BookSide(bids=True)
+        self.asks = BookSide(bids=False)
+
+    def side(self, side: str) -> BookSide:
+        return self.bids if side == "BUY" else self.asks
+
+    def opposite(self, side: str) -> BookSide:
+        return self.asks if side == "BUY" else self.bids
+
+
+class SimExchange:
+    """Order books for every symbol plus the outside market's last prices."""
+
+    def __init__(self, prices: dict = None):
+        # last traded price per symbol, shared with the clients' tickers
+        self.prices = prices if prices is not None else {}
+        self.books = {}
+        self.orders = {}
+        self._order_ids = itertools.count(1)
+        self._trade_ids = itertools.count(1)
+        self.stats = {"orders": 0, "cancels": 0, "ticks": 0, "fills": 0}
+
+    def book(self, symbol: str) -> OrderBook:
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol)
+        return book
+
+    def next_trade_id(self) -> int:
+        return next(self._trade_ids)
+
+    def new_order(self, symbol, side, type_, quantity, price=None, owner=None) -> Order:
+        """Create an order; it takes part in matching once ``submit`` is called."""
+        order = Order(
+            next(self._order_ids),
+            symbol,
+            side,
+            type_,
+            float(quantity),
+            None if price is None else float(price),
+            owner,
+        )
+        self.orders[order.order_id] = order
+        return order
+
+    def restore_order(
+        self, order_id, symbol, side, type_, quantity, price, filled=0.0, owner=None
+    ) -> Order:
+        """Put a previously open order back on the book without matching it."""
+        order = Order(order_id, symbol, side, type_, quantity, price, owner)
+        order.filled = filled
+        order.status = "PARTIALLY_FILLED" if filled > EPSILON else "NEW"
+        self.orders[order_id] = order
+        self.book(symbol).side(side).add(order)
+        return order
+
+    def reserve_ids(self, last_order_id: int, last_trade_id: int) -> None:
+        """Make sure new order and trade ids come after the given ones."""
+        self._order_ids = itertools.count(max(next(self._order_ids), last_order_id + 1))
+        self._trade_ids = itertools.count(max(next(self._trade_ids), last_trade_id + 1))
+
+    def submit(self, order: Order) -> Order:
+        """Match ``order``; a limit order's remainder rests on the book."""
+        self.stats["orders"] += 1
+        book = self.book(order.symbol)
+        fills = []
+        remaining = book.opposite(order.side).take(
+            order.remaining, order.price, order.owner, fills
+        )
+        taker = [(order, qty, price) for _, qty, price in fills]
+        if fills:
+            self.prices[order.symbol] = fills[-1][2]
+        last = self.prices.get(order.symbol)
+        if (
+            remaining > EPSILON
+            and last is not None
+            and book.opposite(order.side).crosses(last, order.price)
+        ):
+            # the outside market takes the rest at the last price
+            taker.append((order, remaining, last))
+            remaining = 0.0
+        order.filled = order.quantity - remaining
+        if remaining <= EPSILON:
+            order.status = "FILLED"
+        elif order.type == "LIMIT":
+            order.status = "PARTIALLY_FILLED" if order.filled > EPSILON else "NEW"
+            book.side(order.side).add(order)
+        else:
+            order.status = "EXPIRED"
+        if not order.active:
+            self.orders.pop(order.order_id, None)
+        self._report(fills, maker=True)
+        self._report(taker, maker=False)
+        return order
+
+    def cancel(self, order: Order) -> bool:
+        """Cancel a resting order; returns False if it is no longer open."""
+        if not order.active:
+            return False
+        self.stats["cancels"] += 1
+        order.status = "CANCELED"
+        self.book(order.symbol).side(order.side).discard(order)
+        self.orders.pop(order.order_id, None)
+        return True
+
+    def withdraw(self, owner) -> int:
+        """Take every open order of ``owner`` off the books without reporting it.
+
+        Used when an account's orders are replaced wholesale (a restore);
+        returns how many orders were removed.
+        """
+        orders = [o for o in self.orders.values() if o.owner is owner]
+        for order in orders:
+            if order.active:
+                self.book(order.symbol).side(order.side).discard(order)
+            order.status = "CANCELED"
+            self.orders.pop(order.order_id, None)
+        return len(orders)
+
+    def tick(self, symbol: str, price: float, quantity: float = None) -> None:
+        """Record an outside trade at ``price`` and fill the orders it crosses.
+
+        ``quantity`` caps the volume filled on each side of the book; without
+        it every crossing order fills completely.
+        """
+        self.stats["ticks"] += 1
+        price = float(price)
+        self.prices[symbol] = price
+        book = self.books.get(symbol)
+        if book is None:
+            return
+        budget = float("inf") if quantity is None else float(quantity)
+        fills = []
+        # an outside seller at ``price`` reaches bids at or above it, and
+        # an outside buyer reaches asks at or below it
+        book.bids.take(budget, price, None, fills)
+        book.asks.take(budget, price, None, fills)
+        self._report(fills, maker=True)
+
+    def replay_kline(self, symbol: str, kline) -> None:
+        """Tick through a kline row along ``kline_path``."""
+        for price, quantity in kline_path(kline):
+            self.tick(symbol, price, quantity)
+
+    def _report(self, fills, maker: bool) -> None:
+        for order, qty, price in fills:
+            if not order.active:
+                self.orders.pop(order.order_id, None)
+            self.stats["fills"] += 1
+            if order.owner is not None:
+                order.owner.on_fill(order, qty, price, maker)
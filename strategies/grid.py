@@ -2,12 +2,221 @@
 Grid trading strategy.
 
 Grid trading places a series of buy and sell orders at predefined price intervals to profit from market fluctuations within a range.
+
+``GridEngine`` keeps the grid's open orders in an index keyed by price level
+and, on every run, sends only the cancels and placements needed to turn the
+current orders into the target grid. Orders that are already right keep
+their place in the order book. Fills and cancels arrive through the user
+data stream (see ``handle_user_event``) instead of polling open orders.
 """
 
+import asyncio
 import logging
+import uuid
+
+from user_stream import STREAM_CONNECTED
 
 logger = logging.getLogger(__name__)
 
+# Client order ID prefix marking orders that belong to the grid.
+ORDER_PREFIX = "grid_"
+# Resting orders whose size is within this fraction of the target are kept.
+QUANTITY_TOLERANCE = 0.05
+# Order statuses after which an order is no longer on the book.
+CLOSED_STATUSES = {"FILLED", "CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH"}
+
+
+def grid_levels(lower: float, upper: float, levels: int, tick_size: float = 0.01) -> list:
+    """Return ``levels`` prices from ``lower`` to ``upper`` rounded to ``tick_size``."""
+    if levels < 2:
+        return [round(round(lower / tick_size) * tick_size, 8)]
+    step = (upper - lower) / (levels - 1)
+    return sorted(
+        {round(round((lower + i * step) / tick_size) * tick_size, 8) for i in range(levels)}
+    )
+
+
+def target_orders(prices, current_price: float) -> dict:
+    """Map each grid price to the side it should be quoted on.
+
+    Levels below ``current_price`` hold buys and levels above hold sells. The
+    level closest to the current price stays empty so a filled buy is
+    followed by a sell one level higher and vice versa.
+    """
+    if not prices:
+        return {}
+    nearest = min(prices, key=lambda p: abs(p - current_price))
+    return {
+        price: "BUY" if price < current_price else "SELL"
+        for price in prices
+        if price != nearest
+    }
+
+
+def diff_orders(orders: dict, targets: dict, quantity: float):
+    """Return ``(cancels, places)`` turning ``orders`` into ``targets``.
+
+    ``orders`` is the index ``{price: order}``; ``cancels`` lists orders to
+    cancel and ``places`` lists ``(price, side)`` pairs to place.
+    """
+    cancels = [
+        order
+        for price, order in orders.items()
+        if targets.get(price) != order["side"]
+        or not _same_quantity(order["quantity"], quantity)
+    ]
+    replaced = {order["price"] for order in cancels}
+    places = [
+        (price, side)
+        for price, side in targets.items()
+        if price not in orders or price in replaced
+    ]
+    return cancels, places
+
+
+def _same_quantity(current: float, target: float) -> bool:
+    if target == 0:
+        return current == 0
+    return abs(current - target) <= QUANTITY_TOLERANCE * target
+
+
+class GridEngine:
+    """Open grid orders of one symbol, indexed by price level."""
+
+    def __init__(self, client, symbol: str, tick_size: float = 0.01):
+        self.client = client
+        self.symbol = symbol
+        self.tick_size = tick_size
+        # price level -> {"orderId", "clientOrderId", "side", "price", "quantity"}
+        self.orders = {}
+        self._by_id = {}
+        # orders that closed before their placement call returned
+        self._closed_early = set()
+        self.synced = False
+        self.stats = {"placed": 0, "cancelled": 0, "filled": 0}
+
+    def _key(self, price) -> float:
+        return round(round(float(price) / self.tick_size) * self.tick_size, 8)
+
+    def _add(self, order: dict) -> None:
+        price = self._key(order["price"])
+        entry = {
+            "orderId": order["orderId"],
+            "clientOrderId": order["clientOrderId"],
+            "side": order["side"],
+            "price": price,
+            "quantity": float(order["origQty"]),
+        }
+        self.orders[price] = entry
+        self._by_id[entry["orderId"]] = entry
+
+    def _remove(self, order_id) -> dict:
+        entry = self._by_id.pop(order_id, None)
+        if entry is not None and self.orders.get(entry["price"]) is entry:
+            del self.orders[entry["price"]]
+        return entry
+
+    async def sync(self) -> None:
+        """Rebuild the index from the exchange's open orders."""
+        open_orders = await self.client.get_open_orders(symbol=self.symbol)
+        self.orders.clear()
+        self._by_id.clear()
+        for order in open_orders:
+            if str(order.get("clientOrderId", "")).startswith(ORDER_PREFIX):
+                self._add(order)
+        self.synced = True
+        logger.info("Synced %d open %s grid orders", len(self.orders), self.symbol)
+
+    def on_execution_report(self, event: dict) -> None:
+        """Update the index from an ``executionReport`` user data event."""
+        if not str(event.get("c", "")).startswith(ORDER_PREFIX):
+            return
+        if event.get("X") not in CLOSED_STATUSES:
+            return
+        order_id = event["i"]
+        if self._remove(order_id) is None:
+            self._closed_early.add(order_id)
+        if event["X"] == "FILLED":
+            self.stats["filled"] += 1
+            logger.info(
+                "Grid %s %s filled at %s", self.symbol, event.get("S"), event.get("p")
+            )
+
+    async def _cancel(self, entry: dict) -> None:
+        try:
+            await self.client.cancel_order(symbol=self.symbol, orderId=entry["orderId"])
+            self.stats["cancelled"] += 1
+        except Exception as e:
+            # most likely filled or cancelled in the meantime
+            logger.debug("Could not cancel %s order %s: %s", self.symbol, entry["orderId"], e)
+        self._remove(entry["orderId"])
+
+    async def _place(self, price: float, side: str, quantity: float) -> None:
+        place = self.client.order_limit_buy if side == "BUY" else self.client.order_limit_sell
+        try:
+            order = await place(
+                symbol=self.symbol,
+                quantity=quantity,
+                price=f"{price:.8f}",
+                timeInForce="GTC",
+                newClientOrderId=f"{ORDER_PREFIX}{uuid.uuid4().hex[:24]}",
+            )
+        except Exception as e:
+            logger.warning("Failed to place %s grid %s at %s: %s", self.symbol, side, price, e)
+            return
+        self.stats["placed"] += 1
+        if order["orderId"] in self._closed_early:
+            self._closed_early.discard(order["orderId"])
+        elif order.get("status", "NEW") not in CLOSED_STATUSES:
+            self._add(order)
+
+    async def reconcile(
+        self, lower: float, upper: float, levels: int, quantity: float, current_price: float
+    ):
+        """Send the minimal cancels and placements for the target grid.
+
+        Returns the number of orders cancelled and placed.
+        """
+        if not self.synced:
+            await self.sync()
+        targets = {}
+        if quantity > 0:
+            targets = target_orders(
+                grid_levels(lower, upper, levels, self.tick_size), current_price
+            )
+        cancels, places = diff_orders(self.orders, targets, quantity)
+        # Cancel first so freed balance is available to the new orders.
+        await asyncio.gather(*(self._cancel(entry) for entry in cancels))
+        await asyncio.gather(*(self._place(p, side, quantity) for p, side in places))
+        # every placement has returned, so no early event is still pending
+        self._closed_early.clear()
+        return len(cancels), len(places)
+
+
+# One engine per symbol, shared by the scheduled runs and the user stream.
+ENGINES = {}
+
+
+def get_engine(client, symbol: str, tick_size: float = 0.01) -> GridEngine:
+    engine = ENGINES.get(symbol)
+    if engine is None or engine.tick_size != tick_size:
+        engine = ENGINES[symbol] = GridEngine(client, symbol, tick_size)
+    engine.client = client
+    return engine
+
+
+def handle_user_event(event: dict) -> None:
+    """User data stream listener routing order updates to the grid engines."""
+    if event.get("e") == STREAM_CONNECTED:
+        # events may have been missed; re-read open orders on the next run
+        for engine in ENGINES.values():
+            engine.synced = False
+    elif event.get("e") == "executionReport":
+        engine = ENGINES.get(event.get("s"))
+        if engine is not None:
+            engine.on_execution_report(event)
+
+
 async def execute(
     client,
     symbol: str,
@@ -16,6 +225,7 @@ async def execute(
     grids: int,
     quantity: float,
     weight: float,
+    tick_size: float = 0.01,
 ):
     """
     Execute Grid trading strategy.
@@ -28,9 +238,11 @@ async def execute(
         grids (int): Number of grid levels.
         quantity (float): Quantity to buy or sell at each grid.
         weight (float): Weight of this strategy when executed.
+        tick_size (float): Price increment the levels are rounded to.
 
-    The strategy should divide the range into intervals and place limit buy orders below
-    and limit sell orders above the current price accordingly.
+    The range is divided into ``grids`` levels with limit buys below and
+    limit sells above the current price. Only orders that differ from the
+    target grid are cancelled or placed.
     """
     try:
         logger.info(
@@ -42,13 +254,17 @@ async def execute(
             quantity,
             weight,
         )
-        # Implementation placeholder:
-        # Compute price levels and place limit orders.
-        # Example:
-        # step = (upper_price - lower_price) / grids
-        # for i in range(grids):
-        #     price = lower_price + step * i
-        #     # place buy order at price
-        #     # place sell order at price + step
+        ticker = await client.get_symbol_ticker(symbol=symbol)
+        engine = get_engine(client, symbol, tick_size)
+        cancelled, placed = await engine.reconcile(
+            lower_price, upper_price, grids, quantity, float(ticker["price"])
+        )
+        logger.info(
+            "Grid %s: cancelled %d, placed %d, %d orders open",
+            symbol,
+            cancelled,
+            placed,
+            len(engine.orders),
+        )
     except Exception as e:
         logger.exception("Error executing Grid strategy: %s", e)
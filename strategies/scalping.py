@@ -16,6 +16,8 @@ async def execute(
     weight: float,
     bot=None,
     chat_id=None,
+    market_data=None,
+    indicator_engine=None,
 ):
     """
     Execute Scalping strategy.
@@ -26,6 +28,10 @@ async def execute(
         quantity (float): Quantity to trade per signal.
         indicators (dict): Parameters controlling the moving average periods.
         weight (float): Weight of this strategy when executed.
+        market_data: Optional ``MarketDataHub`` streaming hourly klines. When it
+            holds enough candles no klines are downloaded.
+        indicator_engine: Optional ``IndicatorEngine`` providing streaming
+            moving averages of closed hourly candles.
 
     The strategy calculates simple moving averages on hourly closes and places
     market orders when the fast average crosses the slow one.
@@ -37,29 +43,42 @@ async def execute(
         )
         logger.info(message)
         if bot and chat_id:
-            await bot.send_message(chat_id=chat_id, text=message)
+            await bot.send_message(chat_id=chat_id, text=message, priority="low")
 
         short_period = int(indicators.get("ema_fast", 7))
         long_period = int(indicators.get("ema_slow", 25))
         lookback = int(indicators.get("lookback", long_period + 5))
 
-        klines = await client.get_historical_klines(
-            symbol, interval="1h", lookback=f"{lookback} hours ago UTC"
-        )
-        closes = [float(k[4]) for k in klines]
-        if len(closes) < long_period:
-            logger.warning("Not enough data for scalping")
-            return
+        short_ma = long_ma = None
+        if indicator_engine is not None:
+            short_ma = indicator_engine.get(symbol, "sma", short_period)
+            long_ma = indicator_engine.get(symbol, "sma", long_period)
+
+        if short_ma is None or long_ma is None:
+            closes = []
+            if market_data is not None:
+                # Recent closes including the still-open candle, as REST returns.
+                closes = market_data.closes(
+                    symbol, lookback, include_current=True
+                ).tolist()
+            if len(closes) < long_period:
+                klines = await client.get_historical_klines(
+                    symbol, interval="1h", lookback=f"{lookback} hours ago UTC"
+                )
+                closes = [float(k[4]) for k in klines]
+            if len(closes) < long_period:
+                logger.warning("Not enough data for scalping")
+                return
 
-        short_ma = sum(closes[-short_period:]) / short_period
-        long_ma = sum(closes[-long_period:]) / long_period
+            short_ma = sum(closes[-short_period:]) / short_period
+            long_ma = sum(closes[-long_period:]) / long_period
 
         if short_ma > long_ma:
             trade_msg = (
                 f"Scalping signal BUY {quantity} {symbol}: short_ma {short_ma:.4f} > long_ma {long_ma:.4f}"
             )
             if bot and chat_id:
-                await bot.send_message(chat_id=chat_id, text=trade_msg)
+                await bot.send_message(chat_id=chat_id, text=trade_msg, priority="high")
             order = await client.order_market_buy(symbol=symbol, quantity=quantity)
             logger.info("Scalping buy order: %s", order)
         elif short_ma < long_ma:
@@ -67,7 +86,7 @@ async def execute(
                 f"Scalping signal SELL {quantity} {symbol}: short_ma {short_ma:.4f} < long_ma {long_ma:.4f}"
             )
             if bot and chat_id:
-                await bot.send_message(chat_id=chat_id, text=trade_msg)
+                await bot.send_message(chat_id=chat_id, text=trade_msg, priority="high")
             order = await client.order_market_sell(symbol=symbol, quantity=quantity)
             logger.info("Scalping sell order: %s", order)
     except Exception as e:
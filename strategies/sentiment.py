@@ -28,7 +28,7 @@ async def execute(
         sentiment_score (float): Sentiment score in the range [-1, 1], where positive values
             indicate bullish sentiment and negative values indicate bearish sentiment.
         threshold (float): Minimum absolute sentiment value required to trigger a trade.
-        bot: Telegram bot instance used to send notifications.
+        bot: Telegram bot or ``Outbox`` used to send notifications.
         chat_id: Telegram chat identifier for sending messages.
         weight (float): Weight of this strategy when executed.
 
@@ -51,6 +51,7 @@ async def execute(
                         f"Sentiment {sentiment_score:.4f} > {threshold:.4f}. "
                         f"Buying {quantity} of {symbol} (weight {weight:.2f})."
                     ),
+                    priority="high",
                 )
             order = await client.order_market_buy(symbol=symbol, quantity=quantity)
             logger.info("Sentiment buy order: %s", order)
@@ -62,6 +63,7 @@ async def execute(
                         f"Sentiment {sentiment_score:.4f} < -{threshold:.4f}. "
                         f"Selling {quantity} of {symbol} (weight {weight:.2f})."
                     ),
+                    priority="high",
                 )
             order = await client.order_market_sell(symbol=symbol, quantity=quantity)
             logger.info("Sentiment sell order: %s", order)
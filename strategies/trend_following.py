@@ -9,6 +9,22 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+
+def trend_signal(fast_ema, slow_ema, adx, adx_threshold: float = 25.0) -> int:
+    """Return 1 for an uptrend, -1 for a downtrend and 0 without a clear trend.
+
+    A trend needs the fast EMA on the right side of the slow EMA and an ADX
+    above ``adx_threshold``.
+    """
+    if fast_ema is None or slow_ema is None or adx is None or adx <= adx_threshold:
+        return 0
+    if fast_ema > slow_ema:
+        return 1
+    if fast_ema < slow_ema:
+        return -1
+    return 0
+
+
 async def execute(
     client,
     symbol: str,
@@ -17,6 +33,8 @@ async def execute(
     weight: float,
     bot=None,
     chat_id=None,
+    indicator_engine=None,
+    place_orders: bool = False,
 ):
     """
     Execute Trend Following strategy.
@@ -27,6 +45,11 @@ async def execute(
         quantity (float): Quantity to trade.
         indicators (dict): Precomputed trend indicators (e.g., moving average crossover, ADX).
         weight (float): Weight of this strategy when executed.
+        indicator_engine: Optional ``IndicatorEngine``. When ``indicators`` has
+            no ``trend_signal`` it is derived from a fast/slow EMA pair
+            (``lookback // 4`` and ``lookback`` candles by default) and ADX.
+        place_orders (bool): Send market orders for the signal; when false
+            (the default) the signal is only logged.
 
     Uses trend signals to decide long or short positions.
     """
@@ -37,15 +60,33 @@ async def execute(
         )
         logger.info(message)
         if bot and chat_id:
-            await bot.send_message(chat_id=chat_id, text=message)
-        # Example logic:
-        # if indicators.get("trend_signal") > 0:
-        #     # Positive trend: go long
-        #     order = await client.order_market_buy(symbol=symbol, quantity=quantity)
-        #     logger.info("Trend-following buy order: %s", order)
-        # elif indicators.get("trend_signal") < 0:
-        #     # Negative trend: go short/sell
-        #     order = await client.order_market_sell(symbol=symbol, quantity=quantity)
-        #     logger.info("Trend-following sell order: %s", order)
+            await bot.send_message(chat_id=chat_id, text=message, priority="low")
+
+        signal = indicators.get("trend_signal")
+        if signal is None and indicator_engine is not None:
+            lookback = int(indicators.get("lookback", 100))
+            fast = int(indicators.get("ema_fast", max(lookback // 4, 1)))
+            slow = int(indicators.get("ema_slow", lookback))
+            adx_period = int(indicators.get("adx_period", 14))
+            signal = trend_signal(
+                indicator_engine.get(symbol, "ema", fast),
+                indicator_engine.get(symbol, "ema", slow),
+                indicator_engine.get(symbol, "adx", adx_period),
+                float(indicators.get("adx_threshold", 25.0)),
+            )
+        if signal is None:
+            return
+        if not place_orders:
+            logger.info("Trend signal for %s: %d (orders disabled)", symbol, signal)
+            return
+
+        if signal > 0:
+            # Positive trend: go long
+            order = await client.order_market_buy(symbol=symbol, quantity=quantity)
+            logger.info("Trend-following buy order: %s", order)
+        elif signal < 0:
+            # Negative trend: go short/sell
+            order = await client.order_market_sell(symbol=symbol, quantity=quantity)
+            logger.info("Trend-following sell order: %s", order)
     except Exception as e:
         logger.exception("Error executing Trend Following strategy: %s", e)
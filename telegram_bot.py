@@ -2,21 +2,19 @@ import os
 import env_loader
 import asyncio
 import logging
+import time
 import logger_config
 
-from trading_tasks import (
-    dca_loop,
-    grid_loop,
-    scalping_loop,
-    trend_loop,
-    sentiment_loop,
-    weight_training_loop,
-    CONFIG,
-)
+from trading_tasks import CONFIG
 import trading_tasks
 from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes
-import binance_client
+import client_manager
 import data_training
+import ledger
+import optimizer
+import price_cache
+from telegram_outbox import Outbox
+import webhook_server
 
 # Configure module logger
 logger = logging.getLogger(__name__)
@@ -26,25 +24,21 @@ tasks_started = False
 
 
 async def start_tasks() -> None:
-    """Schedule all trading loops if not already running."""
+    """Start trading every configured symbol if not already running."""
     global tasks_started
     if tasks_started:
         return
-    trading_tasks.BINANCE_CLIENT = await binance_client.get_binance_client()
-    loop = asyncio.get_event_loop()
-    loop.create_task(dca_loop())
-    loop.create_task(grid_loop())
-    loop.create_task(scalping_loop())
-    loop.create_task(trend_loop())
-    loop.create_task(sentiment_loop())
-    loop.create_task(weight_training_loop())
+    await trading_tasks.start_trading()
     tasks_started = True
     logger.info("Trading tasks started")
 
 
 async def start_command(update, context):
     trading_tasks.TELEGRAM_CHAT_ID = update.effective_chat.id
-    trading_tasks.TELEGRAM_BOT = context.bot
+    if not isinstance(trading_tasks.TELEGRAM_BOT, Outbox):
+        # strategies queue their notifications instead of awaiting Telegram
+        trading_tasks.TELEGRAM_BOT = Outbox(context.bot)
+    trading_tasks.publish_config()
     await update.message.reply_text(
         "Hello! I'm your Binance trading bot.\n"
         "I run various trading strategies and update you on Telegram.\n"
@@ -55,9 +49,99 @@ async def start_command(update, context):
 
 
 async def status_command(update, context):
-    await update.message.reply_text(
-        "The strategies are running in the background. Check the logs for more details."
+    stats = price_cache.PRICE_CACHE.stats()
+    latency = webhook_server.LATENCY["handling"].summary()
+    message = (
+        "The strategies are running in the background. Check the logs for more details.\n"
+        f"Price cache: {stats['hits']} hits, {stats['misses']} misses, "
+        f"{stats['coalesced']} coalesced"
+    )
+    if latency["count"]:
+        message += (
+            f"\nUpdate latency: p50 {latency['p50'] * 1000:.0f} ms, "
+            f"p95 {latency['p95'] * 1000:.0f} ms over {latency['count']} updates"
+        )
+    await update.message.reply_text(message)
+
+
+async def jobs_command(update, context):
+    pool = trading_tasks.WORKER_POOL
+    if pool is not None:
+        message = "Strategies run in worker processes:\n"
+        for index, (symbols, alive) in enumerate(pool.shards()):
+            state = "running" if alive else "stopped"
+            message += f"worker {index} ({state}): {', '.join(symbols)}\n"
+        await update.message.reply_text(message)
+        return
+    scheduler = trading_tasks.SCHEDULER
+    if scheduler is None:
+        await update.message.reply_text("Trading tasks are not running. Use /start.")
+        return
+    # one line per strategy, summed over its per-symbol jobs
+    summary = {}
+    for job in scheduler.jobs():
+        name = job["name"].split(":")[0]
+        entry = summary.setdefault(
+            name,
+            {
+                "jobs": 0,
+                "next_run": None,
+                "last_duration": None,
+                "runs": 0,
+                "skipped": 0,
+                "failures": 0,
+                "paused": 0,
+            },
+        )
+        entry["jobs"] += 1
+        if not job["paused"] and (
+            entry["next_run"] is None or job["next_run"] < entry["next_run"]
+        ):
+            entry["next_run"] = job["next_run"]
+        if job["last_duration"] is not None:
+            entry["last_duration"] = max(entry["last_duration"] or 0.0, job["last_duration"])
+        for key in ("runs", "skipped", "failures", "paused"):
+            entry[key] += job[key]
+    now = time.time()
+    message = "Scheduled jobs:\n"
+    for name, entry in summary.items():
+        if entry["next_run"] is None:
+            next_run = "paused"
+        else:
+            next_run = f"in {max(entry['next_run'] - now, 0):.0f}s"
+        duration = (
+            f"{entry['last_duration']:.2f}s" if entry["last_duration"] is not None else "-"
+        )
+        symbols = f" ({entry['jobs']} symbols)" if entry["jobs"] > 1 else ""
+        message += (
+            f"{name}{symbols}: next {next_run}, last took {duration}, "
+            f"{entry['runs']} runs, {entry['skipped']} skipped, "
+            f"{entry['failures']} failed\n"
+        )
+    await update.message.reply_text(message)
+
+
+async def attribution_command(update, context):
+    signals = trading_tasks.SIGNALS
+    if signals is None:
+        await update.message.reply_text(
+            "Order netting is not running in this process. Use /start."
+        )
+        return
+    stats = signals.stats
+    message = (
+        f"Netting: {stats['intents']} strategy orders sent as {stats['orders']} "
+        f"exchange orders, {stats['internalized']:.4f} netted out, "
+        f"~{stats['fees_saved']:.4f} USDT fees saved\n"
     )
+    for strategy, symbols in signals.summary().items():
+        message += f"\n{strategy}:\n"
+        for symbol, entry in symbols.items():
+            message += (
+                f"{symbol}: position={entry['position']:.4f}, "
+                f"fees={entry['fees']:.4f}, PnL={entry['pnl']:.4f}\n"
+            )
+    await update.message.reply_text(message)
 
 
 async def help_command(update, context):
@@ -65,6 +149,7 @@ async def help_command(update, context):
         "Available commands:\n"
         "/start – start chatting with the bot\n"
         "/status – check the current status of the strategies\n"
+        "/jobs – show when each strategy runs next\n"
         "/help – display this command list\n"
         "/weights – show current strategy weights\n"
         "/setweights – set new strategy weights or \"auto\" to retrain\n"
@@ -72,7 +157,10 @@ async def help_command(update, context):
         "The weights must add up to 1 when numbers are provided\n"
         "/risk – show current risk level\n"
         "/setrisk – set a new risk level (0.0-1.0)\n"
-        "/portfolio – show detailed account portfolio"
+        "/optimize – sweep a strategy's parameters on past data\n"
+        "Usage: /optimize <scalping|trend|dca|grid> [symbol] [apply]\n"
+        "/portfolio – show detailed account portfolio\n"
+        "/attribution – show per-strategy positions after order netting"
     )
 
 
@@ -82,23 +170,44 @@ async def weights_command(update, context):
     for name, value in weights.items():
         # Show four decimal places to avoid confusion when values are very small
         message += f"{name}: {value:.4f}\n"
+    for symbol, symbol_weights in CONFIG.get("symbol_weights", {}).items():
+        message += f"\n{symbol} (trained):\n"
+        for name, value in symbol_weights.items():
+            message += f"{name}: {value:.4f}\n"
     await update.message.reply_text(message)
 
 
 async def setweights_command(update, context):
     if len(context.args) == 1 and context.args[0].lower() == "auto":
-        await update.message.reply_text("Starting weight training...")
+        symbols = CONFIG["symbols"]
+        await update.message.reply_text(
+            f"Starting weight training for {len(symbols)} symbol(s)..."
+        )
+        done = 0
+
+        async def progress(symbol, result):
+            nonlocal done
+            done += 1
+            status = "trained" if result else "failed"
+            await update.message.reply_text(f"{symbol} {status} ({done}/{len(symbols)})")
+
         try:
-            symbol = CONFIG["symbols"][0]
-            weights = await data_training.calculate_recommended_weights_with_progress(
-                symbol,
-                bot=context.bot,
-                chat_id=update.effective_chat.id,
-            )
-            CONFIG["weights"].update(weights)
-            msg = "Updated weights:\n" + "\n".join(
-                f"{k}: {v:.4f}" for k, v in weights.items()
+            results = await data_training.train_weights_batch(
+                symbols, ew_alpha=CONFIG.get("weight_ew_alpha"), progress=progress
             )
+            CONFIG["auto_weights"] = True
+            trading_tasks.apply_trained_weights(results)
+            trading_tasks.publish_config()
+            if not results:
+                await update.message.reply_text("Failed to update weights: no data")
+                return
+            msg = "Updated weights:"
+            for symbol, result in results.items():
+                msg += (
+                    f"\n{symbol} ({result['download_seconds']:.2f}s download, "
+                    f"{result['compute_seconds']:.3f}s compute):\n"
+                )
+                msg += "\n".join(f"{k}: {v:.4f}" for k, v in result["weights"].items())
             await update.message.reply_text(msg)
         except Exception as e:
             await update.message.reply_text(f"Failed to update weights: {e}")
@@ -127,6 +236,10 @@ async def setweights_command(update, context):
             "sentiment": sentiment_w,
         }
     )
+    # Manually chosen weights replace trained ones until /setweights auto.
+    CONFIG["symbol_weights"].clear()
+    CONFIG["auto_weights"] = False
+    trading_tasks.publish_config()
     await update.message.reply_text("Weights updated")
 
 
@@ -148,66 +261,119 @@ async def setrisk_command(update, context):
         await update.message.reply_text("Risk level must be between 0.0 and 1.0")
         return
     CONFIG["risk_level"] = level
+    trading_tasks.publish_config()
     await update.message.reply_text(f"Risk level set to {level:.2f}")
 
 
+async def optimize_command(update, context):
+    usage = "Usage: /optimize <%s> [symbol] [apply]" % "|".join(optimizer.SEARCH_SPACES)
+    if not context.args or context.args[0].lower() not in optimizer.SEARCH_SPACES:
+        await update.message.reply_text(usage)
+        return
+    strategy = context.args[0].lower()
+    rest = [arg for arg in context.args[1:] if arg.lower() != "apply"]
+    apply = len(rest) < len(context.args) - 1
+    if len(rest) > 1:
+        await update.message.reply_text(usage)
+        return
+    symbol = rest[0].upper() if rest else CONFIG["symbols"][0]
+    await update.message.reply_text(f"Sweeping {strategy} parameters on {symbol}...")
+    try:
+        results = await optimizer.sweep_symbol(symbol, strategy)
+    except Exception as e:
+        await update.message.reply_text(f"Failed to sweep {strategy}: {e}")
+        return
+    message = (
+        f"Best of {len(results)} {strategy} parameter sets on {symbol} by Sharpe ratio "
+        f"(ho: the last {optimizer.HOLDOUT:.0%} of the history, not swept):\n"
+        + optimizer.format_results(results, 5)
+    )
+    if apply and results:
+        applied = optimizer.apply_params(strategy, results[0]["params"], symbol)
+        message += "\nApplied: " + ", ".join(f"{k}={v:g}" for k, v in applied.items())
+    await update.message.reply_text(message)
+
+
+# Concurrent trade history backfills made by /portfolio.
+PORTFOLIO_CONCURRENCY = 8
+# Rendered /portfolio replies are reused for this many seconds.
+PORTFOLIO_CACHE = price_cache.PriceCache(ttl=float(os.getenv("PORTFOLIO_CACHE_TTL", "30")))
+
+
+def _asset_line(asset, total, current_price) -> str:
+    position = ledger.LEDGER.position(f"{asset}USDT")
+    avg_price = position["avg_price"]
+    qty = position["qty"]
+    pnl = (current_price - avg_price) * qty if qty != 0 else 0.0
+    return (
+        f"{asset}: balance={total:.4f}, avg_buy={avg_price:.4f}, "
+        f"current={current_price:.4f}, PnL={pnl:.4f}, "
+        f"realized={position['realized']:.4f}"
+    )
+
+
+async def build_portfolio_message(client) -> str:
+    """Render the portfolio of ``client``'s account.
+
+    Prices come from one bulk ticker request. Average prices and PnL are read
+    from the position ledger, which first fetches any trades it has not seen.
+    Assets worth less than ``CONFIG["portfolio_min_notional"]`` USDT,
+    including assets without a USDT price, are left out.
+    """
+    account = await client.get_account()
+    holdings = {}
+    for balance in account.get("balances", []):
+        total = float(balance.get("free", 0)) + float(balance.get("locked", 0))
+        if total != 0:
+            holdings[balance.get("asset")] = total
+
+    prices = await client.get_prices([f"{asset}USDT" for asset in holdings if asset != "USDT"])
+    prices["USDTUSDT"] = 1.0
+    min_notional = CONFIG.get("portfolio_min_notional", 0.0)
+    shown = {}
+    skipped = 0
+    for asset, total in holdings.items():
+        price = prices.get(f"{asset}USDT", 0.0)
+        if min_notional > 0 and abs(total) * price < min_notional:
+            skipped += 1
+            continue
+        shown[asset] = (total, price)
+
+    await ledger.LEDGER.sync(
+        client,
+        [f"{asset}USDT" for asset in shown if asset != "USDT"],
+        concurrency=PORTFOLIO_CONCURRENCY,
+    )
+    lines = [_asset_line(asset, total, price) for asset, (total, price) in shown.items()]
+    message = "Your portfolio:\n" + "".join(f"{line}\n" for line in lines)
+    if skipped:
+        message += f"({skipped} assets below {min_notional:g} USDT not shown)\n"
+    return message
+
+
 async def portfolio_command(update, context):
     """Display account portfolio with purchase price and PnL."""
     try:
-        client = await binance_client.get_binance_client()
+        client = await client_manager.get_client()
     except Exception as e:
         await update.message.reply_text(f"Error connecting to Binance: {e}")
         return
 
     try:
-        account = await client.get_account()
+        message = await PORTFOLIO_CACHE.get(
+            ("portfolio",), lambda: build_portfolio_message(client)
+        )
     except Exception as e:
         await update.message.reply_text(f"Failed to fetch account: {e}")
-        await client.close_connection()
         return
 
-    message = "Your portfolio:\n"
-    for balance in account.get("balances", []):
-        free = float(balance.get("free", 0))
-        locked = float(balance.get("locked", 0))
-        total = free + locked
-        if total == 0:
-            continue
-        asset = balance.get("asset")
-
-        symbol = f"{asset}USDT"
-        qty = 0.0
-        cost = 0.0
-        try:
-            trades = await client.get_my_trades(symbol=symbol)
-        except Exception:
-            trades = []
-
-        for t in trades:
-            q = float(t["qty"])
-            price = float(t["price"])
-            if t["isBuyer"]:
-                qty += q
-                cost += price * q
-            else:
-                qty -= q
-                cost -= price * q
-
-        avg_price = cost / qty if qty != 0 else 0.0
-        try:
-            ticker = await client.get_avg_price(symbol=symbol)
-            current_price = float(ticker["price"])
-        except Exception:
-            current_price = 0.0
-        pnl = (current_price - avg_price) * qty if qty != 0 else 0.0
+    await update.message.reply_text(message)
 
-        message += (
-            f"{asset}: balance={total:.4f}, avg_buy={avg_price:.4f}, "
-            f"current={current_price:.4f}, PnL={pnl:.4f}\n"
-        )
 
-    await client.close_connection()
-    await update.message.reply_text(message)
+async def flush_outbox(application) -> None:
+    """Send queued notifications before the bot shuts down."""
+    if isinstance(trading_tasks.TELEGRAM_BOT, Outbox):
+        await trading_tasks.TELEGRAM_BOT.flush()
 
 
 def main() -> None:
@@ -218,21 +384,31 @@ def main() -> None:
             "TELEGRAM_BOT_TOKEN environment variable is not set. Please set your Telegram bot token."
         )
 
-    application = ApplicationBuilder().token(telegram_token).build()
-    trading_tasks.TELEGRAM_BOT = application.bot
+    application = (
+        ApplicationBuilder().token(telegram_token).post_stop(flush_outbox).build()
+    )
+    trading_tasks.TELEGRAM_BOT = Outbox(application.bot)
     # Use chat ID from environment until /start command provides one
     trading_tasks.TELEGRAM_CHAT_ID = trading_tasks.TELEGRAM_CHAT_ID or os.getenv(
         "TELEGRAM_CHAT_ID"
     )
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(CommandHandler("status", status_command))
+    application.add_handler(CommandHandler("jobs", jobs_command))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("weights", weights_command))
     application.add_handler(CommandHandler("setweights", setweights_command))
     application.add_handler(CommandHandler("risk", risk_command))
     application.add_handler(CommandHandler("setrisk", setrisk_command))
+    application.add_handler(CommandHandler("optimize", optimize_command))
     application.add_handler(CommandHandler("portfolio", portfolio_command))
+    application.add_handler(CommandHandler("attribution", attribution_command))
+    webhook_server.install_latency_handlers(application)
 
+    if os.getenv("TELEGRAM_WEBHOOK_URL"):
+        logger.info("Starting Telegram bot webhook")
+        asyncio.run(webhook_server.serve(application))
+        return
     logger.info("Starting Telegram bot polling")
     application.run_polling()
 
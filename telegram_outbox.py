@@ -0,0 +1,163 @@
+"""Background outbox for Telegram notifications.
+
+``Outbox`` wraps a ``telegram.Bot``. ``send_message`` only queues the text
+and returns at once, so strategies never wait on the Telegram API. For each
+chat, messages queued within ``window`` seconds are merged into one digest.
+Sending stays within Telegram's global and per-chat flood limits, and after
+a ``RetryAfter`` error all sending pauses for the requested time. When a
+chat's queue backs up, low-priority messages are dropped first and replaced
+by a one-line summary.
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+
+from telegram.error import RetryAfter, TelegramError
+
+from rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Telegram rejects longer messages.
+MAX_MESSAGE_LENGTH = 4096
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+# Attempts per digest for errors other than RetryAfter.
+MAX_ATTEMPTS = 3
+
+
+class Outbox:
+    """Queues, merges and rate-limits messages sent through a Telegram bot."""
+
+    def __init__(
+        self,
+        bot,
+        window: float = None,
+        max_pending: int = None,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+    ):
+        self.__wrapped__ = bot
+        self.window = (
+            window if window is not None else float(os.getenv("TELEGRAM_DIGEST_SECONDS", "2"))
+        )
+        self.max_pending = max_pending or int(os.getenv("TELEGRAM_MAX_PENDING", "200"))
+        self._global = TokenBucket(global_rate, 1)
+        self._chat_rate = chat_rate
+        self._chat_buckets = {}
+        # chat -> list of (rank, sequence, text)
+        self._pending = {}
+        self._dropped = {}
+        self._tasks = {}
+        self._direct = set()
+        self._sequence = itertools.count()
+        self._resume_at = 0.0
+        self._closing = False
+        self.stats = {"queued": 0, "sent": 0, "dropped": 0, "retry_after": 0}
+
+    def __getattr__(self, name):
+        return getattr(self.__wrapped__, name)
+
+    async def send_message(self, chat_id, text, priority: str = "normal", **kwargs):
+        """Queue ``text`` for ``chat_id`` without waiting for it to be sent.
+
+        Messages with extra Telegram options (``parse_mode``, markup, ...)
+        are sent on their own instead of being merged into a digest.
+        """
+        if kwargs:
+            task = asyncio.create_task(self._send_now(chat_id, text, kwargs))
+            self._direct.add(task)
+            task.add_done_callback(self._direct.discard)
+            return
+        self.stats["queued"] += 1
+        pending = self._pending.setdefault(chat_id, [])
+        pending.append((PRIORITIES.get(priority, 1), next(self._sequence), str(text)))
+        if len(pending) > self.max_pending:
+            self._drop_one(chat_id)
+        task = self._tasks.get(chat_id)
+        if task is None or task.done():
+            self._tasks[chat_id] = asyncio.create_task(self._chat_loop(chat_id))
+
+    def _drop_one(self, chat_id) -> None:
+        """Drop the oldest message of the lowest priority queued for ``chat_id``."""
+        pending = self._pending[chat_id]
+        lowest = max(rank for rank, _, _ in pending)
+        index = next(i for i, item in enumerate(pending) if item[0] == lowest)
+        del pending[index]
+        self._dropped[chat_id] = self._dropped.get(chat_id, 0) + 1
+        self.stats["dropped"] += 1
+
+    def digests(self, chat_id) -> list:
+        """Take everything queued for ``chat_id`` as a list of message texts."""
+        pending = self._pending.pop(chat_id, [])
+        dropped = self._dropped.pop(chat_id, 0)
+        texts = [text for _, _, text in pending]
+        if sum(len(t) + 1 for t in texts) > MAX_MESSAGE_LENGTH:
+            # too much for one message: summarize the low-priority part
+            low = [item for item in pending if item[0] == PRIORITIES["low"]]
+            if low:
+                dropped += len(low)
+                self.stats["dropped"] += len(low)
+                texts = [text for rank, _, text in pending if rank != PRIORITIES["low"]]
+        if dropped:
+            texts.append(f"({dropped} low-priority updates omitted)")
+        messages = []
+        current = ""
+        for text in texts:
+            # split single messages longer than the limit as well
+            for start in range(0, max(len(text), 1), MAX_MESSAGE_LENGTH):
+                part = text[start : start + MAX_MESSAGE_LENGTH]
+                if current and len(current) + 1 + len(part) > MAX_MESSAGE_LENGTH:
+                    messages.append(current)
+                    current = ""
+                current = f"{current}\n{part}" if current else part
+        if current:
+            messages.append(current)
+        return messages
+
+    async def _chat_loop(self, chat_id) -> None:
+        while self._pending.get(chat_id):
+            if not self._closing:
+                # let more messages for this chat arrive and merge them
+                await asyncio.sleep(self.window)
+            for text in self.digests(chat_id):
+                await self._send_now(chat_id, text, {})
+
+    async def _send_now(self, chat_id, text, kwargs) -> None:
+        bucket = self._chat_buckets.setdefault(chat_id, TokenBucket(1, 1 / self._chat_rate))
+        loop = asyncio.get_running_loop()
+        attempts = 0
+        while attempts < MAX_ATTEMPTS:
+            delay = self._resume_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await bucket.acquire()
+            await self._global.acquire()
+            try:
+                await self.__wrapped__.send_message(chat_id=chat_id, text=text, **kwargs)
+                self.stats["sent"] += 1
+                return
+            except RetryAfter as e:
+                # a flood wait does not count as a failed attempt
+                self.stats["retry_after"] += 1
+                logger.warning("Telegram flood limit hit, pausing for %ss", e.retry_after)
+                self._resume_at = loop.time() + float(e.retry_after)
+            except TelegramError as e:
+                attempts += 1
+                logger.warning("Failed to send Telegram message (attempt %d): %s", attempts, e)
+                await asyncio.sleep(2**attempts)
+        logger.error("Giving up on Telegram message to %s", chat_id)
+
+    async def flush(self) -> None:
+        """Send everything queued without waiting for digest windows."""
+        self._closing = True
+        try:
+            await asyncio.gather(
+                *self._tasks.values(), *self._direct, return_exceptions=True
+            )
+            for chat_id in list(self._pending):
+                for text in self.digests(chat_id):
+                    await self._send_now(chat_id, text, {})
+        finally:
+            self._closing = False
@@ -0,0 +1,131 @@
+"""Array-backed trade history of the simulated account.
+
+``TradeStore`` keeps the fills of each symbol in one NumPy structured array
+that grows by doubling, instead of a list of dicts with stringified numbers.
+Trade ids and times only increase, so ``query`` finds the requested page
+with binary searches and formats just the rows it returns, whatever the size
+of the history.
+"""
+
+import numpy as np
+
+# Columns of one fill.
+TRADE_DTYPE = np.dtype(
+    [
+        ("id", np.int64),
+        ("order_id", np.int64),
+        ("time", np.int64),
+        ("price", np.float64),
+        ("qty", np.float64),
+        ("commission", np.float64),
+        ("is_buyer", np.bool_),
+        ("is_maker", np.bool_),
+    ]
+)
+# Largest page ``/myTrades`` returns.
+MAX_LIMIT = 1000
+
+
+class TradeStore:
+    """Fills per symbol in growable structured arrays."""
+
+    def __init__(self):
+        self._arrays = {}
+        self._sizes = {}
+
+    def __len__(self) -> int:
+        return sum(self._sizes.values())
+
+    def symbols(self) -> list:
+        return list(self._arrays)
+
+    def append(self, symbol, trade_id, order_id, time_ms, price, qty, commission, is_buyer, is_maker):
+        array = self._arrays.get(symbol)
+        size = self._sizes.get(symbol, 0)
+        if array is None or size == len(array):
+            grown = np.empty(max(1024, 2 * size), dtype=TRADE_DTYPE)
+            if array is not None:
+                grown[:size] = array
+            array = self._arrays[symbol] = grown
+        array[size] = (trade_id, order_id, time_ms, price, qty, commission, is_buyer, is_maker)
+        self._sizes[symbol] = size + 1
+
+    def columns(self, symbol) -> np.ndarray:
+        """Every fill of ``symbol`` as a structured array view, oldest first."""
+        array = self._arrays.get(symbol)
+        if array is None:
+            return np.empty(0, dtype=TRADE_DTYPE)
+        return array[: self._sizes[symbol]]
+
+    def query(
+        self,
+        symbol,
+        fromId=None,
+        startTime=None,
+        endTime=None,
+        orderId=None,
+        limit=500,
+    ) -> np.ndarray:
+        """Select fills like ``GET /api/v3/myTrades``.
+
+        With ``fromId``, ``startTime`` or ``orderId`` the oldest matching
+        trades are returned, otherwise the most recent ones; at most
+        ``limit`` (up to ``MAX_LIMIT``) either way.
+        """
+        rows = self.columns(symbol)
+        limit = min(int(limit or 500), MAX_LIMIT)
+        lo, hi = 0, len(rows)
+        if fromId is not None:
+            lo = max(lo, int(np.searchsorted(rows["id"], fromId, "left")))
+        if startTime is not None:
+            lo = max(lo, int(np.searchsorted(rows["time"], startTime, "left")))
+        if endTime is not None:
+            hi = min(hi, int(np.searchsorted(rows["time"], endTime, "right")))
+        rows = rows[lo:hi]
+        if orderId is not None:
+            rows = rows[rows["order_id"] == orderId]
+        if fromId is None and startTime is None and orderId is None:
+            return rows[-limit:] if limit else rows[:0]
+        return rows[:limit]
+
+    @staticmethod
+    def to_dicts(symbol, rows, commission_asset="USDT") -> list:
+        """Format fills in the REST ``/myTrades`` format."""
+        return [
+            {
+                "symbol": symbol,
+                "id": trade_id,
+                "orderId": order_id,
+                "orderListId": -1,
+                "price": str(price),
+                "qty": str(qty),
+                "quoteQty": str(price * qty),
+                "commission": str(commission),
+                "commissionAsset": commission_asset,
+                "time": time_ms,
+                "isBuyer": is_buyer,
+                "isMaker": is_maker,
+                "isBestMatch": True,
+            }
+            for trade_id, order_id, time_ms, price, qty, commission, is_buyer, is_maker in (
+                rows.tolist()
+            )
+        ]
+
+    def arrays(self) -> dict:
+        """Trimmed copies of every symbol's fills, for snapshots."""
+        return {symbol: self.columns(symbol).copy() for symbol in self._arrays}
+
+    def load(self, arrays: dict) -> None:
+        """Replace the history with ``{symbol: structured array}``."""
+        self._arrays = {symbol: np.asarray(a, dtype=TRADE_DTYPE) for symbol, a in arrays.items()}
+        self._sizes = {symbol: len(a) for symbol, a in self._arrays.items()}
+
+    def last_id(self) -> int:
+        return max((int(a[n - 1]["id"]) for a, n in self._iter_filled()), default=0)
+
+    def _iter_filled(self):
+        for symbol, array in self._arrays.items():
+            size = self._sizes[symbol]
+            if size:
+                yield array, size
@@ -1,9 +1,19 @@
 import asyncio
+import functools
 import logging
 import os
 import logger_config
-from data_training import calculate_recommended_weights
-from binance_client import get_binance_client
+import client_manager
+import ledger
+import online_metrics
+from aggregator import SignalAggregator
+from execution import ExecutionQueue
+from data_training import train_weights_batch, update_online_metrics
+from indicators import IndicatorEngine
+from market_data import MarketDataHub
+from scheduler import Scheduler
+from user_stream import UserDataStream
+from workers import WorkerPool
 
 from strategies import dca, grid, scalping, trend_following, sentiment
 
@@ -14,19 +24,49 @@ logger = logging.getLogger(__name__)
 TELEGRAM_BOT = None
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 BINANCE_CLIENT = None
+# Streaming klines and indicators shared by the strategies
+MARKET_DATA = None
+INDICATOR_ENGINE = None
+# Order updates for the account, e.g. grid fills
+USER_STREAM = None
+# Nets the market orders of the strategies
+SIGNALS = None
+# Drives the strategy jobs
+SCHEDULER = None
+# Running weight metrics per symbol, loaded on first training run
+WEIGHT_STATES = None
+# Where the weight metrics are saved; None uses WEIGHT_STATE_PATH
+WEIGHT_STATE_PATH = None
+# Number of worker processes the symbols are sharded across (0 = this process)
+TRADING_WORKERS = int(os.getenv("TRADING_WORKERS", "0"))
+# Front end: the running worker processes
+WORKER_POOL = None
+# Worker process: channel back to the front end
+WORKER_CHANNEL = None
 
 # Bot configuration
 CONFIG = {
     "symbols": ["BTCUSDT"],
     "dca_amount": 10.0,
     "dca_interval_minutes": 60,
+    # Grid settings per symbol; symbols without an entry run no grid.
     "grid": {
-        "lower": 30000.0,
-        "upper": 35000.0,
-        "levels": 10,
+        "BTCUSDT": {
+            "lower": 30000.0,
+            "upper": 35000.0,
+            "levels": 10,
+            # price increment of the symbol; grid levels are rounded to it
+            "tick_size": 0.01,
+        },
     },
     "grid_interval_minutes": 5,
     "scalping_interval_seconds": 60,
+    # Indicator parameters of the scalping and trend strategies; optimizer.py
+    # can tune them on historical data.
+    "scalping_indicators": {"rsi_period": 14, "ema_fast": 7, "ema_slow": 25},
+    "trend_indicators": {"lookback": 100},
+    # The trend strategy only logs its signal unless this is switched on.
+    "trend_orders": False,
     "trend_interval_minutes": 5,
     "sentiment_interval_minutes": 10,
     "sentiment_threshold": 0.1,
@@ -38,154 +78,317 @@ CONFIG = {
         "trend": 0.2,
         "sentiment": 0.0,
     },
+    # Trained weights per symbol; symbols missing here use "weights".
+    "symbol_weights": {},
+    # Whether the training loop may overwrite weights (off after /setweights).
+    "auto_weights": True,
+    # Use exponentially weighted return statistics with this alpha, or the
+    # full history when None.
+    "weight_ew_alpha": None,
     "risk_level": 1.0,
+    # Market orders of all strategies for a symbol within this many seconds
+    # are combined into one net order.
+    "signal_window_seconds": 5.0,
+    # /portfolio leaves out assets worth less than this many USDT.
+    "portfolio_min_notional": 1.0,
 }
 
 
-async def dca_loop():
+def get_weights(symbol: str) -> dict:
+    """Return the strategy weights that apply to ``symbol``."""
+    return CONFIG["symbol_weights"].get(symbol, CONFIG["weights"])
+
+
+def strategy_client(strategy: str):
+    """Return the client ``strategy`` places its orders through."""
+    if SIGNALS is None:
+        return BINANCE_CLIENT
+    return SIGNALS.client_for(strategy)
+
+
+def apply_trained_weights(results: dict) -> None:
+    """Store per-symbol weights returned by ``train_weights_batch``."""
+    for symbol, result in results.items():
+        CONFIG["symbol_weights"][symbol] = result["weights"]
+        logger.info(
+            "Updated %s weights in %.2fs download + %.3fs compute: %s",
+            symbol,
+            result["download_seconds"],
+            result["compute_seconds"],
+            result["weights"],
+        )
+
+
+async def dca_job(symbol: str):
     """
     Execute dollar-cost averaging trades at regular intervals.
     """
-    while True:
-        symbol = CONFIG["symbols"][0]
-        weight = CONFIG["weights"]["dca"]
-        amount = CONFIG["dca_amount"] * weight * CONFIG.get("risk_level", 1.0)
-        interval = CONFIG["dca_interval_minutes"]
-        # call the DCA strategy implementation
-        await dca.execute(
-            client=BINANCE_CLIENT,
-            symbol=symbol,
-            amount=amount,
-            interval_minutes=interval,
-            weight=weight,
-        )
-        # wait until the next DCA trade
-        await asyncio.sleep(interval * 60)
+    weight = get_weights(symbol)["dca"]
+    amount = CONFIG["dca_amount"] * weight * CONFIG.get("risk_level", 1.0)
+    interval = CONFIG["dca_interval_minutes"]
+    # call the DCA strategy implementation
+    await dca.execute(
+        client=strategy_client("dca"),
+        symbol=symbol,
+        amount=amount,
+        interval_minutes=interval,
+        weight=weight,
+    )
 
 
-async def grid_loop():
+async def grid_job(symbol: str):
     """
-    Maintain a grid of limit orders between configured lower and upper bounds.
+    Maintain a grid of limit orders between the symbol's configured bounds.
     """
-    while True:
-        symbol = CONFIG["symbols"][0]
-        lower = CONFIG["grid"]["lower"]
-        upper = CONFIG["grid"]["upper"]
-        levels = CONFIG["grid"]["levels"]
-        weight = CONFIG["weights"]["grid"]
-        amount = CONFIG["dca_amount"] * weight * CONFIG.get("risk_level", 1.0)
-        # call the grid strategy implementation
-        await grid.execute(
-            client=BINANCE_CLIENT,
-            symbol=symbol,
-            lower_price=lower,
-            upper_price=upper,
-            grids=levels,
-            quantity=amount,
-            weight=weight,
-        )
-        await asyncio.sleep(CONFIG["grid_interval_minutes"] * 60)
+    settings = CONFIG["grid"].get(symbol)
+    if not settings:
+        logger.debug("No grid configured for %s", symbol)
+        return
+    lower = settings["lower"]
+    upper = settings["upper"]
+    levels = settings["levels"]
+    weight = get_weights(symbol)["grid"]
+    amount = CONFIG["dca_amount"] * weight * CONFIG.get("risk_level", 1.0)
+    # call the grid strategy implementation
+    await grid.execute(
+        client=BINANCE_CLIENT,
+        symbol=symbol,
+        lower_price=lower,
+        upper_price=upper,
+        grids=levels,
+        quantity=amount,
+        weight=weight,
+        tick_size=settings.get("tick_size", 0.01),
+    )
 
 
-async def scalping_loop():
+async def scalping_job(symbol: str):
     """
     Run a high-frequency scalping strategy using short-term indicators.
     """
-    while True:
-        symbol = CONFIG["symbols"][0]
-        weight = CONFIG["weights"]["scalping"]
-        quantity = CONFIG["dca_amount"] * weight * CONFIG.get("risk_level", 1.0)
-        indicators = {"rsi_period": 14, "ema_fast": 7, "ema_slow": 25}
-        # call the scalping strategy implementation
-        await scalping.execute(
-            client=BINANCE_CLIENT,
-            symbol=symbol,
-            quantity=quantity,
-            indicators=indicators,
-            weight=weight,
-            bot=TELEGRAM_BOT,
-            chat_id=TELEGRAM_CHAT_ID,
-        )
-        await asyncio.sleep(CONFIG["scalping_interval_seconds"])
+    weight = get_weights(symbol)["scalping"]
+    quantity = CONFIG["dca_amount"] * weight * CONFIG.get("risk_level", 1.0)
+    indicators = dict(CONFIG["scalping_indicators"])
+    # call the scalping strategy implementation
+    await scalping.execute(
+        client=strategy_client("scalping"),
+        symbol=symbol,
+        quantity=quantity,
+        indicators=indicators,
+        weight=weight,
+        bot=TELEGRAM_BOT,
+        chat_id=TELEGRAM_CHAT_ID,
+        market_data=MARKET_DATA,
+        indicator_engine=INDICATOR_ENGINE,
+    )
 
 
-async def trend_loop():
+async def trend_job(symbol: str):
     """
     Run a trend-following strategy using momentum indicators.
     """
-    while True:
-        symbol = CONFIG["symbols"][0]
-        weight = CONFIG["weights"]["trend"]
-        quantity = CONFIG["dca_amount"] * weight * CONFIG.get("risk_level", 1.0)
-
-        # call the trend following strategy implementation
-        indicators = {"lookback": 100}
-        await trend_following.execute(
-            client=BINANCE_CLIENT,
-            symbol=symbol,
-            quantity=quantity,
-            indicators=indicators,
-            weight=weight,
-            bot=TELEGRAM_BOT,
-            chat_id=TELEGRAM_CHAT_ID,
-        )
-        await asyncio.sleep(CONFIG["trend_interval_minutes"] * 60)
+    weight = get_weights(symbol)["trend"]
+    quantity = CONFIG["dca_amount"] * weight * CONFIG.get("risk_level", 1.0)
+
+    # call the trend following strategy implementation
+    indicators = dict(CONFIG["trend_indicators"])
+    await trend_following.execute(
+        client=strategy_client("trend"),
+        symbol=symbol,
+        quantity=quantity,
+        indicators=indicators,
+        weight=weight,
+        bot=TELEGRAM_BOT,
+        chat_id=TELEGRAM_CHAT_ID,
+        indicator_engine=INDICATOR_ENGINE,
+        place_orders=CONFIG.get("trend_orders", False),
+    )
 
 
-async def sentiment_loop():
+async def sentiment_job(symbol: str):
     """
     Run a sentiment-based strategy that reacts to news or social sentiment.
     """
-    while True:
-        symbol = CONFIG["symbols"][0]
-        weight = CONFIG["weights"]["sentiment"]
-        quantity = CONFIG["dca_amount"] * weight * CONFIG.get("risk_level", 1.0)
-        sentiment_score = CONFIG.get("sentiment_score", 0.0)
-        threshold = CONFIG.get("sentiment_threshold", 0.0)
-        # call the sentiment strategy implementation
-        await sentiment.execute(
-            client=BINANCE_CLIENT,
-            symbol=symbol,
-            sentiment_score=sentiment_score,
-            quantity=quantity,
-            threshold=threshold,
-            weight=weight,
-            bot=TELEGRAM_BOT,
-            chat_id=TELEGRAM_CHAT_ID,
+    weight = get_weights(symbol)["sentiment"]
+    quantity = CONFIG["dca_amount"] * weight * CONFIG.get("risk_level", 1.0)
+    sentiment_score = CONFIG.get("sentiment_score", 0.0)
+    threshold = CONFIG.get("sentiment_threshold", 0.0)
+    # call the sentiment strategy implementation
+    await sentiment.execute(
+        client=strategy_client("sentiment"),
+        symbol=symbol,
+        sentiment_score=sentiment_score,
+        quantity=quantity,
+        threshold=threshold,
+        weight=weight,
+        bot=TELEGRAM_BOT,
+        chat_id=TELEGRAM_CHAT_ID,
+    )
+
+
+async def weight_training_job():
+    """Keep per-symbol strategy weights up to date, one closed candle at a time.
+
+    Symbols without saved metrics are trained from their full history once;
+    afterwards only the newly closed candles are added to the running
+    statistics, which are saved so a restart does not need a backfill.
+    """
+    global WEIGHT_STATES
+    if WEIGHT_STATES is None:
+        WEIGHT_STATES = online_metrics.load_states(WEIGHT_STATE_PATH)
+    states = WEIGHT_STATES
+    ew_alpha = CONFIG.get("weight_ew_alpha")
+    cold = [s for s in CONFIG["symbols"] if s not in states]
+    if cold:
+        results = await train_weights_batch(cold, ew_alpha=ew_alpha)
+        for symbol, result in results.items():
+            states[symbol] = result["metrics"]
+        if CONFIG.get("auto_weights", True):
+            apply_trained_weights(results)
+    for symbol in CONFIG["symbols"]:
+        if symbol in cold or symbol not in states:
+            continue
+        await update_online_metrics(symbol, states[symbol])
+        if CONFIG.get("auto_weights", True):
+            CONFIG["symbol_weights"][symbol] = states[symbol].weights(ew_alpha)
+    online_metrics.save_states(states, WEIGHT_STATE_PATH)
+    if WORKER_CHANNEL is not None and CONFIG.get("auto_weights", True):
+        WORKER_CHANNEL.report_weights(
+            {
+                symbol: CONFIG["symbol_weights"][symbol]
+                for symbol in CONFIG["symbols"]
+                if symbol in CONFIG["symbol_weights"]
+            }
+        )
+
+
+def build_scheduler(symbols=None) -> Scheduler:
+    """Register every strategy job for each of ``symbols`` (default: all).
+
+    Jobs are named ``<strategy>:<symbol>``. Intervals are read from
+    ``CONFIG`` before each run, so changing them at runtime re-times the
+    jobs. Every job runs once at startup and then at wall-clock multiples of
+    its interval.
+    """
+    jobs = Scheduler()
+    intervals = {
+        "dca": (dca_job, lambda: CONFIG["dca_interval_minutes"] * 60),
+        "grid": (grid_job, lambda: CONFIG["grid_interval_minutes"] * 60),
+        "scalping": (scalping_job, lambda: CONFIG["scalping_interval_seconds"]),
+        "trend": (trend_job, lambda: CONFIG["trend_interval_minutes"] * 60),
+        "sentiment": (sentiment_job, lambda: CONFIG["sentiment_interval_minutes"] * 60),
+    }
+    for symbol in symbols or CONFIG["symbols"]:
+        for name, (job, interval) in intervals.items():
+            jobs.add_job(
+                f"{name}:{symbol}",
+                functools.partial(job, symbol),
+                interval,
+                run_immediately=True,
+            )
+    # just after each hourly candle closes
+    jobs.add_job(
+        "weight_training", weight_training_job, 60 * 60, offset=5, run_immediately=True
+    )
+    return jobs
+
+
+async def start_market_data():
+    """Start streaming klines and indicators for the configured symbols."""
+    global MARKET_DATA, INDICATOR_ENGINE
+    MARKET_DATA = MarketDataHub(BINANCE_CLIENT)
+    INDICATOR_ENGINE = IndicatorEngine(MARKET_DATA)
+    await MARKET_DATA.start(CONFIG["symbols"])
+
+
+async def start_user_stream():
+    """Start routing the account's order updates to the strategies and ledger."""
+    global USER_STREAM
+    USER_STREAM = UserDataStream(BINANCE_CLIENT)
+    USER_STREAM.add_listener(grid.handle_user_event)
+    if WORKER_CHANNEL is None:
+        # workers leave the ledger to the front end, which backfills it
+        ledger.LEDGER.client = BINANCE_CLIENT
+        USER_STREAM.add_listener(ledger.LEDGER.on_user_event)
+    await USER_STREAM.start()
+
+
+async def _relay_message(message: dict) -> None:
+    """Forward a worker's Telegram message through this process's bot."""
+    if message.get("chat_id") is None:
+        message["chat_id"] = TELEGRAM_CHAT_ID
+    if TELEGRAM_BOT is None or message["chat_id"] is None:
+        logger.info("Worker message: %s", message.get("text"))
+        return
+    await TELEGRAM_BOT.send_message(**message)
+
+
+def _merge_worker_weights(weights: dict) -> None:
+    if CONFIG.get("auto_weights", True):
+        CONFIG["symbol_weights"].update(weights)
+
+
+def publish_config() -> None:
+    """Send the current ``CONFIG`` and chat ID to the worker processes."""
+    if WORKER_POOL is not None:
+        WORKER_POOL.update_config(CONFIG, TELEGRAM_CHAT_ID)
+
+
+async def start_trading() -> asyncio.Task:
+    """Start every strategy for every configured symbol.
+
+    With ``TRADING_WORKERS`` set the symbols are sharded across that many
+    worker processes; otherwise the strategies run on this event loop.
+    Returns the task that runs until trading stops.
+    """
+    global BINANCE_CLIENT, SCHEDULER, SIGNALS, WORKER_POOL
+    if TRADING_WORKERS > 0:
+        WORKER_POOL = WorkerPool(
+            TRADING_WORKERS,
+            on_message=_relay_message,
+            on_weights=_merge_worker_weights,
         )
-        await asyncio.sleep(CONFIG["sentiment_interval_minutes"] * 60)
+        return WORKER_POOL.start(CONFIG, TELEGRAM_CHAT_ID)
+    # orders from every strategy share one rate-limited execution queue
+    BINANCE_CLIENT = ExecutionQueue(await client_manager.get_client())
+    SIGNALS = SignalAggregator(
+        BINANCE_CLIENT, window=lambda: CONFIG.get("signal_window_seconds", 0)
+    )
+    await start_market_data()
+    await start_user_stream()
+    SCHEDULER = build_scheduler()
+    return asyncio.create_task(SCHEDULER.run())
 
 
-async def weight_training_loop():
-    """Periodically recalculate strategy weights from historical data."""
-    while True:
-        symbol = CONFIG["symbols"][0]
-        try:
-            weights = await calculate_recommended_weights(symbol)
-            CONFIG["weights"].update(weights)
-            logger.info("Automatically updated weights: %s", weights)
-        except Exception as e:
-            logger.exception("Failed to update weights: %s", e)
-        await asyncio.sleep(24 * 60 * 60)
+async def stop_trading() -> None:
+    """Stop the strategies and release their resources."""
+    global WORKER_POOL
+    if WORKER_POOL is not None:
+        await WORKER_POOL.stop()
+        WORKER_POOL = None
+        return
+    if SCHEDULER is not None:
+        SCHEDULER.stop()
+    if SIGNALS is not None:
+        SIGNALS.discard_pending()
+    if isinstance(BINANCE_CLIENT, ExecutionQueue):
+        BINANCE_CLIENT.discard_pending()
+    if MARKET_DATA is not None:
+        await MARKET_DATA.stop()
+    if USER_STREAM is not None:
+        await USER_STREAM.stop()
+    await client_manager.CLIENT_MANAGER.close()
 
 
 async def main():
     """
-    Entry point for running all strategy loops concurrently.
+    Entry point for running all strategies until interrupted.
     """
-    global BINANCE_CLIENT
-    BINANCE_CLIENT = await get_binance_client()
-    tasks = [
-        asyncio.create_task(dca_loop()),
-        asyncio.create_task(grid_loop()),
-        asyncio.create_task(scalping_loop()),
-        asyncio.create_task(trend_loop()),
-        asyncio.create_task(sentiment_loop()),
-        asyncio.create_task(weight_training_loop()),
-    ]
-    await asyncio.gather(*tasks)
-    if BINANCE_CLIENT:
-        await BINANCE_CLIENT.close_connection()
+    task = await start_trading()
+    try:
+        await task
+    finally:
+        await stop_trading()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+"""Account events from the Binance user data stream.
+
+``UserDataStream`` keeps one user data socket open for the shared client
+and passes every event (``executionReport``, ``outboundAccountPosition``,
+...) to the registered listeners, so strategies learn about fills without
+polling open orders. Each time the socket (re)connects listeners receive a
+``{"e": "streamConnected"}`` event; events may have been missed before it.
+"""
+
+import asyncio
+import logging
+
+import binance_client
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before reopening a stream that failed.
+RECONNECT_DELAY = 5
+
+# Event type dispatched each time the socket (re)connects.
+STREAM_CONNECTED = "streamConnected"
+
+
+class UserDataStream:
+    """Dispatches user data stream events to listeners."""
+
+    def __init__(self, client, stream_factory=None):
+        self.client = client
+        self._listeners = []
+        self._stream_factory = stream_factory or self._default_stream
+        self._task = None
+
+    def _default_stream(self):
+        if binance_client.is_simulated(self.client):
+            client = self.client
+            while hasattr(client, "__wrapped__"):
+                client = client.__wrapped__
+            return client.user_socket()
+        return binance_client.socket_manager(self.client).user_socket()
+
+    def add_listener(self, callback) -> None:
+        """Call ``callback(event)`` for every user data event."""
+        self._listeners.append(callback)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _dispatch(self, event: dict) -> None:
+        for callback in self._listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.exception("User data listener failed: %s", e)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with self._stream_factory() as stream:
+                    logger.info("Streaming user data")
+                    self._dispatch({"e": STREAM_CONNECTED})
+                    while True:
+                        msg = await stream.recv()
+                        if msg is None:
+                            logger.info("User data stream ended")
+                            return
+                        if msg.get("e") == "error":
+                            raise RuntimeError(msg.get("m", "stream error"))
+                        self._dispatch(msg)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("User data stream failed, reconnecting: %s", e)
+                await asyncio.sleep(RECONNECT_DELAY)
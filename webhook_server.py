@@ -0,0 +1,188 @@
+"""Webhook front end for the Telegram bot.
+
+Instead of long-polling ``getUpdates``, Telegram can POST every update to a
+public HTTPS URL. ``WebhookServer`` receives those requests with an embedded
+aiohttp server running on the bot's own event loop, so command handlers and
+the trading tasks they start share one loop. Webhook mode is selected by
+setting ``TELEGRAM_WEBHOOK_URL``.
+
+Update latency is recorded in both polling and webhook mode (see
+``install_latency_handlers``); the webhook server also serves it as JSON on
+``/metrics``.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import TypeHandler
+
+logger = logging.getLogger(__name__)
+
+# Header carrying the secret token given to setWebhook.
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+# Handler group running before and after every command handler.
+FIRST_GROUP = -100
+LAST_GROUP = 100
+
+
+class LatencyStats:
+    """Summary of the most recent latency samples, in seconds."""
+
+    def __init__(self, size: int = 1000):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self) -> dict:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"count": self.count}
+        return {
+            "count": self.count,
+            "mean": sum(ordered) / len(ordered),
+            "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max": ordered[-1],
+        }
+
+
+# "handling": from receiving an update to its handlers finishing.
+# "delivery": from Telegram's message timestamp (whole seconds) to handled,
+# which includes the polling delay and so compares the two modes.
+LATENCY = {"handling": LatencyStats(), "delivery": LatencyStats()}
+_received = {}
+
+
+def mark_received(update_id: int, at: float = None) -> None:
+    """Record when ``update_id`` reached the bot, unless already recorded."""
+    _received.setdefault(update_id, time.perf_counter() if at is None else at)
+
+
+async def _mark_dispatched(update, context) -> None:
+    # polling mode has no earlier point at which to see the update
+    mark_received(update.update_id)
+
+
+async def _record_handled(update, context) -> None:
+    started = _received.pop(update.update_id, None)
+    if started is not None:
+        LATENCY["handling"].record(time.perf_counter() - started)
+    message = update.effective_message
+    if message is not None and message.date is not None:
+        LATENCY["delivery"].record(max(0.0, time.time() - message.date.timestamp()))
+
+
+def install_latency_handlers(application) -> None:
+    """Measure the latency of every update ``application`` handles."""
+    application.add_handler(TypeHandler(Update, _mark_dispatched), group=FIRST_GROUP)
+    application.add_handler(TypeHandler(Update, _record_handled), group=LAST_GROUP)
+
+
+def latency_summary() -> dict:
+    return {name: stats.summary() for name, stats in LATENCY.items()}
+
+
+class WebhookServer:
+    """Receives Telegram updates over HTTP and feeds them to an Application."""
+
+    def __init__(
+        self,
+        application,
+        url: str = None,
+        listen: str = None,
+        port: int = None,
+        secret: str = None,
+    ):
+        self.application = application
+        self.url = url if url is not None else os.getenv("TELEGRAM_WEBHOOK_URL", "")
+        self.listen = listen or os.getenv("TELEGRAM_WEBHOOK_LISTEN", "0.0.0.0")
+        self.port = port if port is not None else int(os.getenv("TELEGRAM_WEBHOOK_PORT", "8443"))
+        self.secret = secret if secret is not None else os.getenv("TELEGRAM_WEBHOOK_SECRET")
+        self.path = urlparse(self.url).path or "/telegram"
+        self._runner = None
+        self.stats = {"updates": 0, "rejected": 0}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self._handle_update)
+        app.router.add_get("/metrics", self._handle_metrics)
+        return app
+
+    async def _handle_update(self, request) -> web.Response:
+        received = time.perf_counter()
+        if self.secret and request.headers.get(SECRET_HEADER) != self.secret:
+            self.stats["rejected"] += 1
+            return web.Response(status=403)
+        try:
+            update = Update.de_json(await request.json(), self.application.bot)
+        except ValueError:
+            update = None
+        if update is None:
+            self.stats["rejected"] += 1
+            return web.Response(status=400)
+        self.stats["updates"] += 1
+        mark_received(update.update_id, received)
+        # answer at once; the application processes the update in the background
+        await self.application.update_queue.put(update)
+        return web.Response()
+
+    async def _handle_metrics(self, request) -> web.Response:
+        return web.json_response(dict(self.stats, latency=latency_summary()))
+
+    async def start(self) -> None:
+        """Start serving and, when a public URL is set, register it with Telegram."""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.listen, self.port).start()
+        logger.info("Webhook listening on %s:%s%s", self.listen, self.port, self.path)
+        if self.url:
+            await self.application.bot.set_webhook(
+                url=self.url, secret_token=self.secret or None, allowed_updates=Update.ALL_TYPES
+            )
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def serve(application, server: WebhookServer = None, stop_event=None) -> None:
+    """Run ``application`` on webhook updates until SIGINT/SIGTERM or ``stop_event``.
+
+    Mirrors ``Application.run_polling``: initialize, start, then on exit stop,
+    ``post_stop``, shutdown and ``post_shutdown``.
+    """
+    server = server or WebhookServer(application)
+    stop_event = stop_event or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    await application.initialize()
+    try:
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+        await server.start()
+        await stop_event.wait()
+    finally:
+        await server.stop()
+        if application.running:
+            await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
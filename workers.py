@@ -0,0 +1,163 @@
+"""Shard the trading symbols across worker processes.
+
+Each worker process runs its own event loop, exchange client, market data
+hub and scheduler for a subset of ``CONFIG["symbols"]``, and workers share
+nothing with each other. Telegram messages and trained weights travel from
+the workers to the front end over one multiprocessing queue; configuration
+changes go back over one queue per worker.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+
+import rate_limit
+
+logger = logging.getLogger(__name__)
+
+
+def shard_symbols(symbols, workers: int) -> list:
+    """Split ``symbols`` round-robin into at most ``workers`` non-empty shards."""
+    shards = [list(symbols[i::workers]) for i in range(max(workers, 1))]
+    return [shard for shard in shards if shard]
+
+
+def worker_state_path(index: int) -> str:
+    """Weight state file of worker ``index`` (``weight_state.<index>.json``)."""
+    root, ext = os.path.splitext(os.getenv("WEIGHT_STATE_PATH", "weight_state.json"))
+    return f"{root}.{index}{ext or '.json'}"
+
+
+class WorkerChannel:
+    """Worker side of the IPC channel; stands in for the Telegram bot."""
+
+    def __init__(self, outbox):
+        self.outbox = outbox
+
+    async def send_message(self, chat_id=None, text=None, **kwargs):
+        self.outbox.put(("message", dict(chat_id=chat_id, text=text, **kwargs)))
+
+    def report_weights(self, weights: dict) -> None:
+        self.outbox.put(("weights", weights))
+
+
+async def _run_worker(index, symbols, config, chat_id, workers, outbox, inbox):
+    # Imported here: trading_tasks itself imports this module.
+    import trading_tasks
+
+    trading_tasks.CONFIG.update(config)
+    trading_tasks.CONFIG["symbols"] = symbols
+    trading_tasks.TRADING_WORKERS = 0
+    trading_tasks.TELEGRAM_CHAT_ID = chat_id
+    trading_tasks.WORKER_CHANNEL = trading_tasks.TELEGRAM_BOT = WorkerChannel(outbox)
+    trading_tasks.WEIGHT_STATE_PATH = worker_state_path(index)
+    # Workers share the account's request weight for historical downloads.
+    budget = rate_limit.DOWNLOAD_WEIGHT
+    rate_limit.DOWNLOAD_WEIGHT = rate_limit.TokenBucket(
+        budget.capacity / workers, budget.capacity / budget.rate
+    )
+    logger.info("Worker %d trading %s", index, ", ".join(symbols))
+
+    runner = await trading_tasks.start_trading()
+    loop = asyncio.get_running_loop()
+    try:
+        while not runner.done():
+            kind, payload = await loop.run_in_executor(None, inbox.get)
+            if kind == "stop":
+                break
+            if kind == "config":
+                config, chat_id = payload
+                trading_tasks.CONFIG.update(config)
+                trading_tasks.CONFIG["symbols"] = symbols
+                trading_tasks.TELEGRAM_CHAT_ID = chat_id
+    finally:
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+        await trading_tasks.stop_trading()
+
+
+def _worker_main(index, symbols, config, chat_id, workers, outbox, inbox):
+    try:
+        asyncio.run(
+            _run_worker(index, symbols, config, chat_id, workers, outbox, inbox)
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+class WorkerPool:
+    """Front-end handle on the worker processes."""
+
+    def __init__(self, workers: int, on_message=None, on_weights=None):
+        self.workers = workers
+        # async callback for Telegram messages sent by the workers
+        self.on_message = on_message
+        # callback for {symbol: weights} trained by the workers
+        self.on_weights = on_weights
+        self._context = multiprocessing.get_context("spawn")
+        self._outbox = self._context.Queue()
+        self._processes = []
+        self._relay_task = None
+
+    def start(self, config: dict, chat_id=None) -> asyncio.Task:
+        """Start one process per shard of ``config["symbols"]``.
+
+        Returns the task relaying worker messages, which runs until
+        :meth:`stop`.
+        """
+        shards = shard_symbols(config["symbols"], self.workers)
+        for index, symbols in enumerate(shards):
+            inbox = self._context.Queue()
+            process = self._context.Process(
+                target=_worker_main,
+                args=(index, symbols, config, chat_id, len(shards), self._outbox, inbox),
+                name=f"trading-worker-{index}",
+            )
+            process.start()
+            self._processes.append((process, inbox, symbols))
+        logger.info("Started %d trading worker(s)", len(shards))
+        self._relay_task = asyncio.create_task(self._relay())
+        return self._relay_task
+
+    def shards(self) -> list:
+        """Return ``(symbols, alive)`` for every worker."""
+        return [(symbols, process.is_alive()) for process, _, symbols in self._processes]
+
+    def update_config(self, config: dict, chat_id=None) -> None:
+        """Send a new ``CONFIG`` (each worker keeps its own symbols) and chat ID."""
+        for _, inbox, _ in self._processes:
+            inbox.put(("config", (config, chat_id)))
+
+    async def _relay(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await loop.run_in_executor(None, self._outbox.get)
+            if item is None:
+                return
+            kind, payload = item
+            try:
+                if kind == "message" and self.on_message is not None:
+                    await self.on_message(payload)
+                elif kind == "weights" and self.on_weights is not None:
+                    self.on_weights(payload)
+            except Exception as e:
+                logger.error("Failed to handle worker %s: %s", kind, e)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Ask every worker to stop, terminating those that do not exit in time."""
+        loop = asyncio.get_running_loop()
+        for process, inbox, _ in self._processes:
+            if process.is_alive():
+                inbox.put(("stop", None))
+        for process, _, _ in self._processes:
+            await loop.run_in_executor(None, process.join, timeout)
+            if process.is_alive():
+                logger.warning("Terminating unresponsive %s", process.name)
+                process.terminate()
+        self._processes.clear()
+        # unblock the relay's pending get()
+        self._outbox.put(None)
+        if self._relay_task is not None:
+            await asyncio.gather(self._relay_task, return_exceptions=True)
+            self._relay_task = None